@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Embed a compact CISA Known Exploited Vulnerabilities (KEV) catalog snapshot
+into the vulnerability transformations.
+
+Transformations run in a RestrictedPython sandbox and cannot read files or
+make network calls, so the catalog is shipped inside the transformation
+source. Each CVE is stored as its sequence number under its year, e.g.
+{"2021": "26855,44228"}, sorted within each year. The transform expands that
+once per process into a set for O(1) membership checks.
+
+Any transformation containing the snapshot markers below is rewritten:
+
+    # BEGIN KEV CATALOG SNAPSHOT
+    ...
+    # END KEV CATALOG SNAPSHOT
+
+Usage:
+    python generate_kev_index.py                       # download the live feed
+    python generate_kev_index.py known_exploited_vulnerabilities.json
+"""
+
+import json
+import re
+import sys
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List
+
+KEV_FEED_URL = "https://www.cisa.gov/sites/default/files/feeds/known_exploited_vulnerabilities.json"
+BEGIN_MARKER = "# BEGIN KEV CATALOG SNAPSHOT"
+END_MARKER = "# END KEV CATALOG SNAPSHOT"
+CVE_PATTERN = re.compile(r"^CVE-(\d{4})-(\d{4,})$")
+LINE_WIDTH = 100
+
+
+def load_feed(source: str = None) -> Dict[str, Any]:
+    """Load the CISA KEV feed from a local file, or download it when no path is given."""
+    if source:
+        with open(source) as f:
+            return json.load(f)
+    with urllib.request.urlopen(KEV_FEED_URL, timeout=60) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def compact_catalog(feed: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Group catalog CVE IDs by year as sorted sequence-number strings."""
+    by_year: Dict[str, set] = {}
+    for vuln in feed.get("vulnerabilities", []):
+        match = CVE_PATTERN.match(str(vuln.get("cveID", "")).strip().upper())
+        if match:
+            by_year.setdefault(match.group(1), set()).add(match.group(2))
+    return {year: sorted(ids, key=int) for year, ids in sorted(by_year.items())}
+
+
+def render_snapshot(feed: Dict[str, Any], catalog: Dict[str, List[str]]) -> str:
+    """Render the marker-delimited snapshot block embedded in transformations."""
+    total = sum(len(ids) for ids in catalog.values())
+    lines = [
+        f"{BEGIN_MARKER} (generated by generate_kev_index.py - do not edit)",
+        f"KEV_CATALOG_VERSION = {json.dumps(feed.get('catalogVersion', ''))}",
+        f"KEV_CATALOG_RELEASED = {json.dumps(feed.get('dateReleased', ''))}",
+        f"KEV_CATALOG_COUNT = {total}",
+    ]
+    if not catalog:
+        lines.append("KEV_CATALOG = {}")
+    else:
+        lines.append("KEV_CATALOG = {")
+        for year, ids in catalog.items():
+            joined = ",".join(ids)
+            chunks = [joined[i:i + LINE_WIDTH] for i in range(0, len(joined), LINE_WIDTH)]
+            lines.append(f'    "{year}": (')
+            for chunk in chunks:
+                lines.append(f'        "{chunk}"')
+            lines.append("    ),")
+        lines.append("}")
+    lines.append(END_MARKER)
+    return "\n".join(lines)
+
+
+def update_transformations(safeguards_path: Path, snapshot: str) -> List[Path]:
+    """Replace the snapshot block in every transformation that embeds one."""
+    pattern = re.compile(re.escape(BEGIN_MARKER) + r".*?" + re.escape(END_MARKER), re.DOTALL)
+    updated = []
+    for path in sorted(safeguards_path.rglob("*.py")):
+        if "schemas" in path.parts:
+            continue
+        source = path.read_text()
+        if BEGIN_MARKER not in source:
+            continue
+        path.write_text(pattern.sub(lambda _: snapshot, source, count=1))
+        updated.append(path)
+    return updated
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else None
+    feed = load_feed(source)
+    catalog = compact_catalog(feed)
+    snapshot = render_snapshot(feed, catalog)
+
+    safeguards_path = Path(__file__).parent / "safeguards"
+    updated = update_transformations(safeguards_path, snapshot)
+
+    print(f"KEV catalog {feed.get('catalogVersion', 'unknown')}: "
+          f"{sum(len(ids) for ids in catalog.values())} CVEs across {len(catalog)} years")
+    for path in updated:
+        print(f"  Updated {path.relative_to(safeguards_path.parent)}")
+    if not updated:
+        print(f"  No transformations contain '{BEGIN_MARKER}'")
+
+
+if __name__ == "__main__":
+    main()
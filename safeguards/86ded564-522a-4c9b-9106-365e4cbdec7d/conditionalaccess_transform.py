@@ -0,0 +1,300 @@
+"""
+Transformation: conditionalaccess_transform
+Vendor: Microsoft Entra ID  |  Category: Conditional Access
+Evaluates: Every Conditional Access criterion from one compiled view of the policies.
+
+Policies (GET /identity/conditionalAccess/policies, a single response or a list of
+@odata.nextLink pages) are compiled once into include/exclude sets for users,
+groups, roles and applications plus a grant-control bitmask, and indexed by role
+and by application. Criteria are then answered with set operations:
+
+  conditionalAccessPoliciesActive, isMFARequiredForCloudApps,
+  isMFARequiredForRemoteAccess, legacyAuthBlocked,
+  isMFARequiredForAllUsers (all users, all cloud apps) and adminMFACoverage
+
+Optional "groupMembers" ({groupId: [userId, ...]}) resolves excluded groups to the
+effective set of users exempted from the all-users MFA policies.
+"""
+import json
+from datetime import datetime
+
+
+def extract_input(input_data):
+    if isinstance(input_data, dict) and "data" in input_data and "validation" in input_data:
+        return input_data["data"], input_data["validation"]
+    data = input_data
+    if isinstance(data, dict):
+        wrapper_keys = ["api_response", "response", "result", "apiResponse", "Output"]
+        for _ in range(3):
+            unwrapped = False
+            for key in wrapper_keys:
+                if key in data and isinstance(data.get(key), dict):
+                    data = data[key]
+                    unwrapped = True
+                    break
+            if not unwrapped:
+                break
+    return data, {"status": "unknown", "errors": [], "warnings": ["Legacy input format"]}
+
+
+def create_response(result, validation=None, pass_reasons=None, fail_reasons=None,
+                    recommendations=None, input_summary=None, transformation_errors=None,
+                    api_errors=None, additional_findings=None):
+    if validation is None:
+        validation = {"status": "unknown", "errors": [], "warnings": []}
+    return {
+        "transformedResponse": result,
+        "additionalInfo": {
+            "dataCollection": {"status": "error" if (api_errors or []) else "success", "errors": api_errors or []},
+            "validation": {"status": validation.get("status", "unknown"), "errors": validation.get("errors", []), "warnings": validation.get("warnings", [])},
+            "transformation": {"status": "error" if (transformation_errors or []) else "success", "errors": transformation_errors or [], "inputSummary": input_summary or {}},
+            "evaluation": {"passReasons": pass_reasons or [], "failReasons": fail_reasons or [], "recommendations": recommendations or [], "additionalFindings": additional_findings or []},
+            "metadata": {"evaluatedAt": datetime.utcnow().isoformat() + "Z", "schemaVersion": "1.0", "transformationId": "conditionalaccess_transform", "vendor": "Microsoft Entra ID", "category": "Conditional Access"}
+        }
+    }
+
+
+GRANT_BITS = {
+    "mfa": 1,
+    "block": 2,
+    "compliantDevice": 4,
+    "domainJoinedDevice": 8,
+    "approvedApplication": 16,
+    "compliantApplication": 32,
+    "passwordChange": 64,
+}
+AUTH_STRENGTH_BIT = 128
+MFA_BITS = GRANT_BITS["mfa"] | AUTH_STRENGTH_BIT
+LEGACY_CLIENT_APP_TYPES = {"exchangeActiveSync", "other"}
+
+# Directory role templates targeted by Microsoft's "Require MFA for administrators" policy
+ADMIN_ROLE_TEMPLATES = {
+    "62e90394-69f5-4237-9190-012177145e10": "Global Administrator",
+    "9b895d92-2cd3-44c7-9d02-a6ac2d5ea5c3": "Application Administrator",
+    "c4e39bd9-1100-46d3-8c65-fb160da0b8e4": "Authentication Administrator",
+    "b0f54661-2d74-4c50-afa3-1ec803f12efe": "Billing Administrator",
+    "158c047a-c907-4556-b7ef-446551a6b5f7": "Cloud Application Administrator",
+    "b1be1c3e-b65d-4f19-8427-f6fa0d97feb9": "Conditional Access Administrator",
+    "29232cdf-9323-42fd-ade2-1d097af3e4de": "Exchange Administrator",
+    "729827e3-9c14-49f7-bb1b-9608f156bbb8": "Helpdesk Administrator",
+    "966707d0-3269-4727-9be2-8c3a10f19b9d": "Password Administrator",
+    "7be44c8a-adaf-4e2a-84d6-ab2649e08a13": "Privileged Authentication Administrator",
+    "e8611ab8-c189-46e8-94e1-60213ab1f814": "Privileged Role Administrator",
+    "194ae4cb-b126-40b2-bd5b-6091b380977d": "Security Administrator",
+    "f28a1f50-f6e7-4571-818b-6a12f2af6b6c": "SharePoint Administrator",
+    "fe930be7-5e62-47db-91af-98c3a49a38b1": "User Administrator",
+}
+
+
+def extract_policies(data):
+    """Policies from a Graph list response, a bare list, or a list of nextLink pages."""
+    if isinstance(data, dict):
+        if isinstance(data.get("pages"), list):
+            data = data["pages"]
+        else:
+            return [p for p in data.get("value", []) or [] if isinstance(p, dict)]
+    policies = []
+    for item in data if isinstance(data, list) else []:
+        if isinstance(item, dict) and isinstance(item.get("value"), list) and "conditions" not in item:
+            policies.extend(p for p in item["value"] if isinstance(p, dict))
+        elif isinstance(item, dict):
+            policies.append(item)
+    return policies
+
+
+def as_set(values):
+    return set(v for v in values or [] if isinstance(v, str))
+
+
+def compile_policy(policy):
+    """Flatten one CA policy into sets and a grant-control bitmask."""
+    conditions = policy.get("conditions") or {}
+    users = conditions.get("users") or {}
+    applications = conditions.get("applications") or {}
+    locations = conditions.get("locations") or {}
+    grant = policy.get("grantControls") or {}
+
+    built_in = grant.get("builtInControls") or []
+    grant_bits = 0
+    for control in built_in:
+        grant_bits = grant_bits | GRANT_BITS.get(control, 0)
+    if grant.get("authenticationStrength"):
+        grant_bits = grant_bits | AUTH_STRENGTH_BIT
+
+    return {
+        "id": policy.get("id"),
+        "name": policy.get("displayName", "Unknown"),
+        "enabled": policy.get("state") == "enabled",
+        "grantBits": grant_bits,
+        "blockOnly": built_in == ["block"],
+        "includeUsers": as_set(users.get("includeUsers")),
+        "excludeUsers": as_set(users.get("excludeUsers")),
+        "includeGroups": as_set(users.get("includeGroups")),
+        "excludeGroups": as_set(users.get("excludeGroups")),
+        "includeRoles": as_set(users.get("includeRoles")),
+        "excludeRoles": as_set(users.get("excludeRoles")),
+        "includeApplications": as_set(applications.get("includeApplications")),
+        "excludeApplications": as_set(applications.get("excludeApplications")),
+        "clientAppTypes": as_set(conditions.get("clientAppTypes")),
+        "includeLocations": list(locations.get("includeLocations", []) or []),
+    }
+
+
+def compile_policies(policies):
+    """Compile every policy once and index enabled MFA policies by role and by application."""
+    compiled = [compile_policy(p) for p in policies]
+    by_role = {}
+    by_application = {}
+    for position, policy in enumerate(compiled):
+        if not policy["enabled"] or not policy["grantBits"] & MFA_BITS:
+            continue
+        for role in policy["includeRoles"]:
+            by_role.setdefault(role, []).append(position)
+        for application in policy["includeApplications"]:
+            by_application.setdefault(application, []).append(position)
+    return {"policies": compiled, "mfaByRole": by_role, "mfaByApplication": by_application}
+
+
+def requires_mfa(policy):
+    return policy["enabled"] and bool(policy["grantBits"] & MFA_BITS)
+
+
+def all_users_all_apps_mfa(engine):
+    """Enabled MFA policies targeting All users on All cloud apps."""
+    return [
+        position for position in engine["mfaByApplication"].get("All", [])
+        if "All" in engine["policies"][position]["includeUsers"]
+    ]
+
+
+def excluded_users(engine, positions, group_members):
+    """Users exempted from every one of the given policies (set intersection across policies)."""
+    exempt = None
+    for position in positions:
+        policy = engine["policies"][position]
+        users = set(policy["excludeUsers"])
+        for group in policy["excludeGroups"]:
+            users = users | as_set(group_members.get(group))
+        exempt = users if exempt is None else exempt & users
+    return exempt or set()
+
+
+def admin_coverage(engine):
+    """Admin role templates covered by an enabled MFA policy on All cloud apps without excluding the role."""
+    all_app_policies = set(engine["mfaByApplication"].get("All", []))
+    all_users_policies = set(all_users_all_apps_mfa(engine))
+    covered = []
+    uncovered = []
+    for role, role_name in ADMIN_ROLE_TEMPLATES.items():
+        candidates = (set(engine["mfaByRole"].get(role, [])) & all_app_policies) | all_users_policies
+        if any(role not in engine["policies"][p]["excludeRoles"] for p in candidates):
+            covered.append(role_name)
+        else:
+            uncovered.append(role_name)
+    return covered, uncovered
+
+
+def evaluate(data):
+    policies = extract_policies(data)
+    engine = compile_policies(policies)
+    compiled = engine["policies"]
+    group_members = data.get("groupMembers", {}) if isinstance(data, dict) else {}
+    if not isinstance(group_members, dict):
+        group_members = {}
+
+    enabled = [p for p in compiled if p["enabled"]]
+    cloud_apps = [compiled[i]["name"] for i in engine["mfaByApplication"].get("All", [])]
+    remote_access = [p["name"] for p in compiled if requires_mfa(p) and p["includeLocations"] != ["AllTrusted"]]
+    legacy_block = [
+        p["name"] for p in enabled
+        if p["blockOnly"] and p["clientAppTypes"] & LEGACY_CLIENT_APP_TYPES
+    ]
+    all_users_positions = all_users_all_apps_mfa(engine)
+    exempt_users = excluded_users(engine, all_users_positions, group_members)
+    covered_roles, uncovered_roles = admin_coverage(engine)
+    admin_percentage = round(len(covered_roles) / len(ADMIN_ROLE_TEMPLATES) * 100, 1)
+
+    return {
+        "conditionalAccessPoliciesActive": len(enabled) > 0,
+        "isMFARequiredForCloudApps": len(cloud_apps) > 0,
+        "isMFARequiredForRemoteAccess": len(remote_access) > 0,
+        "legacyAuthBlocked": len(legacy_block) > 0,
+        "isMFARequiredForAllUsers": len(all_users_positions) > 0,
+        "adminMFACoverage": admin_percentage,
+        "enabledPolicyCount": len(enabled),
+        "totalPolicyCount": len(compiled),
+        "cloudAppMFAPolicies": cloud_apps,
+        "remoteAccessMFAPolicies": remote_access,
+        "legacyAuthBlockingPolicies": legacy_block,
+        "allUsersMFAPolicies": [compiled[i]["name"] for i in all_users_positions],
+        "allUsersMFAExemptUserCount": len(exempt_users),
+        "adminRolesCovered": covered_roles,
+        "adminRolesUncovered": uncovered_roles,
+    }
+
+
+CRITERIA = [
+    "conditionalAccessPoliciesActive",
+    "isMFARequiredForCloudApps",
+    "isMFARequiredForRemoteAccess",
+    "legacyAuthBlocked",
+    "isMFARequiredForAllUsers",
+]
+
+
+def transform(input):
+    try:
+        if isinstance(input, str):
+            input = json.loads(input)
+        elif isinstance(input, bytes):
+            input = json.loads(input.decode("utf-8"))
+
+        data, validation = extract_input(input)
+
+        if validation.get("status") == "failed":
+            return create_response(
+                result={key: False for key in CRITERIA},
+                validation=validation,
+                fail_reasons=["Input validation failed"]
+            )
+
+        result = evaluate(data)
+
+        pass_reasons = []
+        fail_reasons = []
+        recommendations = []
+        additional_findings = []
+        for key in CRITERIA:
+            additional_findings.append({"metric": key, "status": "pass" if result[key] else "fail"})
+            if result[key]:
+                pass_reasons.append(f"{key} check passed")
+            else:
+                fail_reasons.append(f"{key} check failed")
+                recommendations.append(f"Review Microsoft Entra ID configuration for {key}")
+        if result["adminRolesUncovered"]:
+            fail_reasons.append("Admin roles without an MFA policy on all cloud apps: "
+                                + ", ".join(result["adminRolesUncovered"]))
+        if result["allUsersMFAExemptUserCount"]:
+            fail_reasons.append(f"{result['allUsersMFAExemptUserCount']} users are excluded from all-users MFA policies")
+
+        return create_response(
+            result=result,
+            validation=validation,
+            pass_reasons=pass_reasons,
+            fail_reasons=fail_reasons,
+            recommendations=recommendations,
+            additional_findings=additional_findings,
+            input_summary={
+                "totalPolicyCount": result["totalPolicyCount"],
+                "enabledPolicyCount": result["enabledPolicyCount"],
+                "adminMFACoverage": result["adminMFACoverage"]
+            }
+        )
+
+    except Exception as e:
+        return create_response(
+            result={key: False for key in CRITERIA},
+            validation={"status": "error", "errors": [], "warnings": []},
+            transformation_errors=[str(e)],
+            fail_reasons=[f"Transformation error: {str(e)}"]
+        )
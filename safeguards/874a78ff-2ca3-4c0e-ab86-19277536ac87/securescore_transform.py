@@ -0,0 +1,256 @@
+"""
+Transformation: securescore_transform
+Vendor: Microsoft  |  Category: Identity / Secure Score
+
+Multi-criteria evaluation over a Microsoft Graph secureScores response. The latest
+snapshot's controlScores are indexed once by controlName (duplicate names are
+recorded, not silently merged) and rolled up per controlCategory; every Secure
+Score criterion is then answered from that index:
+
+  areAdminAccountsSeparate, areDLPPoliciesConfigured, areTransportRulesConfigured,
+  isAdminMFAPhishingResistant, isAppConsentRestricted, isAttachmentScanningEnabled,
+  isAutoForwardDisabled, isDataClassificationEnabled, isLegacyAuthBlocked,
+  isMailboxAuditingEnabled, isMFAEnforcedForUsers, isSafeAttachmentsEnabled,
+  isSafeLinksEnabled, isSafeLinksProtectionEnabled, isSMTPAuthDisabled
+
+A criterion passes when one of its controls appears exactly once with a
+scoreInPercentage of 100, matching the per-criterion transforms in this folder.
+"""
+import json
+from datetime import datetime
+
+
+TRANSFORM_ID = "securescore_transform"
+# criteriaKey -> controlNames; the criterion passes if any listed control is at 100%
+CRITERIA = [
+    ("areAdminAccountsSeparate", ["mdo_blockmailforward"]),
+    ("areDLPPoliciesConfigured", ["dlp_datalossprevention"]),
+    ("areTransportRulesConfigured", ["mdo_blockmailforward"]),
+    ("isAdminMFAPhishingResistant", ["aad_phishing_MFA_strength"]),
+    ("isAppConsentRestricted", ["IntegratedApps"]),
+    ("isAttachmentScanningEnabled", ["mdo_safeattachmentpolicy"]),
+    ("isAutoForwardDisabled", ["mdo_autoforwardingmode"]),
+    ("isDataClassificationEnabled", ["mip_sensitivitylabelspolicies"]),
+    ("isLegacyAuthBlocked", ["BlockLegacyAuthentication"]),
+    ("isMailboxAuditingEnabled", ["exo_mailboxaudit"]),
+    ("isMFAEnforcedForUsers", ["MFARegistrationV2"]),
+    ("isSafeAttachmentsEnabled", ["mdo_safeattachments", "mdo_safeattachmentpolicy"]),
+    ("isSafeLinksEnabled", ["mdo_safelinksforemail"]),
+    ("isSafeLinksProtectionEnabled", ["mdo_safelinksforemail"]),
+    ("isSMTPAuthDisabled", ["BlockLegacyAuthentication"]),
+]
+INDEX_CACHE = {}
+
+
+def extract_input(input_data):
+    if isinstance(input_data, dict) and "data" in input_data and "validation" in input_data:
+        return input_data["data"], input_data["validation"]
+    data = input_data
+    if isinstance(data, dict):
+        wrapper_keys = ["api_response", "response", "result", "apiResponse", "Output"]
+        for _ in range(3):
+            unwrapped = False
+            for key in wrapper_keys:
+                if key in data and isinstance(data.get(key), dict):
+                    data = data[key]
+                    unwrapped = True
+                    break
+            if not unwrapped:
+                break
+    return data, {"status": "unknown", "errors": [], "warnings": ["Legacy input format"]}
+
+
+def create_response(result, validation=None, pass_reasons=None, fail_reasons=None,
+                    recommendations=None, input_summary=None, transformation_errors=None,
+                    api_errors=None, additional_findings=None):
+    if validation is None:
+        validation = {"status": "unknown", "errors": [], "warnings": []}
+    return {
+        "transformedResponse": result,
+        "additionalInfo": {
+            "dataCollection": {"status": "error" if (api_errors or []) else "success", "errors": api_errors or []},
+            "validation": {"status": validation.get("status", "unknown"), "errors": validation.get("errors", []), "warnings": validation.get("warnings", [])},
+            "transformation": {"status": "error" if (transformation_errors or []) else "success", "errors": transformation_errors or [], "inputSummary": input_summary or {}},
+            "evaluation": {"passReasons": pass_reasons or [], "failReasons": fail_reasons or [], "recommendations": recommendations or [], "additionalFindings": additional_findings or []},
+            "metadata": {"evaluatedAt": datetime.utcnow().isoformat() + "Z", "schemaVersion": "1.0", "transformationId": TRANSFORM_ID, "vendor": "Microsoft", "category": "Identity"}
+        }
+    }
+
+
+def parse_api_error(raw_error: str, source: str = None) -> tuple:
+    """Parse raw API error into clean message with source."""
+    raw_lower = raw_error.lower() if raw_error else ''
+    src = source or "external service"
+
+    if '401' in raw_error:
+        return (f"Could not connect to {src}: Authentication failed (HTTP 401)",
+                f"Verify {src} credentials and permissions are valid")
+    elif '403' in raw_error:
+        return (f"Could not connect to {src}: Access denied (HTTP 403)",
+                f"Verify the integration has required {src} permissions")
+    elif '404' in raw_error:
+        return (f"Could not connect to {src}: Resource not found (HTTP 404)",
+                f"Verify the {src} resource and configuration exist")
+    elif '429' in raw_error:
+        return (f"Could not connect to {src}: Rate limited (HTTP 429)",
+                "Retry the request after waiting")
+    elif '500' in raw_error or '502' in raw_error or '503' in raw_error:
+        return (f"Could not connect to {src}: Service unavailable (HTTP 5xx)",
+                f"{src} may be temporarily unavailable, retry later")
+    elif 'timeout' in raw_lower:
+        return (f"Could not connect to {src}: Request timed out",
+                "Check network connectivity and retry")
+    elif 'connection' in raw_lower:
+        return (f"Could not connect to {src}: Connection failed",
+                "Check network connectivity and firewall settings")
+    else:
+        clean = raw_error[:80] + "..." if len(raw_error) > 80 else raw_error
+        return (f"Could not connect to {src}: {clean}",
+                f"Check {src} credentials and configuration")
+
+
+def to_number(value):
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return 0.0
+    return value if isinstance(value, (int, float)) else 0.0
+
+
+def build_index(snapshot):
+    """Index controlScores by controlName and roll them up per controlCategory."""
+    controls = {}
+    duplicates = []
+    categories = {}
+    for entry in snapshot.get("controlScores") or []:
+        if not isinstance(entry, dict):
+            continue
+        name = entry.get("controlName")
+        if name in controls:
+            controls[name].append(entry)
+            if name not in duplicates:
+                duplicates.append(name)
+        else:
+            controls[name] = [entry]
+        category = entry.get("controlCategory") or "Unknown"
+        rollup = categories.get(category)
+        if rollup is None:
+            rollup = {"controls": 0, "fullyScored": 0, "score": 0.0}
+            categories[category] = rollup
+        rollup["controls"] = rollup["controls"] + 1
+        rollup["score"] = rollup["score"] + to_number(entry.get("score"))
+        if to_number(entry.get("scoreInPercentage", 0.0)) == 100.00:
+            rollup["fullyScored"] = rollup["fullyScored"] + 1
+    return {"controls": controls, "duplicates": duplicates, "categories": categories}
+
+
+def snapshot_index(snapshot):
+    """Return the index for a snapshot, reusing it when the same snapshot is seen again."""
+    key = (snapshot.get("id"), snapshot.get("createdDateTime"), len(snapshot.get("controlScores") or []))
+    if key[0] is None or key[1] is None:
+        return build_index(snapshot)
+    if key not in INDEX_CACHE:
+        INDEX_CACHE[key] = build_index(snapshot)
+    return INDEX_CACHE[key]
+
+
+def control_status(index, name):
+    """Resolve one control: ("pass"|"fail", reason, entry) with duplicates treated as ambiguous."""
+    matched = index["controls"].get(name, [])
+    if len(matched) > 1:
+        return "fail", f"Ambiguous data: {len(matched)} objects match controlName '{name}'", None
+    if not matched:
+        return "fail", f"No control found matching '{name}' in Secure Score data", None
+    entry = matched[0]
+    score = entry.get("scoreInPercentage", 0.0)
+    count = entry.get("count", 0)
+    total = entry.get("total", 0)
+    if to_number(score) == 100.00:
+        return "pass", f"{name} score is 100% ({count}/{total})", entry
+    return "fail", f"{name} score is {score}% ({count}/{total})", entry
+
+
+def evaluate_mfa_methods(data):
+    """Fallback used by the per-criterion MFA transform when no Secure Score snapshot exists."""
+    methods = data.get("authenticationMethodConfigurations") or []
+    enabled = [m for m in methods if isinstance(m, dict) and str(m.get("state", "")).lower() == "enabled"]
+    if enabled:
+        names = [m.get("id", "unknown") for m in enabled[:5]]
+        return True, f"{len(enabled)} MFA methods enabled: {', '.join(names)}"
+    return False, "No MFA authentication methods are enabled"
+
+
+def evaluate_all(data):
+    """Answer every Secure Score criterion from the controlName index."""
+    values = data.get("value") or []
+    snapshot = values[0] if values and isinstance(values[0], dict) else None
+    index = snapshot_index(snapshot) if snapshot is not None else None
+    result = {}
+    findings = []
+    for key, control_names in CRITERIA:
+        if index is None:
+            if key == "isMFAEnforcedForUsers" and "authenticationMethodConfigurations" in data:
+                passed, reason = evaluate_mfa_methods(data)
+            else:
+                passed, reason = False, "Microsoft Secure Score data not available - verify API permissions"
+            result[key] = passed
+            findings.append({"metric": key, "status": "pass" if passed else "fail", "reason": reason})
+            continue
+        statuses = [control_status(index, name) for name in control_names]
+        passed = any(s[0] == "pass" for s in statuses)
+        primary = statuses[-1][2]
+        result[key] = passed
+        result[key + "ScoreInPercentage"] = primary.get("scoreInPercentage", 0.0) if primary else 0.0
+        findings.append({"metric": key, "status": "pass" if passed else "fail",
+                         "reason": "; ".join(s[1] for s in statuses)})
+    return result, findings, index
+
+
+def transform(input):
+    try:
+        if isinstance(input, str):
+            input = json.loads(input)
+        elif isinstance(input, bytes):
+            input = json.loads(input.decode("utf-8"))
+        data, validation = extract_input(input)
+        default_result = {key: False for key, _ in CRITERIA}
+
+        if isinstance(data, dict) and 'PSError' in data:
+            api_error, recommendation = parse_api_error(data.get('PSError', ''), source="Microsoft 365")
+            return create_response(
+                result=default_result,
+                validation={"status": "skipped", "errors": [], "warnings": ["API returned error"]},
+                api_errors=[api_error], fail_reasons=["Could not retrieve data from Microsoft 365"],
+                recommendations=[recommendation])
+        if validation.get("status") == "failed":
+            return create_response(result=default_result, validation=validation,
+                                   fail_reasons=["Input validation failed"])
+
+        result, findings, index = evaluate_all(data)
+        pass_reasons = []
+        fail_reasons = []
+        recommendations = []
+        for finding in findings:
+            if finding["status"] == "pass":
+                pass_reasons.append(f"{finding['metric']} check passed")
+            else:
+                fail_reasons.append(f"{finding['metric']} check failed: {finding['reason']}")
+                recommendations.append(f"Review Microsoft configuration for {finding['metric']}")
+        if index is not None and index["duplicates"]:
+            recommendations.append("Check Microsoft Secure Score data for duplicate control entries")
+        summary = {
+            "hasSecureScoreData": index is not None,
+            "controlsIndexed": len(index["controls"]) if index else 0,
+            "duplicateControlNames": index["duplicates"] if index else [],
+            "categoryRollups": index["categories"] if index else {},
+        }
+        return create_response(
+            result=result, validation=validation, pass_reasons=pass_reasons,
+            fail_reasons=fail_reasons, recommendations=recommendations,
+            input_summary=summary, additional_findings=findings)
+    except Exception as e:
+        return create_response(
+            result={key: False for key, _ in CRITERIA},
+            validation={"status": "error", "errors": [], "warnings": []},
+            transformation_errors=[str(e)], fail_reasons=[f"Transformation error: {str(e)}"])
@@ -4,12 +4,23 @@ Vendor: Security Ratings
 Category: Risk Management
 
 Calculates the risk score based on the input data.
+
+Portfolio mode: when the input carries many companies ("companies", a portfolio
+"results" list, or "pages" of either), every company's rating_details are read
+once into a companies x attributes ratings matrix. Per-company results and
+per-attribute portfolio percentiles are computed from the matrix in a single
+invocation.
 """
 
 import json
 from datetime import datetime
 
 
+RATING_THRESHOLD = 700
+PERCENTILES = (10, 25, 50, 75, 90)
+MAX_REPORTED_SKIPPED = 50
+
+
 def extract_input(input_data):
     if isinstance(input_data, dict) and "data" in input_data and "validation" in input_data:
         return input_data["data"], input_data["validation"]
@@ -66,11 +77,127 @@ def create_response(result, validation=None, pass_reasons=None, fail_reasons=Non
     }
 
 
-def transform(input):
-    low_ratings = []
-    lowest_rating = 0
-    low_count = 0
+def portfolio_companies(data):
+    """
+    Company records of a portfolio export (a companies/results list, or pages of
+    them) and the identifiers of records skipped for lacking rating_details;
+    None if not a portfolio.
+    """
+    if isinstance(data, list):
+        pages = [data]
+    elif isinstance(data, dict) and isinstance(data.get("pages"), list):
+        pages = data["pages"]
+    elif isinstance(data, dict) and isinstance(data.get("companies"), list):
+        pages = [data["companies"]]
+    elif isinstance(data, dict) and isinstance(data.get("results"), list):
+        pages = [data["results"]]
+    else:
+        return None
+    companies = []
+    skipped = []
+    for page in pages:
+        if isinstance(page, dict):
+            page = page.get("companies", page.get("results", []))
+        for company in page if isinstance(page, list) else []:
+            if isinstance(company, dict) and isinstance(company.get("rating_details"), dict):
+                companies.append(company)
+            elif isinstance(company, dict):
+                skipped.append(str(company.get("name", company.get("guid", "company-" + str(len(skipped))))))
+            else:
+                skipped.append("company-" + str(len(skipped)))
+    return companies, skipped
 
+
+def numeric_rating(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def build_ratings_matrix(companies):
+    """
+    Companies x attributes matrix of numeric ratings (None where missing or n/a),
+    with attribute columns numbered in first-seen order.
+    """
+    attributes = []
+    columns = {}
+    rows = []
+    for company in companies:
+        row = [None] * len(attributes)
+        for attribute, detail in company["rating_details"].items():
+            column = columns.get(attribute)
+            if column is None:
+                column = len(attributes)
+                columns[attribute] = column
+                attributes.append(attribute)
+                row.append(None)
+            if isinstance(detail, dict):
+                row[column] = numeric_rating(detail.get("rating"))
+        rows.append(row)
+    for row in rows:
+        row.extend([None] * (len(attributes) - len(row)))
+    return {"attributes": attributes, "rows": rows}
+
+
+def percentile_summary(values):
+    """Nearest-rank percentiles of a list of numbers."""
+    ordered = sorted(values)
+    summary = {"companies": len(ordered)}
+    for percentile in PERCENTILES:
+        if ordered:
+            rank = max(0, (percentile * len(ordered) + 99) // 100 - 1)
+            summary["p" + str(percentile)] = ordered[rank]
+        else:
+            summary["p" + str(percentile)] = None
+    return summary
+
+
+def evaluate_portfolio(companies):
+    matrix = build_ratings_matrix(companies)
+    attributes = matrix["attributes"]
+    rows = matrix["rows"]
+
+    results = {}
+    lowest_ratings = []
+    total_low = 0
+    for company, row in zip(companies, rows):
+        rated = [rating for rating in row if rating is not None]
+        low_attributes = [attributes[column] for column, rating in enumerate(row)
+                          if rating is not None and rating < RATING_THRESHOLD]
+        lowest_rating = min(rated) if rated else 0
+        key = str(company.get("guid", company.get("name", len(results))))
+        results[key] = {
+            "name": company.get("name", ""),
+            "riskThreshold": lowest_rating,
+            "count": len(low_attributes),
+            "lowAttributes": low_attributes
+        }
+        lowest_ratings.append(lowest_rating)
+        total_low = total_low + len(low_attributes)
+
+    attribute_percentiles = {}
+    below_threshold = {}
+    for column, attribute in enumerate(attributes):
+        values = [row[column] for row in rows if row[column] is not None]
+        attribute_percentiles[attribute] = percentile_summary(values)
+        below_threshold[attribute] = len([v for v in values if v < RATING_THRESHOLD])
+
+    non_zero = [rating for rating in lowest_ratings if rating > 0]
+    return {
+        "riskThreshold": min(non_zero) if non_zero else 0,
+        "count": total_low,
+        "companyCount": len(companies),
+        "companiesWithLowRatings": len([r for r in results.values() if r["count"] > 0]),
+        "attributeCount": len(attributes),
+        "lowestRatingPercentiles": percentile_summary(non_zero),
+        "attributePercentiles": attribute_percentiles,
+        "companiesBelowThresholdByAttribute": below_threshold,
+        "companies": results
+    }
+
+
+def transform(input):
     try:
         if isinstance(input, str):
             input = json.loads(input)
@@ -90,6 +217,41 @@ def transform(input):
         fail_reasons = []
         recommendations = []
 
+        portfolio_input = portfolio_companies(data)
+        if portfolio_input is not None:
+            companies, skipped = portfolio_input
+            portfolio = evaluate_portfolio(companies)
+            portfolio["companiesWithoutRatingDetails"] = len(skipped)
+            portfolio["skippedCompanies"] = skipped[:MAX_REPORTED_SKIPPED]
+            if portfolio["companyCount"] == 0:
+                fail_reasons.append("No companies with rating_details to evaluate")
+                recommendations.append("Collect company details (GET /ratings/v1/companies/{guid}) including rating_details")
+            elif portfolio["companiesWithLowRatings"] == 0:
+                pass_reasons.append(f"All security ratings are above threshold ({RATING_THRESHOLD}) across {portfolio['companyCount']} companies")
+            else:
+                fail_reasons.append(f"{portfolio['companiesWithLowRatings']} of {portfolio['companyCount']} companies have attributes below threshold")
+                recommendations.append("Review and address security issues for attributes with low ratings")
+            if skipped:
+                fail_reasons.append(f"{len(skipped)} companies have no rating_details and were not evaluated")
+            return create_response(
+                result=portfolio,
+                validation=validation,
+                pass_reasons=pass_reasons,
+                fail_reasons=fail_reasons,
+                recommendations=recommendations,
+                input_summary={
+                    "companyCount": portfolio["companyCount"],
+                    "attributeCount": portfolio["attributeCount"],
+                    "companiesWithLowRatings": portfolio["companiesWithLowRatings"],
+                    "companiesWithoutRatingDetails": len(skipped),
+                    "lowRatingCount": portfolio["count"]
+                }
+            )
+
+        low_ratings = []
+        lowest_rating = 0
+        low_count = 0
+
         rating_details = data.get("rating_details", {}) if isinstance(data, dict) else {}
 
         for attribute in rating_details:
@@ -98,7 +260,7 @@ def transform(input):
             except:
                 current_rating = 0
 
-            if current_rating < 700:
+            if current_rating < RATING_THRESHOLD:
                 low_ratings.append(rating_details[attribute])
                 
                 original_rating = rating_details[attribute].get('rating')
@@ -111,7 +273,7 @@ def transform(input):
                 lowest_rating = current_rating
 
         if low_count == 0:
-            pass_reasons.append("All security ratings are above threshold (700)")
+            pass_reasons.append(f"All security ratings are above threshold ({RATING_THRESHOLD})")
         else:
             fail_reasons.append(f"{low_count} attributes have ratings below threshold")
             recommendations.append("Review and address security issues for attributes with low ratings")
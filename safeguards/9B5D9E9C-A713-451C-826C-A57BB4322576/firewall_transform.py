@@ -68,6 +68,75 @@ def create_response(result, validation=None, pass_reasons=None, fail_reasons=Non
     }
 
 
+# Container fields Cato returns as stringified JSON; other strings (rule names,
+# descriptions) are data and are never decoded
+DECODE_KEYS = ("response", "result", "firewall", "wanNetwork", "data", "policy",
+               "internetFirewall", "auditFeed")
+
+
+def decode_string(text):
+    """Decode a JSON or Python-literal container string; anything that is not a dict/list stays text."""
+    stripped = text.strip()
+    if not stripped or stripped[0] not in "{[":
+        return text
+    for decode in (json.loads, ast.literal_eval, lambda t: json.loads(t.replace("'", '"'))):
+        try:
+            decoded = decode(stripped)
+        except Exception:
+            continue
+        if isinstance(decoded, (dict, list)):
+            return decoded
+    return text
+
+
+def deep_decode(value, memo):
+    """
+    Materialize stringified JSON in the known container fields, once.
+
+    Cato GraphQL payloads embed JSON documents as strings inside JSON, often
+    several levels deep (data -> policy -> internetFirewall -> policy), and the
+    same sub-document is reachable from more than one section. Only DECODE_KEYS
+    are followed and decoded; each string is decoded once, memoized by identity
+    (the memo keeps the string alive so its id cannot be reused). Dicts on the
+    path are copied, so the caller's input is not modified.
+    """
+    if isinstance(value, str):
+        entry = memo.get(id(value))
+        if entry is not None:
+            return entry[1]
+        decoded = decode_string(value)
+        if decoded is not value:
+            decoded = deep_decode(decoded, memo)
+        memo[id(value)] = (value, decoded)
+        return decoded
+    if isinstance(value, dict):
+        copied = dict(value)
+        for key in DECODE_KEYS:
+            if key in copied:
+                copied[key] = deep_decode(copied[key], memo)
+        return copied
+    return value
+
+
+def section_policy(section_data, section_key):
+    """Return (enabled, rule_names) for data.policy.<section_key>.policy, if present."""
+    node = section_data
+    for key in ("data", "policy", section_key, "policy"):
+        if not isinstance(node, dict) or key not in node:
+            return None, []
+        node = node[key]
+    if not isinstance(node, dict):
+        return None, []
+    enabled = None
+    if 'enabled' in node:
+        enabled = True if node.get('enabled', False) else False
+    names = []
+    for rule in node.get('rules') or []:
+        if isinstance(rule, dict) and isinstance(rule.get('rule'), dict) and 'name' in rule['rule']:
+            names.append(rule['rule']['name'])
+    return enabled, names
+
+
 def transform(input):
     is_firewall_enabled = False
     is_firewall_logging_enabled = False
@@ -96,7 +165,7 @@ def transform(input):
                 return input
             raise ValueError("Input must be JSON string, bytes, or dict")
 
-        input = parse_input(input)
+        input = deep_decode(parse_input(input), {})
         data, validation = extract_input(input)
 
         if validation.get("status") == "failed":
@@ -111,53 +180,29 @@ def transform(input):
         recommendations = []
 
         if isinstance(data, dict):
-            if 'response' in data:
-                data = parse_input(data['response'])
-            if 'result' in data:
-                data = parse_input(data['result'])
+            if isinstance(data.get('response'), dict):
+                data = data['response']
+            if isinstance(data.get('result'), dict):
+                data = data['result']
 
-            firewall_data = parse_input(data['firewall']) if 'firewall' in data else data
-            wan_network_data = parse_input(data['wanNetwork']) if 'wanNetwork' in data else data
-            audit_data = parse_input(data['data']) if 'data' in data else data
+            firewall_data = data['firewall'] if 'firewall' in data else data
+            wan_network_data = data['wanNetwork'] if 'wanNetwork' in data else data
+            audit_data = data['data'] if 'data' in data else data
 
             is_firewall_enabled = True if data.get('isFirewallEnabled', False) else False
 
-            if 'data' in firewall_data:
-                firewall_data = parse_input(firewall_data['data'])
-                if 'policy' in firewall_data:
-                    firewall_data = parse_input(firewall_data['policy'])
-                    if 'internetFirewall' in firewall_data:
-                        firewall_policy = parse_input(firewall_data['internetFirewall'])
-                        if 'policy' in firewall_policy:
-                            firewall_policy = parse_input(firewall_policy['policy'])
-                            if 'enabled' in firewall_policy:
-                                is_internet_firewall_enabled = True if firewall_policy.get('enabled', False) else False
-                            if 'rules' in firewall_policy:
-                                internet_firewall_rules_raw = firewall_policy['rules']
-                                for rule in internet_firewall_rules_raw:
-                                    if 'rule' in rule and 'name' in rule['rule']:
-                                        internet_firewall_rules.append(rule['rule']['name'])
-
-            if 'data' in wan_network_data:
-                wan_network_data = parse_input(wan_network_data['data'])
-                if 'policy' in wan_network_data:
-                    wan_network_data = parse_input(wan_network_data['policy'])
-                    if 'wanNetwork' in wan_network_data:
-                        wan_network_policy = parse_input(wan_network_data['wanNetwork'])
-                        if 'policy' in wan_network_policy:
-                            wan_network_policy = parse_input(wan_network_policy['policy'])
-                            if 'enabled' in wan_network_policy:
-                                is_wan_network_enabled = True if wan_network_policy.get('enabled', False) else False
-                            if 'rules' in wan_network_policy:
-                                wan_network_rules_raw = wan_network_policy['rules']
-                                for rule in wan_network_rules_raw:
-                                    if 'rule' in rule and 'name' in rule['rule']:
-                                        wan_network_rules.append(rule['rule']['name'])
+            enabled, internet_firewall_rules = section_policy(firewall_data, 'internetFirewall')
+            if enabled is not None:
+                is_internet_firewall_enabled = enabled
+
+            enabled, wan_network_rules = section_policy(wan_network_data, 'wanNetwork')
+            if enabled is not None:
+                is_wan_network_enabled = enabled
 
             is_firewall_logging_enabled = True if data.get('isFirewallLoggingEnabled', False) else False
 
-            if 'auditFeed' in audit_data:
-                audit_logs_raw = parse_input(audit_data['auditFeed'])
+            if isinstance(audit_data, dict) and 'auditFeed' in audit_data:
+                audit_logs_raw = audit_data['auditFeed']
                 try:
                     fetched_count = int(audit_logs_raw['fetchedCount'])
                 except:
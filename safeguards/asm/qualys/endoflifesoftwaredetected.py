@@ -2,6 +2,9 @@
 Transformation: endOfLifeSoftwareDetected
 Vendor: Qualys  |  Category: Attack Surface Management
 Evaluates: Whether end-of-life software is present in the environment.
+
+Software is EOL when Qualys reports an EOL/EOS lifecycle stage or its product and
+version fall inside a retired range of the embedded EOL_CATALOG interval table.
 """
 import json
 from datetime import datetime
@@ -42,16 +45,200 @@ def create_response(result, validation=None, pass_reasons=None, fail_reasons=Non
     }
 
 
+# End-of-life catalog: normalized product -> [(min_version, max_version_exclusive, eol_date)].
+# A max of None is open-ended. Entries only count once their eol_date has passed,
+# so future retirements switch on without a catalog change.
+EOL_CATALOG = {
+    "windows xp": [("0", None, "2014-04-08")],
+    "windows vista": [("0", None, "2017-04-11")],
+    "windows 7": [("0", None, "2020-01-14")],
+    "windows 8": [("0", None, "2016-01-12")],
+    "windows 8.1": [("0", None, "2023-01-10")],
+    "windows server 2003": [("0", None, "2015-07-14")],
+    "windows server 2008": [("0", None, "2020-01-14")],
+    "windows server 2012": [("0", None, "2023-10-10")],
+    "office": [("0", "15", "2020-10-13"), ("15", "16", "2023-04-11")],
+    "sql server": [("0", "12", "2022-07-12"), ("12", "13", "2024-07-09")],
+    "exchange server": [("0", "15.1", "2023-04-11")],
+    "internet explorer": [("0", None, "2022-06-15")],
+    "adobe flash player": [("0", None, "2020-12-31")],
+    "python": [("2", "3", "2020-01-01"), ("3", "3.7", "2021-12-23"), ("3.7", "3.8", "2023-06-27"),
+               ("3.8", "3.9", "2024-10-07")],
+    "node.js": [("0", "20", "2025-04-30"), ("20", "21", "2026-04-30")],
+    "php": [("0", "8.1", "2023-11-26"), ("8.1", "8.2", "2025-12-31")],
+    "centos linux": [("0", "9", "2024-06-30")],
+}
+VENDOR_PREFIXES = ("microsoft ", "adobe ", "python software foundation ", "the php group ")
+MAX_EOL_SAMPLES = 10
+
+
+def parse_version(value):
+    """Turn '3.7.9150.0' / '10.0 (build 19045)' into a comparable tuple of ints."""
+    parts = []
+    for piece in str(value or "").strip().split("."):
+        digits = ""
+        for ch in piece:
+            if not ch.isdigit():
+                break
+            digits = digits + ch
+        if not digits:
+            break
+        parts.append(int(digits))
+    return tuple(parts)
+
+
+def compile_eol_catalog(catalog):
+    """Compile the catalog into per-product interval tables sorted by lower bound."""
+    compiled = {}
+    for product, ranges in catalog.items():
+        intervals = sorted(
+            (parse_version(low), parse_version(high) if high is not None else None, eol_date)
+            for low, high, eol_date in ranges
+        )
+        compiled[product] = intervals
+    return compiled
+
+
+EOL_INTERVALS = compile_eol_catalog(EOL_CATALOG)
+# Longest names first so "windows 8.1" wins over "windows 8"
+EOL_PRODUCTS = sorted(EOL_CATALOG.keys(), key=len, reverse=True)
+
+
+def normalize_name(name):
+    name = " ".join(str(name or "").lower().split())
+    for prefix in VENDOR_PREFIXES:
+        if name.startswith(prefix):
+            return name[len(prefix):]
+    return name
+
+
+def match_product(names):
+    """Return the catalog product the first matching name refers to, if any."""
+    for name in names:
+        name = normalize_name(name)
+        if not name:
+            continue
+        for product in EOL_PRODUCTS:
+            if name == product or name.startswith(product + " "):
+                return product
+    return None
+
+
+def find_interval(intervals, version):
+    """
+    Binary search for the interval containing version; returns its eol_date or None.
+
+    A missing version (empty tuple) only matches a product whose single interval
+    covers every version (open-ended from "0"); otherwise it returns None.
+    """
+    if not version:
+        if len(intervals) == 1 and intervals[0][0] == (0,) and intervals[0][1] is None:
+            return intervals[0][2]
+        return None
+    lo = 0
+    hi = len(intervals)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if intervals[mid][0] <= version:
+            lo = mid + 1
+        else:
+            hi = mid
+    if lo == 0:
+        return None
+    low, high, eol_date = intervals[lo - 1]
+    if high is None or version < high:
+        return eol_date
+    return None
+
+
+def lookup_eol(product_name, full_name, version, today, cache, stats):
+    """
+    Resolve whether a (product, version) pair is end-of-life: True, False, or None
+    when the product is catalogued but its EOL status depends on a missing version.
+
+    Results are memoized on the raw strings, so normalization and the interval
+    search run once per distinct pair no matter how many assets carry it.
+    """
+    key = (product_name, full_name, version)
+    if key in cache:
+        return cache[key]
+    stats["lookups"] = stats["lookups"] + 1
+    product = match_product((product_name, full_name))
+    eol_date = None
+    result = False
+    if product is not None:
+        parsed = parse_version(version)
+        eol_date = find_interval(EOL_INTERVALS[product], parsed)
+        if eol_date is None and not parsed:
+            result = None
+    if eol_date is not None:
+        result = eol_date <= today
+    cache[key] = result
+    return result
+
+
+def lifecycle_is_eol(software):
+    """Honour the lifecycle stage Qualys CSAM already reports."""
+    lifecycle = software.get('lifecycle')
+    if isinstance(lifecycle, dict):
+        lifecycle = lifecycle.get('stage')
+    return isinstance(lifecycle, str) and lifecycle.upper() in ("EOL", "EOS", "EOL/EOS")
+
+
 def evaluate(data):
     """Core evaluation logic."""
     try:
         assets = data.get('assetListData', {}).get('asset', [])
-        eol_found = any(
-            sw.get('lifecycle') == 'EOL'
-            for asset in assets
-            for sw in asset.get('softwareListData', {}).get('software', [])
-        )
-        return {"endOfLifeSoftwareDetected": eol_found, "assetsScanned": len(assets)}
+        if isinstance(assets, dict):
+            assets = [assets]
+        today = datetime.utcnow().date().isoformat()
+        cache = {}
+        stats = {"lookups": 0}
+        eol_titles = []
+        seen_titles = set()
+        unknown_titles = []
+        unknown_version_count = 0
+        assets_with_eol = 0
+        software_count = 0
+        for asset in assets:
+            software_list = (asset.get('softwareListData') or {}).get('software', [])
+            if isinstance(software_list, dict):
+                software_list = [software_list]
+            asset_has_eol = False
+            for sw in software_list:
+                if not isinstance(sw, dict):
+                    continue
+                software_count = software_count + 1
+                product_name = sw.get('product') or sw.get('name')
+                full_name = sw.get('fullName')
+                version = sw.get('version')
+                if lifecycle_is_eol(sw):
+                    status = True
+                else:
+                    status = lookup_eol(product_name, full_name, version, today, cache, stats)
+                if status is None:
+                    unknown_version_count = unknown_version_count + 1
+                    title = str(full_name or product_name)
+                    if title not in unknown_titles:
+                        unknown_titles.append(title)
+                elif status:
+                    asset_has_eol = True
+                    title = f"{full_name or product_name} {version or ''}".strip()
+                    if title not in seen_titles:
+                        seen_titles.add(title)
+                        eol_titles.append(title)
+            if asset_has_eol:
+                assets_with_eol = assets_with_eol + 1
+        return {
+            "endOfLifeSoftwareDetected": assets_with_eol > 0,
+            "assetsScanned": len(assets),
+            "assetsWithEndOfLifeSoftware": assets_with_eol,
+            "softwareInstancesScanned": software_count,
+            "distinctSoftwareEvaluated": stats["lookups"],
+            "endOfLifeSoftware": eol_titles[:MAX_EOL_SAMPLES],
+            "unknownVersionInstances": unknown_version_count,
+            "unknownVersionSoftware": unknown_titles[:MAX_EOL_SAMPLES]
+        }
     except Exception as e:
         return {"endOfLifeSoftwareDetected": False, "error": str(e)}
 
@@ -2,6 +2,12 @@
 Transformation: knownExploitedVulnCount
 Vendor: Qualys  |  Category: Attack Surface Management
 Evaluates: Counts vulnerabilities matching CISA Known Exploited Vulnerabilities catalog.
+
+Uses upstream kev_matches when present; otherwise matches detection CVEs against
+a kevCatalog feed in the input or the snapshot embedded by generate_kev_index.py.
+Detections may be a flat list, JSON-converted Qualys host output, or the raw
+HOST_LIST_VM_DETECTION_OUTPUT XML. With no catalog available the count is 0, as
+before catalog matching was added.
 """
 import json
 from datetime import datetime
@@ -42,12 +48,302 @@ def create_response(result, validation=None, pass_reasons=None, fail_reasons=Non
     }
 
 
+# BEGIN KEV CATALOG SNAPSHOT (generated by generate_kev_index.py - do not edit)
+KEV_CATALOG_VERSION = ""
+KEV_CATALOG_RELEASED = ""
+KEV_CATALOG_COUNT = 0
+KEV_CATALOG = {}
+# END KEV CATALOG SNAPSHOT
+
+# Expanded CVE sets keyed by catalog identity, built once per process
+KEV_INDEX_CACHE = {}
+KEV_INDEX_CACHE_LIMIT = 8
+CVE_KEYS = ("cve", "cveID", "cveId", "cve_id", "CVE_ID", "CVE")
+CVE_LIST_KEYS = ("cves", "cveIds", "cve_ids", "CVE_LIST")
+SAMPLE_SIZE = 10
+
+
+def build_kev_index(catalog):
+    """Expand a year -> "seq,seq,..." snapshot into a set of CVE IDs."""
+    index = set()
+    for year, ids in catalog.items():
+        prefix = "CVE-" + str(year) + "-"
+        for seq in ids.split(","):
+            if seq:
+                index.add(prefix + seq)
+    return index
+
+
+def index_from_feed(feed):
+    """Build a CVE set from a CISA KEV feed document supplied in the input."""
+    return set(
+        str(v.get("cveID", "")).strip().upper()
+        for v in feed.get("vulnerabilities", [])
+        if isinstance(v, dict) and v.get("cveID")
+    )
+
+
+def feed_cache_key(feed):
+    """Identify an input feed by version, release date and size; None when it carries neither."""
+    version = str(feed.get("catalogVersion", "") or "")
+    released = str(feed.get("dateReleased", "") or "")
+    if not version and not released:
+        return None
+    return "input:" + version + "|" + released + "|" + str(len(feed["vulnerabilities"]))
+
+
+def get_kev_index(data):
+    """Return (index, version, source), preferring a catalog supplied in the input."""
+    feed = data.get("kevCatalog") if isinstance(data, dict) else None
+    if isinstance(feed, dict) and isinstance(feed.get("vulnerabilities"), list):
+        cache_key = feed_cache_key(feed)
+        index = KEV_INDEX_CACHE.get(cache_key) if cache_key else None
+        if index is None:
+            index = index_from_feed(feed)
+            if cache_key:
+                if len(KEV_INDEX_CACHE) >= KEV_INDEX_CACHE_LIMIT:
+                    del KEV_INDEX_CACHE[next(iter(KEV_INDEX_CACHE))]
+                KEV_INDEX_CACHE[cache_key] = index
+        return index, str(feed.get("catalogVersion", "")), "input"
+    cache_key = "snapshot:" + KEV_CATALOG_VERSION
+    index = KEV_INDEX_CACHE.get(cache_key)
+    if index is None:
+        index = build_kev_index(KEV_CATALOG)
+        KEV_INDEX_CACHE[cache_key] = index
+    return index, KEV_CATALOG_VERSION, "snapshot"
+
+
+def record_cves(record):
+    """Collect CVE IDs referenced by a detection/finding record."""
+    cves = []
+    for key in CVE_KEYS:
+        value = record.get(key)
+        if isinstance(value, str) and value:
+            cves.append(value)
+    for key in CVE_LIST_KEYS:
+        value = record.get(key)
+        if isinstance(value, dict):
+            # Qualys style: {"CVE": [{"ID": "CVE-..."}]} or {"CVE": {"ID": ...}}
+            value = value.get("CVE", [])
+        if isinstance(value, dict):
+            value = [value]
+        if isinstance(value, list):
+            for item in value:
+                if isinstance(item, str):
+                    cves.append(item)
+                elif isinstance(item, dict):
+                    cve_id = item.get("ID") or item.get("id") or item.get("cveID")
+                    if cve_id:
+                        cves.append(cve_id)
+    return cves
+
+
+# Qualys returns HOST_LIST_VM_DETECTION_OUTPUT natively as XML. These tags
+# always become lists so a single <DETECTION> reads the same as many.
+XML_LIST_TAGS = ("HOST", "DETECTION")
+XML_ENTITIES = (("&lt;", "<"), ("&gt;", ">"), ("&quot;", '"'), ("&apos;", "'"), ("&amp;", "&"))
+
+
+def decode_xml_text(text):
+    if "&" not in text:
+        return text
+    for entity, char in XML_ENTITIES:
+        text = text.replace(entity, char)
+    return text
+
+
+def add_xml_child(children, tag, value):
+    existing = children.get(tag)
+    if existing is None:
+        children[tag] = [value] if tag in XML_LIST_TAGS else value
+    elif isinstance(existing, list):
+        existing.append(value)
+    else:
+        children[tag] = [existing, value]
+
+
+def parse_xml_element(xml, pos):
+    """
+    Parse the element whose start tag begins at xml[pos].
+
+    Child elements become a dict (repeated or XML_LIST_TAGS children become
+    lists), text-only elements become stripped strings, attributes are
+    ignored. Returns (tag, value, end_offset).
+    """
+    head_end = xml.find(">", pos)
+    if head_end < 0:
+        raise ValueError(f"Unterminated XML tag at offset {pos}")
+    head = xml[pos + 1:head_end]
+    tag = head.rstrip("/").split()[0]
+    if head.endswith("/"):
+        return tag, "", head_end + 1
+
+    children = {}
+    text_parts = []
+    cursor = head_end + 1
+    while True:
+        lt = xml.find("<", cursor)
+        if lt < 0:
+            raise ValueError(f"Unterminated XML element <{tag}>")
+        if lt > cursor:
+            text_parts.append(decode_xml_text(xml[cursor:lt]))
+        if xml.startswith("</", lt):
+            cursor = xml.find(">", lt) + 1
+            break
+        if xml.startswith("<![CDATA[", lt):
+            cdata_end = xml.find("]]>", lt)
+            text_parts.append(xml[lt + 9:cdata_end])
+            cursor = cdata_end + 3
+        elif xml.startswith("<!--", lt):
+            cursor = xml.find("-->", lt) + 3
+        elif xml.startswith("<?", lt):
+            cursor = xml.find("?>", lt) + 2
+        else:
+            child_tag, child_value, cursor = parse_xml_element(xml, lt)
+            add_xml_child(children, child_tag, child_value)
+
+    if children:
+        return tag, children, cursor
+    return tag, "".join(text_parts).strip(), cursor
+
+
+def scan_hosts_xml(xml, on_host, state):
+    """
+    Stream HOST elements out of raw HOST_LIST_VM_DETECTION_OUTPUT XML.
+
+    Each HOST is parsed, handed to on_host(host, state) and released before
+    the next one is read, so at most one HOST is held as a parsed dict (the
+    document itself is still held as a str). Scanning stops at </HOST_LIST>.
+    """
+    pos = xml.find("<HOST_LIST>")
+    if pos < 0:
+        return 0
+    pos = pos + len("<HOST_LIST>")
+    end = xml.find("</HOST_LIST>", pos)
+    if end < 0:
+        end = len(xml)
+    host_count = 0
+    while True:
+        start = xml.find("<HOST", pos, end)
+        if start < 0:
+            break
+        if xml[start + 5:start + 6] not in (">", "/", " ", "\n", "\r", "\t"):
+            pos = start + 5
+            continue
+        tag, host, pos = parse_xml_element(xml, start)
+        if isinstance(host, dict):
+            on_host(host, state)
+            host_count = host_count + 1
+    return host_count
+
+
+def is_qualys_xml(data):
+    """True for a raw HOST_LIST_VM_DETECTION_OUTPUT XML document."""
+    return (isinstance(data, str) and data.lstrip().startswith("<")
+            and data.find("<HOST_LIST_VM_DETECTION_OUTPUT", 0, 1024) >= 0)
+
+
+def wrap_qualys_xml(data):
+    """Key a raw Qualys XML document by its root element, mirroring the JSON-converted shape."""
+    if is_qualys_xml(data):
+        return {"HOST_LIST_VM_DETECTION_OUTPUT": data}
+    return data
+
+
+def scan_hosts(data, on_host, state):
+    """Feed each HOST record to on_host(host, state) from JSON-converted or raw XML output."""
+    output = wrap_qualys_xml(data)
+    if isinstance(output, dict):
+        output = output.get("HOST_LIST_VM_DETECTION_OUTPUT", {})
+    if isinstance(output, str):
+        return scan_hosts_xml(output, on_host, state)
+    response = (output or {}).get("RESPONSE") or {}
+    host_list = response.get("HOST_LIST") or {}
+    hosts = host_list.get("HOST", []) if isinstance(host_list, dict) else []
+    if isinstance(hosts, dict):
+        hosts = [hosts]
+    host_count = 0
+    for host in hosts:
+        if isinstance(host, dict):
+            on_host(host, state)
+            host_count = host_count + 1
+    return host_count
+
+
+def host_detections(host):
+    detection_list = host.get("DETECTION_LIST")
+    if not isinstance(detection_list, dict):
+        return []
+    detections = detection_list.get("DETECTION", [])
+    if isinstance(detections, dict):
+        return [detections]
+    return detections if isinstance(detections, list) else []
+
+
+def match_record(record, state):
+    """Count a detection once if any of its CVEs is in the KEV index."""
+    if not isinstance(record, dict):
+        return
+    state["checked"] = state["checked"] + 1
+    for cve in record_cves(record):
+        cve = cve.strip().upper()
+        if cve in state["index"]:
+            state["count"] = state["count"] + 1
+            state["matched"].add(cve)
+            break
+
+
+def match_host(host, state):
+    for record in host_detections(host):
+        match_record(record, state)
+
+
+def match_detections(data, state):
+    """Feed detection records from a flat findings list or Qualys host output (JSON or raw XML)."""
+    if isinstance(data, dict):
+        for key in ("detections", "vulnerabilities", "findings", "results"):
+            records = data.get(key)
+            if isinstance(records, list):
+                for record in records:
+                    match_record(record, state)
+                return
+    scan_hosts(data, match_host, state)
+
+
 def evaluate(data):
     """Core evaluation logic."""
     try:
-        kev_matches = data.get('kev_matches', [])
-        count = len(kev_matches)
-        return {"knownExploitedVulnCount": count, "count": count, "cves": [m.get('cve', '') for m in kev_matches[:10]]}
+        if isinstance(data, list):
+            data = {"detections": data}
+        kev_matches = data.get('kev_matches') if isinstance(data, dict) else None
+        if isinstance(kev_matches, list):
+            # Matches already resolved upstream against the KEV catalog
+            cves = [m.get('cve', '') for m in kev_matches if isinstance(m, dict)]
+            distinct = set(c for c in cves if c)
+            count = len(kev_matches)
+            return {"knownExploitedVulnCount": count, "count": count,
+                    "uniqueCveCount": len(distinct), "cves": sorted(distinct)[:SAMPLE_SIZE]}
+
+        index, version, source = get_kev_index(data)
+        if not index:
+            # No catalog to match against: a count of 0 would be a false pass
+            return {"knownExploitedVulnCount": 0, "count": 0, "cves": [], "kevCatalogSource": "none",
+                    "error": "No KEV catalog available: supply kevCatalog or kev_matches, "
+                             "or regenerate the embedded snapshot with generate_kev_index.py"}
+
+        state = {"index": index, "count": 0, "checked": 0, "matched": set()}
+        match_detections(data, state)
+        count = state["count"]
+        return {
+            "knownExploitedVulnCount": count,
+            "count": count,
+            "uniqueCveCount": len(state["matched"]),
+            "cves": sorted(state["matched"])[:SAMPLE_SIZE],
+            "recordsChecked": state["checked"],
+            "kevCatalogVersion": version,
+            "kevCatalogSource": source,
+            "kevCatalogSize": len(index)
+        }
     except Exception as e:
         return {"knownExploitedVulnCount": 0, "error": str(e)}
 
@@ -55,12 +351,14 @@ def evaluate(data):
 def transform(input):
     criteriaKey = "knownExploitedVulnCount"
     try:
-        if isinstance(input, str):
+        if isinstance(input, bytes):
+            input = input.decode("utf-8")
+        # Raw Qualys XML is passed through to the streaming host reader
+        if isinstance(input, str) and not input.lstrip().startswith("<"):
             input = json.loads(input)
-        elif isinstance(input, bytes):
-            input = json.loads(input.decode("utf-8"))
         data, validation = extract_input(input)
-        if validation.get("status") == "failed":
+        # Schemas describe the JSON-converted shape, so raw XML always fails them
+        if validation.get("status") == "failed" and not is_qualys_xml(data):
             return create_response(result={criteriaKey: False}, validation=validation, fail_reasons=["Input validation failed"])
         eval_result = evaluate(data)
         count_value = eval_result.get(criteriaKey, 0)
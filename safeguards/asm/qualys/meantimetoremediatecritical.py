@@ -1,7 +1,7 @@
 """
 Transformation: meanTimeToRemediateCritical
 Vendor: Qualys  |  Category: Attack Surface Management
-Evaluates: Average days to remediate critical vulnerabilities.
+Evaluates: Average days to remediate critical vulnerabilities, with p50/p90/p99 percentiles.
 """
 import json
 from datetime import datetime
@@ -42,27 +42,267 @@ def create_response(result, validation=None, pass_reasons=None, fail_reasons=Non
     }
 
 
+# Qualys returns HOST_LIST_VM_DETECTION_OUTPUT natively as XML. These tags
+# always become lists so a single <DETECTION> reads the same as many.
+XML_LIST_TAGS = ("HOST", "DETECTION")
+XML_ENTITIES = (("&lt;", "<"), ("&gt;", ">"), ("&quot;", '"'), ("&apos;", "'"), ("&amp;", "&"))
+
+
+def decode_xml_text(text):
+    if "&" not in text:
+        return text
+    for entity, char in XML_ENTITIES:
+        text = text.replace(entity, char)
+    return text
+
+
+def add_xml_child(children, tag, value):
+    existing = children.get(tag)
+    if existing is None:
+        children[tag] = [value] if tag in XML_LIST_TAGS else value
+    elif isinstance(existing, list):
+        existing.append(value)
+    else:
+        children[tag] = [existing, value]
+
+
+def parse_xml_element(xml, pos):
+    """
+    Parse the element whose start tag begins at xml[pos].
+
+    Child elements become a dict (repeated or XML_LIST_TAGS children become
+    lists), text-only elements become stripped strings, attributes are
+    ignored. Returns (tag, value, end_offset).
+    """
+    head_end = xml.find(">", pos)
+    if head_end < 0:
+        raise ValueError(f"Unterminated XML tag at offset {pos}")
+    head = xml[pos + 1:head_end]
+    tag = head.rstrip("/").split()[0]
+    if head.endswith("/"):
+        return tag, "", head_end + 1
+
+    children = {}
+    text_parts = []
+    cursor = head_end + 1
+    while True:
+        lt = xml.find("<", cursor)
+        if lt < 0:
+            raise ValueError(f"Unterminated XML element <{tag}>")
+        if lt > cursor:
+            text_parts.append(decode_xml_text(xml[cursor:lt]))
+        if xml.startswith("</", lt):
+            cursor = xml.find(">", lt) + 1
+            break
+        if xml.startswith("<![CDATA[", lt):
+            cdata_end = xml.find("]]>", lt)
+            text_parts.append(xml[lt + 9:cdata_end])
+            cursor = cdata_end + 3
+        elif xml.startswith("<!--", lt):
+            cursor = xml.find("-->", lt) + 3
+        elif xml.startswith("<?", lt):
+            cursor = xml.find("?>", lt) + 2
+        else:
+            child_tag, child_value, cursor = parse_xml_element(xml, lt)
+            add_xml_child(children, child_tag, child_value)
+
+    if children:
+        return tag, children, cursor
+    return tag, "".join(text_parts).strip(), cursor
+
+
+def scan_hosts_xml(xml, on_host, state):
+    """
+    Stream HOST elements out of raw HOST_LIST_VM_DETECTION_OUTPUT XML.
+
+    Each HOST is parsed, handed to on_host(host, state) and released before
+    the next one is read, so at most one HOST is held as a parsed dict (the
+    document itself is still held as a str). Scanning stops at </HOST_LIST>.
+    """
+    pos = xml.find("<HOST_LIST>")
+    if pos < 0:
+        return 0
+    pos = pos + len("<HOST_LIST>")
+    end = xml.find("</HOST_LIST>", pos)
+    if end < 0:
+        end = len(xml)
+    host_count = 0
+    while True:
+        start = xml.find("<HOST", pos, end)
+        if start < 0:
+            break
+        if xml[start + 5:start + 6] not in (">", "/", " ", "\n", "\r", "\t"):
+            pos = start + 5
+            continue
+        tag, host, pos = parse_xml_element(xml, start)
+        if isinstance(host, dict):
+            on_host(host, state)
+            host_count = host_count + 1
+    return host_count
+
+
+def is_qualys_xml(data):
+    """True for a raw HOST_LIST_VM_DETECTION_OUTPUT XML document."""
+    return (isinstance(data, str) and data.lstrip().startswith("<")
+            and data.find("<HOST_LIST_VM_DETECTION_OUTPUT", 0, 1024) >= 0)
+
+
+def wrap_qualys_xml(data):
+    """Key a raw Qualys XML document by its root element, mirroring the JSON-converted shape."""
+    if is_qualys_xml(data):
+        return {"HOST_LIST_VM_DETECTION_OUTPUT": data}
+    return data
+
+
+def scan_hosts(data, on_host, state):
+    """Feed each HOST record to on_host(host, state) from JSON-converted or raw XML output."""
+    output = wrap_qualys_xml(data)
+    if isinstance(output, dict):
+        output = output.get("HOST_LIST_VM_DETECTION_OUTPUT", {})
+    if isinstance(output, str):
+        return scan_hosts_xml(output, on_host, state)
+    response = (output or {}).get("RESPONSE") or {}
+    host_list = response.get("HOST_LIST") or {}
+    hosts = host_list.get("HOST", []) if isinstance(host_list, dict) else []
+    if isinstance(hosts, dict):
+        hosts = [hosts]
+    host_count = 0
+    for host in hosts:
+        if isinstance(host, dict):
+            on_host(host, state)
+            host_count = host_count + 1
+    return host_count
+
+
+def host_detections(host):
+    detection_list = host.get("DETECTION_LIST")
+    if not isinstance(detection_list, dict):
+        return []
+    detections = detection_list.get("DETECTION", [])
+    if isinstance(detections, dict):
+        return [detections]
+    return detections if isinstance(detections, list) else []
+
+
+# Fixed-format ISO-8601 parsing straight to epoch seconds. Vendor timestamps
+# repeat heavily, so parsed values are cached by their raw string.
+EPOCH_CACHE = {}
+EPOCH_CACHE_LIMIT = 100000
+
+
+def days_from_civil(year, month, day):
+    """Days since 1970-01-01 for a proleptic Gregorian date."""
+    if month <= 2:
+        year = year - 1
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def parse_epoch_uncached(value):
+    """Parse 'YYYY-MM-DD[THH:MM:SS[.fff]][Z|+HH:MM]' into epoch seconds, or None."""
+    text = value.strip()
+    if len(text) < 10 or text[4] != "-" or text[7] != "-":
+        return None
+    try:
+        month = int(text[5:7])
+        day = int(text[8:10])
+        if month < 1 or month > 12 or day < 1 or day > 31:
+            return None
+        seconds = days_from_civil(int(text[0:4]), month, day) * 86400
+        if len(text) >= 19 and text[10] in "T " and text[13] == ":" and text[16] == ":":
+            seconds = seconds + int(text[11:13]) * 3600 + int(text[14:16]) * 60 + int(text[17:19])
+            tail = text[19:]
+            if tail.startswith("."):
+                cut = 1
+                while cut < len(tail) and tail[cut].isdigit():
+                    cut = cut + 1
+                tail = tail[cut:]
+            if tail and tail not in ("Z", "z"):
+                sign = -1 if tail[0] == "-" else 1
+                offset = tail[1:].replace(":", "")
+                seconds = seconds - sign * (int(offset[0:2]) * 3600 + int(offset[2:4] or 0) * 60)
+        elif len(text) > 10:
+            return None
+        return seconds
+    except (ValueError, IndexError):
+        return None
+
+
+def parse_epoch(value):
+    """Cached epoch-seconds parse of an ISO-8601 string; None when unparseable."""
+    if not isinstance(value, str) or not value:
+        return None
+    cached = EPOCH_CACHE.get(value)
+    if cached is not None or value in EPOCH_CACHE:
+        return cached
+    seconds = parse_epoch_uncached(value)
+    if len(EPOCH_CACHE) < EPOCH_CACHE_LIMIT:
+        EPOCH_CACHE[value] = seconds
+    return seconds
+
+
+PERCENTILES = (50, 90, 99)
+
+
+def collect_remediation_days(host, state):
+    """Fold each fixed critical detection's remediation time into a per-day histogram."""
+    histogram = state["histogram"]
+    for d in host_detections(host):
+        if int(d.get('SEVERITY', 0)) >= 4 and d.get('STATUS') == 'Fixed':
+            t_found = parse_epoch(d.get('FIRST_FOUND_DATETIME', ''))
+            t_fixed = parse_epoch(d.get('LAST_FIXED_DATETIME', ''))
+            if t_found is not None and t_fixed is not None:
+                days = (t_fixed - t_found) // 86400
+                histogram[days] = histogram.get(days, 0) + 1
+                state["count"] = state["count"] + 1
+                state["total"] = state["total"] + days
+
+
+def histogram_percentiles(histogram, count, percentiles):
+    """
+    Nearest-rank percentiles from a day-resolution histogram.
+
+    Remediation times are whole days, so the histogram is an exact quantile
+    sketch whose size is bounded by the number of distinct durations rather
+    than the number of detections.
+    """
+    results = {}
+    if count == 0:
+        for p in percentiles:
+            results[p] = 0
+        return results
+    ranks = [(p, max(1, -(-p * count // 100))) for p in percentiles]
+    seen = 0
+    index = 0
+    for days in sorted(histogram.keys()):
+        seen = seen + histogram[days]
+        while index < len(ranks) and seen >= ranks[index][1]:
+            results[ranks[index][0]] = days
+            index = index + 1
+        if index == len(ranks):
+            break
+    return results
+
+
 def evaluate(data):
     """Core evaluation logic."""
     try:
-        hosts = data.get('HOST_LIST_VM_DETECTION_OUTPUT', {}).get('RESPONSE', {}).get('HOST_LIST', {}).get('HOST', [])
-        if isinstance(hosts, dict):
-            hosts = [hosts]
-        deltas = []
-        for host in hosts:
-            detections = host.get('DETECTION_LIST', {}).get('DETECTION', [])
-            if isinstance(detections, dict):
-                detections = [detections]
-            for d in detections:
-                if int(d.get('SEVERITY', 0)) >= 4 and d.get('STATUS') == 'Fixed':
-                    found = d.get('FIRST_FOUND_DATETIME', '')
-                    fixed_dt = d.get('LAST_FIXED_DATETIME', '')
-                    if found and fixed_dt:
-                        t_found = datetime.fromisoformat(found.replace('Z', '+00:00'))
-                        t_fixed = datetime.fromisoformat(fixed_dt.replace('Z', '+00:00'))
-                        deltas.append((t_fixed - t_found).days)
-        mttr = int(sum(deltas) / len(deltas)) if deltas else 0
-        return {"meanTimeToRemediateCritical": str(mttr), "averageDays": mttr, "sampleSize": len(deltas)}
+        state = {"histogram": {}, "count": 0, "total": 0}
+        scan_hosts(data, collect_remediation_days, state)
+        count = state["count"]
+        mttr = int(state["total"] / count) if count else 0
+        percentiles = histogram_percentiles(state["histogram"], count, PERCENTILES)
+        return {
+            "meanTimeToRemediateCritical": str(mttr),
+            "averageDays": mttr,
+            "p50Days": percentiles[50],
+            "p90Days": percentiles[90],
+            "p99Days": percentiles[99],
+            "sampleSize": count
+        }
     except Exception as e:
         return {"meanTimeToRemediateCritical": "0", "error": str(e)}
 
@@ -70,12 +310,14 @@ def evaluate(data):
 def transform(input):
     criteriaKey = "meanTimeToRemediateCritical"
     try:
-        if isinstance(input, str):
+        if isinstance(input, bytes):
+            input = input.decode("utf-8")
+        # Raw Qualys XML is passed through to the streaming host reader
+        if isinstance(input, str) and not input.lstrip().startswith("<"):
             input = json.loads(input)
-        elif isinstance(input, bytes):
-            input = json.loads(input.decode("utf-8"))
         data, validation = extract_input(input)
-        if validation.get("status") == "failed":
+        # Schemas describe the JSON-converted shape, so raw XML always fails them
+        if validation.get("status") == "failed" and not is_qualys_xml(data):
             return create_response(result={criteriaKey: False}, validation=validation, fail_reasons=["Input validation failed"])
         eval_result = evaluate(data)
         result_value = eval_result.get(criteriaKey, False)
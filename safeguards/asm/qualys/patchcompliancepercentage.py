@@ -42,20 +42,161 @@ def create_response(result, validation=None, pass_reasons=None, fail_reasons=Non
     }
 
 
+# Qualys returns HOST_LIST_VM_DETECTION_OUTPUT natively as XML. These tags
+# always become lists so a single <DETECTION> reads the same as many.
+XML_LIST_TAGS = ("HOST", "DETECTION")
+XML_ENTITIES = (("&lt;", "<"), ("&gt;", ">"), ("&quot;", '"'), ("&apos;", "'"), ("&amp;", "&"))
+
+
+def decode_xml_text(text):
+    if "&" not in text:
+        return text
+    for entity, char in XML_ENTITIES:
+        text = text.replace(entity, char)
+    return text
+
+
+def add_xml_child(children, tag, value):
+    existing = children.get(tag)
+    if existing is None:
+        children[tag] = [value] if tag in XML_LIST_TAGS else value
+    elif isinstance(existing, list):
+        existing.append(value)
+    else:
+        children[tag] = [existing, value]
+
+
+def parse_xml_element(xml, pos):
+    """
+    Parse the element whose start tag begins at xml[pos].
+
+    Child elements become a dict (repeated or XML_LIST_TAGS children become
+    lists), text-only elements become stripped strings, attributes are
+    ignored. Returns (tag, value, end_offset).
+    """
+    head_end = xml.find(">", pos)
+    if head_end < 0:
+        raise ValueError(f"Unterminated XML tag at offset {pos}")
+    head = xml[pos + 1:head_end]
+    tag = head.rstrip("/").split()[0]
+    if head.endswith("/"):
+        return tag, "", head_end + 1
+
+    children = {}
+    text_parts = []
+    cursor = head_end + 1
+    while True:
+        lt = xml.find("<", cursor)
+        if lt < 0:
+            raise ValueError(f"Unterminated XML element <{tag}>")
+        if lt > cursor:
+            text_parts.append(decode_xml_text(xml[cursor:lt]))
+        if xml.startswith("</", lt):
+            cursor = xml.find(">", lt) + 1
+            break
+        if xml.startswith("<![CDATA[", lt):
+            cdata_end = xml.find("]]>", lt)
+            text_parts.append(xml[lt + 9:cdata_end])
+            cursor = cdata_end + 3
+        elif xml.startswith("<!--", lt):
+            cursor = xml.find("-->", lt) + 3
+        elif xml.startswith("<?", lt):
+            cursor = xml.find("?>", lt) + 2
+        else:
+            child_tag, child_value, cursor = parse_xml_element(xml, lt)
+            add_xml_child(children, child_tag, child_value)
+
+    if children:
+        return tag, children, cursor
+    return tag, "".join(text_parts).strip(), cursor
+
+
+def scan_hosts_xml(xml, on_host, state):
+    """
+    Stream HOST elements out of raw HOST_LIST_VM_DETECTION_OUTPUT XML.
+
+    Each HOST is parsed, handed to on_host(host, state) and released before
+    the next one is read, so at most one HOST is held as a parsed dict (the
+    document itself is still held as a str). Scanning stops at </HOST_LIST>.
+    """
+    pos = xml.find("<HOST_LIST>")
+    if pos < 0:
+        return 0
+    pos = pos + len("<HOST_LIST>")
+    end = xml.find("</HOST_LIST>", pos)
+    if end < 0:
+        end = len(xml)
+    host_count = 0
+    while True:
+        start = xml.find("<HOST", pos, end)
+        if start < 0:
+            break
+        if xml[start + 5:start + 6] not in (">", "/", " ", "\n", "\r", "\t"):
+            pos = start + 5
+            continue
+        tag, host, pos = parse_xml_element(xml, start)
+        if isinstance(host, dict):
+            on_host(host, state)
+            host_count = host_count + 1
+    return host_count
+
+
+def is_qualys_xml(data):
+    """True for a raw HOST_LIST_VM_DETECTION_OUTPUT XML document."""
+    return (isinstance(data, str) and data.lstrip().startswith("<")
+            and data.find("<HOST_LIST_VM_DETECTION_OUTPUT", 0, 1024) >= 0)
+
+
+def wrap_qualys_xml(data):
+    """Key a raw Qualys XML document by its root element, mirroring the JSON-converted shape."""
+    if is_qualys_xml(data):
+        return {"HOST_LIST_VM_DETECTION_OUTPUT": data}
+    return data
+
+
+def scan_hosts(data, on_host, state):
+    """Feed each HOST record to on_host(host, state) from JSON-converted or raw XML output."""
+    output = wrap_qualys_xml(data)
+    if isinstance(output, dict):
+        output = output.get("HOST_LIST_VM_DETECTION_OUTPUT", {})
+    if isinstance(output, str):
+        return scan_hosts_xml(output, on_host, state)
+    response = (output or {}).get("RESPONSE") or {}
+    host_list = response.get("HOST_LIST") or {}
+    hosts = host_list.get("HOST", []) if isinstance(host_list, dict) else []
+    if isinstance(hosts, dict):
+        hosts = [hosts]
+    host_count = 0
+    for host in hosts:
+        if isinstance(host, dict):
+            on_host(host, state)
+            host_count = host_count + 1
+    return host_count
+
+
+def host_detections(host):
+    detection_list = host.get("DETECTION_LIST")
+    if not isinstance(detection_list, dict):
+        return []
+    detections = detection_list.get("DETECTION", [])
+    if isinstance(detections, dict):
+        return [detections]
+    return detections if isinstance(detections, list) else []
+
+
+def count_fixed_detections(host, state):
+    detections = host_detections(host)
+    state["total"] = state["total"] + len(detections)
+    state["fixed"] = state["fixed"] + sum(1 for d in detections if d.get('STATUS') == 'Fixed')
+
+
 def evaluate(data):
     """Core evaluation logic."""
     try:
-        hosts = data.get('HOST_LIST_VM_DETECTION_OUTPUT', {}).get('RESPONSE', {}).get('HOST_LIST', {}).get('HOST', [])
-        if isinstance(hosts, dict):
-            hosts = [hosts]
-        total = 0
-        fixed = 0
-        for host in hosts:
-            detections = host.get('DETECTION_LIST', {}).get('DETECTION', [])
-            if isinstance(detections, dict):
-                detections = [detections]
-            total += len(detections)
-            fixed += sum(1 for d in detections if d.get('STATUS') == 'Fixed')
+        state = {"total": 0, "fixed": 0}
+        scan_hosts(data, count_fixed_detections, state)
+        total = state["total"]
+        fixed = state["fixed"]
         compliance = int((fixed / total) * 100) if total > 0 else 100
         return {"patchCompliancePercentage": str(compliance), "totalDetections": total, "fixedDetections": fixed}
     except Exception as e:
@@ -65,12 +206,14 @@ def evaluate(data):
 def transform(input):
     criteriaKey = "patchCompliancePercentage"
     try:
-        if isinstance(input, str):
+        if isinstance(input, bytes):
+            input = input.decode("utf-8")
+        # Raw Qualys XML is passed through to the streaming host reader
+        if isinstance(input, str) and not input.lstrip().startswith("<"):
             input = json.loads(input)
-        elif isinstance(input, bytes):
-            input = json.loads(input.decode("utf-8"))
         data, validation = extract_input(input)
-        if validation.get("status") == "failed":
+        # Schemas describe the JSON-converted shape, so raw XML always fails them
+        if validation.get("status") == "failed" and not is_qualys_xml(data):
             return create_response(result={criteriaKey: False}, validation=validation, fail_reasons=["Input validation failed"])
         eval_result = evaluate(data)
         result_value = eval_result.get(criteriaKey, False)
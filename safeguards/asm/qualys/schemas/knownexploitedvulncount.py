@@ -6,6 +6,8 @@ from pydantic import BaseModel, Field
 class KnownexploitedvulncountInput(BaseModel):
     """Expected input schema for the knownexploitedvulncount transformation. Criteria key: knownExploitedVulnCount"""
     kev_matches: Optional[List[Dict]] = Field(None, description="List of CISA Known Exploited Vulnerability matches")
+    kevCatalog: Optional[Dict[str, Any]] = Field(None, description="CISA KEV feed document (catalogVersion, vulnerabilities[].cveID)")
+    detections: Optional[List[Dict]] = Field(None, description="Detection/finding records carrying CVE references")
 
     class Config:
         extra = "allow"
@@ -107,6 +107,77 @@ def extract_protected_items(data):
     return items
 
 
+# Fixed-format ISO-8601 parsing straight to epoch seconds. Vendor timestamps
+# repeat heavily, so parsed values are cached by their raw string.
+EPOCH_CACHE = {}
+EPOCH_CACHE_LIMIT = 100000
+DEFAULT_BACKUP_EPOCH = 946684800  # 2000-01-01T00:00:00Z, used when no backup time parses
+
+
+def days_from_civil(year, month, day):
+    """Days since 1970-01-01 for a proleptic Gregorian date."""
+    if month <= 2:
+        year = year - 1
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def parse_epoch_uncached(value):
+    """Parse 'YYYY-MM-DD[THH:MM:SS[.fff]][Z|+HH:MM]' into epoch seconds, or None."""
+    text = value.strip()
+    if len(text) < 10 or text[4] != "-" or text[7] != "-":
+        return None
+    try:
+        month = int(text[5:7])
+        day = int(text[8:10])
+        if month < 1 or month > 12 or day < 1 or day > 31:
+            return None
+        seconds = days_from_civil(int(text[0:4]), month, day) * 86400
+        if len(text) >= 19 and text[10] in "T " and text[13] == ":" and text[16] == ":":
+            seconds = seconds + int(text[11:13]) * 3600 + int(text[14:16]) * 60 + int(text[17:19])
+            tail = text[19:]
+            if tail.startswith("."):
+                cut = 1
+                while cut < len(tail) and tail[cut].isdigit():
+                    cut = cut + 1
+                tail = tail[cut:]
+            if tail and tail not in ("Z", "z"):
+                sign = -1 if tail[0] == "-" else 1
+                offset = tail[1:].replace(":", "")
+                seconds = seconds - sign * (int(offset[0:2]) * 3600 + int(offset[2:4] or 0) * 60)
+        elif len(text) > 10:
+            return None
+        return seconds
+    except (ValueError, IndexError):
+        return None
+
+
+def parse_epoch(value):
+    """Cached epoch-seconds parse of an ISO-8601 string; None when unparseable."""
+    if not isinstance(value, str) or not value:
+        return None
+    cached = EPOCH_CACHE.get(value)
+    if cached is not None or value in EPOCH_CACHE:
+        return cached
+    seconds = parse_epoch_uncached(value)
+    if len(EPOCH_CACHE) < EPOCH_CACHE_LIMIT:
+        EPOCH_CACHE[value] = seconds
+    return seconds
+
+
+def epoch_column(values):
+    """Parse a column of timestamp strings to epoch seconds, dropping unparseable values."""
+    column = []
+    for value in values:
+        seconds = parse_epoch(value)
+        if seconds is not None:
+            column.append(seconds)
+    return column
+
+
 def evaluate(data):
     """Evaluate last backup time across all vaults' protected items."""
     try:
@@ -115,43 +186,11 @@ def evaluate(data):
         if not items:
             return {"lastSuccessfulBackupAge": "999", "error": "No protected items"}
 
-        def parse_last_backup_time(backup_time_str):
-            # Handles timestamps with/without fractions/with/without Z or +00:00 at end
-            if not backup_time_str:
-                return datetime(2000, 1, 1, tzinfo=timezone.utc)
-            val = backup_time_str.strip()
-            # Ensure UTC aware
-            if val.endswith('Z'):
-                val = val[:-1] + '+00:00'
-            try:
-                # Remove excessive microseconds if present (Python only supports up to 6 digits)
-                if '.' in val:
-                    dt_part, rest = val.split('.', 1)
-                    frac, tz_part = rest.split('+', 1) if '+' in rest else (rest, None)
-                    frac = frac[:6]  # take at most 6 digits
-                    val = f"{dt_part}.{frac}"
-                    if tz_part:
-                        val += '+' + tz_part
-                return datetime.fromisoformat(val)
-            except Exception:
-                # fallback to parsing without fractions if above fails
-                try:
-                    if '.' in val:
-                        val = val.split('.')[0] + val[val.find('+'):]
-                    return datetime.fromisoformat(val)
-                except Exception:
-                    return datetime(2000, 1, 1, tzinfo=timezone.utc)
-
-        most_recent = max(
-            (
-                parse_last_backup_time(
-                    (item.get('properties') or {}).get('lastBackupTime', '2000-01-01T00:00:00Z')
-                )
-                for item in items
-            ),
-            default=datetime(2000, 1, 1, tzinfo=timezone.utc)
+        backup_times = epoch_column(
+            (item.get('properties') or {}).get('lastBackupTime', '2000-01-01T00:00:00Z') for item in items
         )
-        hours_ago = int((datetime.now(timezone.utc) - most_recent).total_seconds() / 3600)
+        most_recent = max(backup_times) if backup_times else DEFAULT_BACKUP_EPOCH
+        hours_ago = (int(datetime.now(timezone.utc).timestamp()) - most_recent) // 3600
         return {"lastSuccessfulBackupAge": str(hours_ago), "hoursSinceLastBackup": hours_ago}
     except Exception as e:
         return {"lastSuccessfulBackupAge": "999", "error": str(e)}
@@ -0,0 +1,223 @@
+"""
+Transformation: securityhub_transform
+Vendor: AWS Security Hub  |  Category: Cloud Security
+
+Multi-criteria evaluation over Security Hub GetFindings results. The findings are
+walked once to build a control-id -> status table, severity x compliance-status and
+severity x workflow-status counters, and a resource-type index; every Security Hub
+criterion is then answered from those aggregates:
+
+  criticalOpenFindingsCount, compliancePercentage, isGuardDutyEnabled,
+  isIAMLoggingEnabled, isMFAEnforcedForUsers, isPublicStorageBucketExposed,
+  unencryptedStorageResourceCount
+
+Accepts a single GetFindings response ({"Findings": [...]}), a bare findings list,
+or multiple pages ({"pages": [{"Findings": [...], "NextToken": ...}, ...]} or a list
+of page objects). Pages are merged as they are read, deduplicating on finding Id.
+"""
+import json
+from datetime import datetime
+
+
+TRANSFORM_ID = "securityhub_transform"
+GUARDDUTY_CONTROLS = ["GuardDuty.1"]
+IAM_LOGGING_CONTROLS = ["CloudTrail.1"]
+MFA_CONTROLS = ["IAM.5"]
+PUBLIC_STORAGE_CONTROLS = ["S3.1", "S3.2", "S3.3", "S3.8"]
+ENCRYPTION_CONTROLS = ["EC2.7", "RDS.3", "EFS.1"]
+
+
+def extract_pages(input_data):
+    """Unwrap the input and return a list of GetFindings pages."""
+    data = input_data
+    if isinstance(data, str):
+        data = json.loads(data)
+    elif isinstance(data, bytes):
+        data = json.loads(data.decode("utf-8"))
+    if isinstance(data, dict) and "data" in data and "validation" in data:
+        data = data["data"]
+    for _ in range(4):
+        if not isinstance(data, dict):
+            break
+        nxt = None
+        for key in ("api_response", "response", "result", "apiResponse", "Output"):
+            if isinstance(data.get(key), (dict, list)):
+                nxt = data[key]
+                break
+        if nxt is None:
+            break
+        data = nxt
+    if isinstance(data, dict) and isinstance(data.get("pages"), list):
+        return data["pages"]
+    if isinstance(data, dict) and "Findings" in data:
+        return [data]
+    if isinstance(data, list):
+        if any(isinstance(p, dict) and "Findings" in p for p in data):
+            return data
+        return [{"Findings": data}]
+    return []
+
+
+def build_response(result, pass_reasons=None, fail_reasons=None, errors=None, input_summary=None,
+                   additional_findings=None):
+    return {
+        "transformedResponse": result,
+        "additionalInfo": {
+            "dataCollection": {"status": "error" if (errors or []) else "success", "errors": errors or []},
+            "validation": {"status": "unknown", "errors": [], "warnings": []},
+            "transformation": {"status": "error" if (errors or []) else "success", "errors": errors or [], "inputSummary": input_summary or {}},
+            "evaluation": {"passReasons": pass_reasons or [], "failReasons": fail_reasons or [], "recommendations": [], "additionalFindings": additional_findings or []},
+            "metadata": {"evaluatedAt": datetime.utcnow().isoformat() + "Z", "schemaVersion": "1.0",
+                         "transformationId": TRANSFORM_ID, "vendor": "AWS Security Hub", "category": "Cloud Security"},
+        },
+    }
+
+
+def increment(table, outer, inner):
+    row = table.get(outer)
+    if row is None:
+        row = {}
+        table[outer] = row
+    row[inner] = row.get(inner, 0) + 1
+
+
+def new_aggregates():
+    return {
+        "findings": 0,
+        "duplicates": 0,
+        "pages": 0,
+        "seenIds": set(),
+        "controlStatus": {},
+        "controlFailedFindings": {},
+        "severityByCompliance": {},
+        "severityByWorkflow": {},
+        "resourceTypes": {},
+    }
+
+
+def add_finding(agg, finding):
+    """Fold one finding into the aggregates; repeated Ids are counted once."""
+    finding_id = finding.get("Id")
+    if finding_id:
+        if finding_id in agg["seenIds"]:
+            agg["duplicates"] = agg["duplicates"] + 1
+            return
+        agg["seenIds"].add(finding_id)
+    agg["findings"] = agg["findings"] + 1
+
+    comp = finding.get("Compliance") or {}
+    status = str(comp.get("Status") or "").upper()
+    severity = str((finding.get("Severity") or {}).get("Label") or "").upper() or "UNKNOWN"
+    workflow = str((finding.get("Workflow") or {}).get("Status") or "").upper() or "UNKNOWN"
+    increment(agg["severityByCompliance"], severity, status or "NONE")
+    increment(agg["severityByWorkflow"], severity, workflow)
+
+    cid = comp.get("SecurityControlId")
+    if cid and status in ("PASSED", "FAILED"):
+        statuses = agg["controlStatus"]
+        statuses[cid] = "FAILED" if (status == "FAILED" or statuses.get(cid) == "FAILED") else "PASSED"
+        if status == "FAILED":
+            failed = agg["controlFailedFindings"]
+            failed[cid] = failed.get(cid, 0) + 1
+
+    for resource in finding.get("Resources") or []:
+        if isinstance(resource, dict):
+            increment(agg["resourceTypes"], resource.get("Type") or "Unknown", status or "NONE")
+
+
+def aggregate_pages(pages):
+    """Walk every page once, merging findings into a single set of aggregates."""
+    agg = new_aggregates()
+    for page in pages:
+        findings = page.get("Findings") if isinstance(page, dict) else page
+        if not isinstance(findings, list):
+            continue
+        agg["pages"] = agg["pages"] + 1
+        for finding in findings:
+            if isinstance(finding, dict):
+                add_finding(agg, finding)
+    return agg
+
+
+def control_statuses(agg, control_ids):
+    table = agg["controlStatus"]
+    return {cid: table[cid] for cid in control_ids if cid in table}
+
+
+def evaluate_controls_enabled(agg, key, control_ids):
+    """Criteria that pass when every listed control has findings and none fail."""
+    statuses = control_statuses(agg, control_ids)
+    if not statuses:
+        return {key: False}, "fail", "No active Security Hub findings for control(s): " + ", ".join(control_ids)
+    failed = [cid for cid in control_ids if statuses.get(cid) == "FAILED"]
+    if failed:
+        return {key: False}, "fail", "Failing control(s): " + ", ".join(failed)
+    return {key: True}, "pass", "All checked controls passing: " + ", ".join(control_ids)
+
+
+def evaluate_all(agg):
+    """Answer every Security Hub criterion from the aggregates."""
+    findings = []
+    result = {}
+
+    critical = agg["severityByCompliance"].get("CRITICAL", {}).get("FAILED", 0)
+    result["criticalOpenFindingsCount"] = critical == 0
+    result["openCriticalFindings"] = critical
+    findings.append({"metric": "criticalOpenFindingsCount", "status": "pass" if critical == 0 else "fail",
+                     "reason": "No open critical findings" if critical == 0 else str(critical) + " open critical findings"})
+
+    table = agg["controlStatus"]
+    total = len(table)
+    passing = len([cid for cid in table if table[cid] == "PASSED"])
+    percentage = int(round(100 * passing / total)) if total > 0 else 0
+    result["compliancePercentage"] = percentage
+    result["CIScompliancePercentage"] = percentage
+    result["passingControls"] = passing
+    result["totalControls"] = total
+    findings.append({"metric": "compliancePercentage", "status": "pass" if total and passing == total else "fail",
+                     "reason": str(percentage) + "% of controls passing (" + str(passing) + "/" + str(total) + ")"})
+
+    for key, control_ids in (("isGuardDutyEnabled", GUARDDUTY_CONTROLS),
+                             ("isIAMLoggingEnabled", IAM_LOGGING_CONTROLS),
+                             ("isMFAEnforcedForUsers", MFA_CONTROLS)):
+        values, status, reason = evaluate_controls_enabled(agg, key, control_ids)
+        result.update(values)
+        findings.append({"metric": key, "status": status, "reason": reason})
+
+    public = [cid for cid, st in control_statuses(agg, PUBLIC_STORAGE_CONTROLS).items() if st == "FAILED"]
+    result["isPublicStorageBucketExposed"] = len(public) > 0
+    findings.append({"metric": "isPublicStorageBucketExposed", "status": "fail" if public else "pass",
+                     "reason": "Public S3 exposure: " + ", ".join(public) if public else "No public S3 bucket exposure detected"})
+
+    failed_counts = agg["controlFailedFindings"]
+    unencrypted = sum(failed_counts.get(cid, 0) for cid in ENCRYPTION_CONTROLS)
+    result["unencryptedStorageResourceCount"] = unencrypted == 0
+    result["unencryptedResources"] = unencrypted
+    findings.append({"metric": "unencryptedStorageResourceCount", "status": "pass" if unencrypted == 0 else "fail",
+                     "reason": "No unencrypted storage resources" if unencrypted == 0
+                     else str(unencrypted) + " unencrypted storage resource findings"})
+    return result, findings
+
+
+def transform(input):
+    try:
+        agg = aggregate_pages(extract_pages(input))
+        result, findings = evaluate_all(agg)
+        summary = {
+            "pagesProcessed": agg["pages"],
+            "findingsProcessed": agg["findings"],
+            "duplicateFindingsSkipped": agg["duplicates"],
+            "controlStatus": agg["controlStatus"],
+            "severityByComplianceStatus": agg["severityByCompliance"],
+            "severityByWorkflowStatus": agg["severityByWorkflow"],
+            "resourceTypes": agg["resourceTypes"],
+        }
+        return build_response(result,
+                              pass_reasons=[f["reason"] for f in findings if f["status"] == "pass"],
+                              fail_reasons=[f["reason"] for f in findings if f["status"] == "fail"],
+                              input_summary=summary, additional_findings=findings)
+    except Exception as error:
+        return build_response({"criticalOpenFindingsCount": False, "compliancePercentage": 0,
+                               "isGuardDutyEnabled": False, "isIAMLoggingEnabled": False,
+                               "isMFAEnforcedForUsers": False, "isPublicStorageBucketExposed": True,
+                               "unencryptedStorageResourceCount": False}, errors=[str(error)])
@@ -0,0 +1,369 @@
+"""
+Transformation: crq_transform
+Vendor: Safe Security  |  Category: Cyber Risk Quantification
+Evaluates: The SAFE One findings, asset inventory and risk scenario criteria from
+one bundle:
+
+  isCriticalFindingsMonitored, isAssetInventoryPopulated, isRiskScenarioConfigured
+
+Findings are indexed once by severity and age in days (see the recency index
+below), so the primary recency threshold and any extra "recencyThresholdsDays"
+are answered from the buckets in a single walk.
+
+Input bundle (each a SAFE list response {"size", "totalCount", "values": [...]}):
+  findings, assets, riskScenarios
+Optional: recencyThresholdDays (int), recencyThresholdsDays ([int, ...])
+"""
+import json
+from datetime import datetime
+
+
+RECENCY_THRESHOLD_DAYS = 30
+MINIMUM_ASSET_THRESHOLD = 10
+INACTIVE_SCENARIO_STATUSES = ("deleted", "archived")
+
+
+def extract_input(input_data):
+    if isinstance(input_data, dict) and "data" in input_data and "validation" in input_data:
+        return input_data["data"], input_data["validation"]
+    data = input_data
+    if isinstance(data, dict):
+        wrapper_keys = ["api_response", "response", "result", "apiResponse", "Output"]
+        for _ in range(3):
+            unwrapped = False
+            for key in wrapper_keys:
+                if key in data and isinstance(data.get(key), dict):
+                    data = data[key]
+                    unwrapped = True
+                    break
+            if not unwrapped:
+                break
+    return data, {"status": "unknown", "errors": [], "warnings": ["Legacy input format"]}
+
+
+def create_response(result, validation=None, pass_reasons=None, fail_reasons=None,
+                    recommendations=None, input_summary=None, transformation_errors=None,
+                    api_errors=None, additional_findings=None):
+    if validation is None:
+        validation = {"status": "unknown", "errors": [], "warnings": []}
+    return {
+        "transformedResponse": result,
+        "additionalInfo": {
+            "dataCollection": {"status": "error" if (api_errors or []) else "success", "errors": api_errors or []},
+            "validation": {"status": validation.get("status", "unknown"), "errors": validation.get("errors", []), "warnings": validation.get("warnings", [])},
+            "transformation": {"status": "error" if (transformation_errors or []) else "success", "errors": transformation_errors or [], "inputSummary": input_summary or {}},
+            "evaluation": {"passReasons": pass_reasons or [], "failReasons": fail_reasons or [], "recommendations": recommendations or [], "additionalFindings": additional_findings or []},
+            "metadata": {"evaluatedAt": datetime.utcnow().isoformat() + "Z", "schemaVersion": "1.0", "transformationId": "crq_transform", "vendor": "Safe Security", "category": "Cyber Risk Quantification"}
+        }
+    }
+
+
+# ============================================================================
+# Findings Recency Index (inline for RestrictedPython compatibility)
+# ============================================================================
+#
+# Each finding's best timestamp is parsed once into epoch seconds and counted
+# into a (severity, age in whole days) bucket. Recency and threshold questions
+# then walk the buckets (at most one per distinct age per severity) instead of
+# the findings, so any number of thresholds cost one pass over the buckets.
+
+TIMESTAMP_FIELDS = ("updatedAt", "lastUpdated", "assessedAt", "createdAt")
+SEVERITY_FIELDS = ("severity", "riskLevel", "priority")
+UNKNOWN_SEVERITY = "unknown"
+AGE_BANDS = ((1, "last24Hours"), (7, "last7Days"), (30, "last30Days"), (90, "last90Days"), (365, "lastYear"))
+SECONDS_PER_DAY = 86400
+
+# Fixed-format ISO-8601 parsing straight to epoch seconds. Vendor timestamps
+# repeat heavily, so parsed values are cached by their raw string.
+EPOCH_CACHE = {}
+EPOCH_CACHE_LIMIT = 100000
+
+
+def days_from_civil(year, month, day):
+    """Days since 1970-01-01 for a proleptic Gregorian date."""
+    if month <= 2:
+        year = year - 1
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def parse_epoch_uncached(value):
+    """Parse 'YYYY-MM-DD[THH:MM:SS[.fff]][Z|+HH:MM]' into epoch seconds, or None."""
+    text = value.strip()
+    if len(text) < 10 or text[4] != "-" or text[7] != "-":
+        return None
+    try:
+        month = int(text[5:7])
+        day = int(text[8:10])
+        if month < 1 or month > 12 or day < 1 or day > 31:
+            return None
+        seconds = days_from_civil(int(text[0:4]), month, day) * 86400
+        if len(text) >= 19 and text[10] in "T " and text[13] == ":" and text[16] == ":":
+            seconds = seconds + int(text[11:13]) * 3600 + int(text[14:16]) * 60 + int(text[17:19])
+            tail = text[19:]
+            if tail.startswith("."):
+                cut = 1
+                while cut < len(tail) and tail[cut].isdigit():
+                    cut = cut + 1
+                tail = tail[cut:]
+            if tail and tail not in ("Z", "z"):
+                sign = -1 if tail[0] == "-" else 1
+                offset = tail[1:].replace(":", "")
+                seconds = seconds - sign * (int(offset[0:2]) * 3600 + int(offset[2:4] or 0) * 60)
+        elif len(text) > 10:
+            return None
+        return seconds
+    except (ValueError, IndexError):
+        return None
+
+
+def parse_epoch(value):
+    """Cached epoch-seconds parse of an ISO-8601 string; None when unparseable."""
+    if not isinstance(value, str) or not value:
+        return None
+    cached = EPOCH_CACHE.get(value)
+    if cached is not None or value in EPOCH_CACHE:
+        return cached
+    seconds = parse_epoch_uncached(value)
+    if len(EPOCH_CACHE) < EPOCH_CACHE_LIMIT:
+        EPOCH_CACHE[value] = seconds
+    return seconds
+
+
+def current_epoch():
+    now = datetime.utcnow()
+    return days_from_civil(now.year, now.month, now.day) * SECONDS_PER_DAY + now.hour * 3600 + now.minute * 60 + now.second
+
+
+def finding_epoch(finding):
+    """Epoch seconds of the first parseable timestamp field, or None."""
+    for field in TIMESTAMP_FIELDS:
+        value = finding.get(field)
+        if value:
+            seconds = parse_epoch(str(value))
+            if seconds is not None:
+                return seconds
+    return None
+
+
+def build_findings_index(findings, now):
+    """Count findings per severity per age in days; undated findings are counted apart."""
+    index = {"now": now, "total": 0, "dated": 0, "newest": None, "ages": {}, "undated": {}}
+    for finding in findings:
+        if not isinstance(finding, dict):
+            continue
+        severity = UNKNOWN_SEVERITY
+        for field in SEVERITY_FIELDS:
+            if finding.get(field):
+                severity = str(finding[field]).lower()
+                break
+        index["total"] = index["total"] + 1
+        seconds = finding_epoch(finding)
+        if seconds is None:
+            index["undated"][severity] = index["undated"].get(severity, 0) + 1
+            continue
+        index["dated"] = index["dated"] + 1
+        if index["newest"] is None or seconds > index["newest"]:
+            index["newest"] = seconds
+        age = max(0, (now - seconds) // SECONDS_PER_DAY)
+        buckets = index["ages"].get(severity)
+        if buckets is None:
+            buckets = {}
+            index["ages"][severity] = buckets
+        buckets[age] = buckets.get(age, 0) + 1
+    return index
+
+
+def findings_within(index, threshold_days):
+    """{severity: count} of dated findings younger than each threshold, for every threshold in one walk."""
+    thresholds = sorted(set(threshold_days))
+    counts = {}
+    for days in thresholds:
+        counts[days] = {}
+    for severity, buckets in index["ages"].items():
+        for age, count in buckets.items():
+            for days in thresholds:
+                if age < days:
+                    counts[days][severity] = counts[days].get(severity, 0) + count
+    return counts
+
+
+def newest_age_days(index):
+    if index["newest"] is None:
+        return None
+    return round((index["now"] - index["newest"]) / SECONDS_PER_DAY, 1)
+
+
+def threshold_list(data):
+    """Primary recency threshold plus any extra thresholds requested in the payload."""
+    primary = data.get("recencyThresholdDays", RECENCY_THRESHOLD_DAYS)
+    if not isinstance(primary, int) or isinstance(primary, bool) or primary <= 0:
+        primary = RECENCY_THRESHOLD_DAYS
+    extra = data.get("recencyThresholdsDays", [])
+    thresholds = [primary]
+    for days in extra if isinstance(extra, list) else []:
+        if isinstance(days, int) and not isinstance(days, bool) and days > 0 and days not in thresholds:
+            thresholds.append(days)
+    return primary, thresholds
+
+
+def recency_summary(index, thresholds):
+    """Per-threshold recency, per-severity totals and age bands from one walk over the buckets."""
+    within = findings_within(index, thresholds + [days for days, _ in AGE_BANDS])
+    by_severity = dict(index["undated"])
+    for severity, buckets in index["ages"].items():
+        by_severity[severity] = by_severity.get(severity, 0) + sum(buckets.values())
+    per_threshold = {}
+    for days in thresholds:
+        per_threshold[str(days)] = {
+            "isRecent": len(within[days]) > 0,
+            "findingsWithin": sum(within[days].values()),
+            "bySeverity": within[days],
+        }
+    by_age = {}
+    for days, name in AGE_BANDS:
+        by_age[name] = sum(within[days].values())
+    by_age["undated"] = index["total"] - index["dated"]
+    return per_threshold, by_severity, by_age
+
+
+def response_values(payload, keys):
+    """(records, totalCount) of a SAFE list response or a bare list; records is None when unrecognized."""
+    if isinstance(payload, list):
+        return payload, len(payload)
+    if not isinstance(payload, dict):
+        return None, 0
+    total_count = payload.get("totalCount", payload.get("size", 0))
+    for key in keys:
+        if isinstance(payload.get(key), list):
+            return payload[key], total_count
+    return None, total_count
+
+
+def evaluate_findings(payload, data):
+    findings, total_count = response_values(payload, ("values", "findings", "data"))
+    if findings is None:
+        return {"isCriticalFindingsMonitored": False, "findingsError": "Unexpected findings response structure"}
+    # If no critical findings exist at all, platform may not be integrated
+    # with any vulnerability source — this is a fail condition
+    if total_count == 0 and len(findings) == 0:
+        return {"isCriticalFindingsMonitored": False, "criticalFindingCount": 0}
+
+    index = build_findings_index(findings, current_epoch())
+    threshold_days, thresholds = threshold_list(data)
+    per_threshold, by_severity, by_age = recency_summary(index, thresholds)
+    if index["dated"] > 0:
+        is_recent = per_threshold[str(threshold_days)]["isRecent"]
+    else:
+        # No timestamps found in findings — accept presence as sufficient
+        is_recent = True
+    reported_count = total_count if total_count > 0 else len(findings)
+    return {
+        "isCriticalFindingsMonitored": reported_count >= 1 and is_recent,
+        "criticalFindingCount": reported_count,
+        "recencyThresholdDays": threshold_days,
+        "newestFindingAgeDays": newest_age_days(index),
+        "findingsBySeverity": by_severity,
+        "findingsByAge": by_age,
+        "recencyByThreshold": per_threshold,
+    }
+
+
+def evaluate_assets(payload):
+    # Use totalCount (reflects full paginated dataset) in preference to
+    # the current page's values length, which may be a subset.
+    values, total_count = response_values(payload, ("values", "assets", "data"))
+    if total_count == 0 and isinstance(values, list):
+        total_count = len(values)
+    return {"isAssetInventoryPopulated": total_count >= MINIMUM_ASSET_THRESHOLD, "assetCount": total_count}
+
+
+def evaluate_scenarios(payload):
+    scenarios, size = response_values(payload, ("values", "riskScenarios", "scenarios", "data"))
+    if scenarios is None:
+        return {"isRiskScenarioConfigured": isinstance(size, int) and size > 0, "scenarioCount": size}
+    # Active or draft counts as "configured"; only deleted/archived scenarios are ignored
+    configured = 0
+    for scenario in scenarios:
+        if isinstance(scenario, dict):
+            status = str(scenario.get("status", scenario.get("state", ""))).lower()
+            if status not in INACTIVE_SCENARIO_STATUSES:
+                configured = configured + 1
+    return {"isRiskScenarioConfigured": configured >= 1, "scenarioCount": len(scenarios),
+            "configuredScenarioCount": configured}
+
+
+def evaluate(data):
+    result = {}
+    result.update(evaluate_findings(data.get("findings"), data))
+    result.update(evaluate_assets(data.get("assets")))
+    result.update(evaluate_scenarios(data.get("riskScenarios", data.get("scenarios"))))
+    return result
+
+
+CRITERIA = [
+    "isCriticalFindingsMonitored",
+    "isAssetInventoryPopulated",
+    "isRiskScenarioConfigured",
+]
+
+
+def transform(input):
+    try:
+        if isinstance(input, str):
+            input = json.loads(input)
+        elif isinstance(input, bytes):
+            input = json.loads(input.decode("utf-8"))
+
+        data, validation = extract_input(input)
+
+        if validation.get("status") == "failed":
+            return create_response(
+                result={key: False for key in CRITERIA},
+                validation=validation,
+                fail_reasons=["Input validation failed"]
+            )
+        if not isinstance(data, dict):
+            data = {}
+
+        result = evaluate(data)
+
+        pass_reasons = []
+        fail_reasons = []
+        recommendations = []
+        additional_findings = []
+        for key in CRITERIA:
+            additional_findings.append({"metric": key, "status": "pass" if result[key] else "fail"})
+            if result[key]:
+                pass_reasons.append(f"{key} check passed")
+            else:
+                fail_reasons.append(f"{key} check failed")
+                recommendations.append(f"Review Safe Security configuration for {key}")
+        if "findingsError" in result:
+            fail_reasons.append(result.pop("findingsError"))
+
+        return create_response(
+            result=result,
+            validation=validation,
+            pass_reasons=pass_reasons,
+            fail_reasons=fail_reasons,
+            recommendations=recommendations,
+            additional_findings=additional_findings,
+            input_summary={
+                "criticalFindingCount": result.get("criticalFindingCount", 0),
+                "newestFindingAgeDays": result.get("newestFindingAgeDays"),
+                "assetCount": result["assetCount"],
+                "scenarioCount": result["scenarioCount"]
+            }
+        )
+
+    except Exception as e:
+        return create_response(
+            result={key: False for key in CRITERIA},
+            validation={"status": "error", "errors": [], "warnings": []},
+            transformation_errors=[str(e)],
+            fail_reasons=[f"Transformation error: {str(e)}"]
+        )
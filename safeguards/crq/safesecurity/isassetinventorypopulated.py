@@ -7,6 +7,9 @@ import json
 from datetime import datetime
 
 
+MINIMUM_ASSET_THRESHOLD = 10
+
+
 def extract_input(input_data):
     if isinstance(input_data, dict) and "data" in input_data and "validation" in input_data:
         return input_data["data"], input_data["validation"]
@@ -7,6 +7,9 @@ import json
 from datetime import datetime
 
 
+RECENCY_THRESHOLD_DAYS = 30
+
+
 def extract_input(input_data):
     if isinstance(input_data, dict) and "data" in input_data and "validation" in input_data:
         return input_data["data"], input_data["validation"]
@@ -42,6 +45,178 @@ def create_response(result, validation=None, pass_reasons=None, fail_reasons=Non
     }
 
 
+# ============================================================================
+# Findings Recency Index (inline for RestrictedPython compatibility)
+# ============================================================================
+#
+# Each finding's best timestamp is parsed once into epoch seconds and counted
+# into a (severity, age in whole days) bucket. Recency and threshold questions
+# then walk the buckets (at most one per distinct age per severity) instead of
+# the findings, so any number of thresholds cost one pass over the buckets.
+
+TIMESTAMP_FIELDS = ("updatedAt", "lastUpdated", "assessedAt", "createdAt")
+SEVERITY_FIELDS = ("severity", "riskLevel", "priority")
+UNKNOWN_SEVERITY = "unknown"
+AGE_BANDS = ((1, "last24Hours"), (7, "last7Days"), (30, "last30Days"), (90, "last90Days"), (365, "lastYear"))
+SECONDS_PER_DAY = 86400
+
+# Fixed-format ISO-8601 parsing straight to epoch seconds. Vendor timestamps
+# repeat heavily, so parsed values are cached by their raw string.
+EPOCH_CACHE = {}
+EPOCH_CACHE_LIMIT = 100000
+
+
+def days_from_civil(year, month, day):
+    """Days since 1970-01-01 for a proleptic Gregorian date."""
+    if month <= 2:
+        year = year - 1
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def parse_epoch_uncached(value):
+    """Parse 'YYYY-MM-DD[THH:MM:SS[.fff]][Z|+HH:MM]' into epoch seconds, or None."""
+    text = value.strip()
+    if len(text) < 10 or text[4] != "-" or text[7] != "-":
+        return None
+    try:
+        month = int(text[5:7])
+        day = int(text[8:10])
+        if month < 1 or month > 12 or day < 1 or day > 31:
+            return None
+        seconds = days_from_civil(int(text[0:4]), month, day) * 86400
+        if len(text) >= 19 and text[10] in "T " and text[13] == ":" and text[16] == ":":
+            seconds = seconds + int(text[11:13]) * 3600 + int(text[14:16]) * 60 + int(text[17:19])
+            tail = text[19:]
+            if tail.startswith("."):
+                cut = 1
+                while cut < len(tail) and tail[cut].isdigit():
+                    cut = cut + 1
+                tail = tail[cut:]
+            if tail and tail not in ("Z", "z"):
+                sign = -1 if tail[0] == "-" else 1
+                offset = tail[1:].replace(":", "")
+                seconds = seconds - sign * (int(offset[0:2]) * 3600 + int(offset[2:4] or 0) * 60)
+        elif len(text) > 10:
+            return None
+        return seconds
+    except (ValueError, IndexError):
+        return None
+
+
+def parse_epoch(value):
+    """Cached epoch-seconds parse of an ISO-8601 string; None when unparseable."""
+    if not isinstance(value, str) or not value:
+        return None
+    cached = EPOCH_CACHE.get(value)
+    if cached is not None or value in EPOCH_CACHE:
+        return cached
+    seconds = parse_epoch_uncached(value)
+    if len(EPOCH_CACHE) < EPOCH_CACHE_LIMIT:
+        EPOCH_CACHE[value] = seconds
+    return seconds
+
+
+def current_epoch():
+    now = datetime.utcnow()
+    return days_from_civil(now.year, now.month, now.day) * SECONDS_PER_DAY + now.hour * 3600 + now.minute * 60 + now.second
+
+
+def finding_epoch(finding):
+    """Epoch seconds of the first parseable timestamp field, or None."""
+    for field in TIMESTAMP_FIELDS:
+        value = finding.get(field)
+        if value:
+            seconds = parse_epoch(str(value))
+            if seconds is not None:
+                return seconds
+    return None
+
+
+def build_findings_index(findings, now):
+    """Count findings per severity per age in days; undated findings are counted apart."""
+    index = {"now": now, "total": 0, "dated": 0, "newest": None, "ages": {}, "undated": {}}
+    for finding in findings:
+        if not isinstance(finding, dict):
+            continue
+        severity = UNKNOWN_SEVERITY
+        for field in SEVERITY_FIELDS:
+            if finding.get(field):
+                severity = str(finding[field]).lower()
+                break
+        index["total"] = index["total"] + 1
+        seconds = finding_epoch(finding)
+        if seconds is None:
+            index["undated"][severity] = index["undated"].get(severity, 0) + 1
+            continue
+        index["dated"] = index["dated"] + 1
+        if index["newest"] is None or seconds > index["newest"]:
+            index["newest"] = seconds
+        age = max(0, (now - seconds) // SECONDS_PER_DAY)
+        buckets = index["ages"].get(severity)
+        if buckets is None:
+            buckets = {}
+            index["ages"][severity] = buckets
+        buckets[age] = buckets.get(age, 0) + 1
+    return index
+
+
+def findings_within(index, threshold_days):
+    """{severity: count} of dated findings younger than each threshold, for every threshold in one walk."""
+    thresholds = sorted(set(threshold_days))
+    counts = {}
+    for days in thresholds:
+        counts[days] = {}
+    for severity, buckets in index["ages"].items():
+        for age, count in buckets.items():
+            for days in thresholds:
+                if age < days:
+                    counts[days][severity] = counts[days].get(severity, 0) + count
+    return counts
+
+
+def newest_age_days(index):
+    if index["newest"] is None:
+        return None
+    return round((index["now"] - index["newest"]) / SECONDS_PER_DAY, 1)
+
+
+def threshold_list(data):
+    """Primary recency threshold plus any extra thresholds requested in the payload."""
+    primary = data.get("recencyThresholdDays", RECENCY_THRESHOLD_DAYS)
+    if not isinstance(primary, int) or isinstance(primary, bool) or primary <= 0:
+        primary = RECENCY_THRESHOLD_DAYS
+    extra = data.get("recencyThresholdsDays", [])
+    thresholds = [primary]
+    for days in extra if isinstance(extra, list) else []:
+        if isinstance(days, int) and not isinstance(days, bool) and days > 0 and days not in thresholds:
+            thresholds.append(days)
+    return primary, thresholds
+
+
+def recency_summary(index, thresholds):
+    """Per-threshold recency, per-severity totals and age bands from one walk over the buckets."""
+    within = findings_within(index, thresholds + [days for days, _ in AGE_BANDS])
+    by_severity = dict(index["undated"])
+    for severity, buckets in index["ages"].items():
+        by_severity[severity] = by_severity.get(severity, 0) + sum(buckets.values())
+    per_threshold = {}
+    for days in thresholds:
+        per_threshold[str(days)] = {
+            "isRecent": len(within[days]) > 0,
+            "findingsWithin": sum(within[days].values()),
+            "bySeverity": within[days],
+        }
+    by_age = {}
+    for days, name in AGE_BANDS:
+        by_age[name] = sum(within[days].values())
+    by_age["undated"] = index["total"] - index["dated"]
+    return per_threshold, by_severity, by_age
+
+
 def evaluate(data):
     """Core evaluation logic extracted from doc transform."""
     try:
@@ -60,29 +235,28 @@ def evaluate(data):
                 "criticalFindingCount": 0
             }
 
-        # Check recency: is the latest finding updated within threshold?
-        most_recent_dt = None
-        for finding in findings:
-            for ts_field in ("updatedAt", "lastUpdated", "assessedAt", "createdAt"):
-                ts_val = finding.get(ts_field)
-                if ts_val:
-                    try:
-                        dt = datetime.fromisoformat(str(ts_val).replace("Z", "+00:00"))
-                        if most_recent_dt is None or dt > most_recent_dt:
-                            most_recent_dt = dt
-                    except ValueError:
-                        continue
-                    break
+        index = build_findings_index(findings, current_epoch())
+        threshold_days, thresholds = threshold_list(data)
+        per_threshold, by_severity, by_age = recency_summary(index, thresholds)
 
-        if most_recent_dt is not None:
-            threshold = datetime.now(timezone.utc) - timedelta(days=RECENCY_THRESHOLD_DAYS)
-            is_recent = most_recent_dt >= threshold
+        # Check recency: is the latest finding updated within threshold?
+        if index["dated"] > 0:
+            is_recent = per_threshold[str(threshold_days)]["isRecent"]
         else:
             # No timestamps found in findings — accept presence as sufficient
             is_recent = True
 
         reported_count = total_count if total_count > 0 else len(findings)
         result = reported_count >= 1 and is_recent
+        return {
+            "isCriticalFindingsMonitored": result,
+            "criticalFindingCount": reported_count,
+            "recencyThresholdDays": threshold_days,
+            "newestFindingAgeDays": newest_age_days(index),
+            "findingsBySeverity": by_severity,
+            "findingsByAge": by_age,
+            "recencyByThreshold": per_threshold
+        }
     except Exception as e:
         return {"isCriticalFindingsMonitored": False, "error": str(e)}
 
@@ -16,7 +16,10 @@ the email domain and returns a flat dict keyed by protocol, e.g.:
 DKIM/SPF/DMARC are published DNS records, so they are verified by DNS lookup
 (vendor-agnostic) rather than via the Abnormal API. This transformation reads the
 SPF/DKIM/DMARC values and emits the per-protocol criteria keys plus the aggregate
-isDNSConfigured.
+isDNSConfigured. Record strings are parsed (SPF mechanisms, DMARC tags, DKIM
+key tags) through an LRU cache keyed by record text; a DMARC record with p=none
+or a revoked DKIM key does not count as configured. Multiple domains can be
+evaluated in one call as {"domains": {"example.com": {"SPF": ..., ...}, ...}}.
 """
 import json
 import ast
@@ -97,13 +100,131 @@ def coerce_data(value):
     return value if isinstance(value, dict) else {}
 
 
-def record_present(value):
-    """True if a protocol value from the DNS tool indicates a record exists.
+def get_protocol(data, name):
+    """Fetch a protocol value (SPF/DKIM/DMARC) regardless of key casing."""
+    if name in data:
+        return data.get(name)
+    lowered = {k.lower(): v for k, v in data.items() if isinstance(k, str)}
+    return lowered.get(name.lower())
 
-    The tool returns either a boolean, the actual DNS record string, or a falsey
-    sentinel (False / "" / "False" / "None" / "not found"). Any real record string
-    or boolean True counts as configured.
-    """
+
+# ============================================================================
+# DNS Records (inline for RestrictedPython compatibility)
+# ============================================================================
+
+# Parsed SPF/DMARC/DKIM records, keyed by (kind, exact record text). Tenants
+# and domains share a handful of records (e.g. a provider's SPF include), so an
+# LRU keeps repeated records from being re-parsed. Callers get a copy.
+RECORD_CACHE = {}
+RECORD_CACHE_LIMIT = 4096
+SPF_LOOKUP_MECHANISMS = ("include", "a", "mx", "ptr", "exists")
+SPF_LOOKUP_LIMIT = 10
+
+
+def parse_spf(text):
+    """Parse an SPF TXT record into mechanisms, the 'all' qualifier and DNS lookup count."""
+    terms = text.split()
+    result = {"valid": bool(terms) and terms[0].lower() == "v=spf1", "includes": [],
+              "allQualifier": None, "redirect": None, "dnsLookups": 0, "mechanismCount": 0}
+    lookups = 0
+    for term in terms[1:]:
+        lowered = term.lower()
+        if "=" in lowered and ":" not in lowered.split("=", 1)[0]:
+            name, value = lowered.split("=", 1)
+            if name == "redirect":
+                result["redirect"] = value
+                lookups = lookups + 1
+            continue
+        qualifier = "+"
+        if lowered[:1] in ("+", "-", "~", "?"):
+            qualifier = lowered[0]
+            lowered = lowered[1:]
+        name = lowered.split(":", 1)[0].split("/", 1)[0]
+        result["mechanismCount"] = result["mechanismCount"] + 1
+        if name == "all":
+            result["allQualifier"] = qualifier
+        elif name in SPF_LOOKUP_MECHANISMS:
+            lookups = lookups + 1
+            if name == "include" and ":" in lowered:
+                result["includes"].append(lowered.split(":", 1)[1])
+    result["dnsLookups"] = lookups
+    result["exceedsLookupLimit"] = lookups > SPF_LOOKUP_LIMIT
+    return result
+
+
+def parse_tag_list(text):
+    """Parse a 'k=v; k=v' tag list (DMARC/DKIM) into a dict with lower-cased tag names."""
+    tags = {}
+    for part in text.split(";"):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            tags[name.strip().lower()] = value.strip()
+    return tags
+
+
+def parse_dmarc(text):
+    """Parse a DMARC TXT record into its policy, subdomain policy, pct and reporting tags."""
+    tags = parse_tag_list(text)
+    policy = tags.get("p", "").lower()
+    try:
+        pct = int(tags.get("pct", "100"))
+    except ValueError:
+        pct = 100
+    return {
+        "valid": tags.get("v", "").upper() == "DMARC1" and policy in ("none", "quarantine", "reject"),
+        "policy": policy or "none",
+        "subdomainPolicy": tags.get("sp", "").lower() or policy or "none",
+        "pct": pct,
+        "hasAggregateReporting": bool(tags.get("rua")),
+        "enforced": policy in ("quarantine", "reject") and pct > 0,
+    }
+
+
+def parse_dkim(text):
+    """Parse a DKIM key record; an empty p= tag means the key has been revoked."""
+    tags = parse_tag_list(text)
+    return {
+        "valid": "p" in tags and (tags.get("v", "DKIM1").upper() == "DKIM1"),
+        "revoked": "p" in tags and tags.get("p") == "",
+        "keyType": tags.get("k", "rsa").lower(),
+    }
+
+
+RECORD_PARSERS = {"SPF": parse_spf, "DMARC": parse_dmarc, "DKIM": parse_dkim}
+
+
+def parse_record(kind, text):
+    """LRU-cached parse of a record's text; returns a copy so callers may keep or change it."""
+    key = (kind, text)
+    cached = RECORD_CACHE.pop(key, None)
+    if cached is None:
+        cached = RECORD_PARSERS[kind](text)
+        if len(RECORD_CACHE) >= RECORD_CACHE_LIMIT:
+            del RECORD_CACHE[next(iter(RECORD_CACHE))]
+    RECORD_CACHE[key] = cached
+    return {name: list(value) if isinstance(value, list) else value for name, value in cached.items()}
+
+
+def record_configured(kind, parsed):
+    """Verdict for a parsed record: DMARC must enforce (p != none), DKIM must not be revoked, SPF must be valid."""
+    if kind == "DMARC":
+        return parsed["valid"] and parsed["policy"] != "none"
+    if kind == "DKIM":
+        return parsed["valid"] and not parsed["revoked"]
+    return parsed["valid"]
+
+
+def looks_like_record(kind, text):
+    lowered = text.lower()
+    if kind == "SPF":
+        return lowered.startswith("v=spf1")
+    if kind == "DMARC":
+        return "v=dmarc1" in lowered
+    return lowered.startswith("v=dkim1") or ("p=" in lowered and ";" in lowered)
+
+
+def record_present(value):
+    """True if a non-record value (flag, probe result) indicates the record exists."""
     if value is None:
         return False
     if isinstance(value, bool):
@@ -116,12 +237,81 @@ def record_present(value):
     return bool(value)
 
 
-def get_protocol(data, name):
-    """Fetch a protocol value (SPF/DKIM/DMARC) regardless of key casing."""
-    if name in data:
-        return data.get(name)
-    lowered = {k.lower(): v for k, v in data.items() if isinstance(k, str)}
-    return lowered.get(name.lower())
+def record_status(kind, value):
+    """
+    Return (configured, parsed) for one protocol value. Record text is parsed and
+    judged by record_configured; any other value counts by presence (parsed None).
+    """
+    if isinstance(value, str) and looks_like_record(kind, value.strip().strip('"').strip()):
+        parsed = parse_record(kind, value.strip().strip('"').strip())
+        return record_configured(kind, parsed), parsed
+    return record_present(value), None
+
+
+def protocol_status(kind, value):
+    """
+    Return (configured, details) for one protocol value from the DNS tool. Record
+    text (or a DKIM selector -> record map) is judged by record_status and the
+    parsed record is returned as details.
+    """
+    if kind == "DKIM" and isinstance(value, dict) and value:
+        selectors = {}
+        configured = False
+        for selector, record in value.items():
+            selector_configured, parsed = record_status(kind, record)
+            selectors[selector] = parsed if parsed is not None else {"valid": selector_configured}
+            configured = configured or selector_configured
+        return configured, {"selectors": selectors}
+    configured, parsed = record_status(kind, value)
+    return configured, parsed or {}
+
+
+def evaluate_domain(data):
+    """Evaluate one domain's SPF/DKIM/DMARC values."""
+    data = coerce_data(data)
+    results = {}
+    details = {}
+    for kind in ("SPF", "DKIM", "DMARC"):
+        configured, parsed = protocol_status(kind, get_protocol(data, kind))
+        results["is" + kind + "Configured"] = configured
+        if parsed:
+            details[kind] = parsed
+    results["isDNSConfigured"] = results["isDMARCConfigured"] and results["isDKIMConfigured"] and results["isSPFConfigured"]
+    return results, details
+
+
+def missing_protocols(results):
+    missing = []
+    for label in ("DMARC", "DKIM", "SPF"):
+        if not results["is" + label + "Configured"]:
+            missing.append(label)
+    return missing
+
+
+def domain_batch(data):
+    """Return [(domain, payload)] for multi-domain input, or None for a single domain."""
+    domains = data.get("domains") if isinstance(data, dict) else None
+    if isinstance(domains, dict):
+        return list(domains.items())
+    if isinstance(domains, list):
+        return [(item.get("domain", str(i)), item) for i, item in enumerate(domains) if isinstance(item, dict)]
+    return None
+
+
+def evaluate_batch(batch):
+    """Evaluate many domains; rolled-up flags pass only when every domain passes."""
+    per_domain = {}
+    rolled_up = {"isDMARCConfigured": bool(batch), "isDKIMConfigured": bool(batch),
+                 "isSPFConfigured": bool(batch), "isDNSConfigured": bool(batch)}
+    fully_configured = 0
+    for domain, payload in batch:
+        results, details = evaluate_domain(payload)
+        per_domain[domain] = {**results, "records": details}
+        for key in rolled_up:
+            rolled_up[key] = rolled_up[key] and results[key]
+        if results["isDNSConfigured"]:
+            fully_configured = fully_configured + 1
+    return rolled_up, per_domain, fully_configured
 
 
 def transform(input):
@@ -155,22 +345,48 @@ def transform(input):
         recommendations = []
         additional_findings = []
 
-        is_spf_configured = record_present(get_protocol(data, "SPF"))
-        is_dkim_configured = record_present(get_protocol(data, "DKIM"))
-        is_dmarc_configured = record_present(get_protocol(data, "DMARC"))
+        batch = domain_batch(data)
+        if batch is not None:
+            results, per_domain, fully_configured = evaluate_batch(batch)
+            domain_count = len(per_domain)
+            if results["isDNSConfigured"]:
+                pass_reasons.append("All email DNS records (DMARC, DKIM, SPF) are properly configured for all "
+                                    + str(domain_count) + " domains")
+            else:
+                fail_reasons.append(str(domain_count - fully_configured) + " of " + str(domain_count)
+                                    + " domains are missing DNS records")
+                for domain, domain_result in per_domain.items():
+                    missing = missing_protocols(domain_result)
+                    if missing:
+                        fail_reasons.append(domain + ": missing " + ", ".join(missing))
+                recommendations.append("Publish the missing DNS records for each listed email domain.")
+            for metric, label in (("isDMARCConfigured", "DMARC"), ("isDKIMConfigured", "DKIM"), ("isSPFConfigured", "SPF")):
+                configured_count = len([d for d in per_domain.values() if d[metric]])
+                additional_findings.append({
+                    "metric": metric,
+                    "status": "pass" if results[metric] else "fail",
+                    "reason": label + " configured on " + str(configured_count) + "/" + str(domain_count) + " domains"
+                })
+            return create_response(
+                result={**results, "domainCount": domain_count, "domainsFullyConfigured": fully_configured},
+                validation=validation,
+                pass_reasons=pass_reasons,
+                fail_reasons=fail_reasons,
+                recommendations=recommendations,
+                additional_findings=additional_findings,
+                input_summary={"domainCount": domain_count, "domains": per_domain}
+            )
 
-        is_dns_configured = is_dmarc_configured and is_dkim_configured and is_spf_configured
+        results, details = evaluate_domain(data)
+        is_spf_configured = results["isSPFConfigured"]
+        is_dkim_configured = results["isDKIMConfigured"]
+        is_dmarc_configured = results["isDMARCConfigured"]
+        is_dns_configured = results["isDNSConfigured"]
 
         if is_dns_configured:
             pass_reasons.append("All email DNS records (DMARC, DKIM, SPF) are properly configured")
         else:
-            not_configured = []
-            if not is_dmarc_configured:
-                not_configured.append("DMARC")
-            if not is_dkim_configured:
-                not_configured.append("DKIM")
-            if not is_spf_configured:
-                not_configured.append("SPF")
+            not_configured = missing_protocols(results)
             fail_reasons.append("Missing DNS records: " + ", ".join(not_configured))
             recommendations.append(
                 "Publish the missing DNS records (" + ", ".join(not_configured) + ") for the email domain."
@@ -210,7 +426,8 @@ def transform(input):
             input_summary={
                 "dmarcConfigured": is_dmarc_configured,
                 "dkimConfigured": is_dkim_configured,
-                "spfConfigured": is_spf_configured
+                "spfConfigured": is_spf_configured,
+                "records": details
             }
         )
 
@@ -1,6 +1,147 @@
 import json
 import ast
 
+
+# ============================================================================
+# DNS Records (inline for RestrictedPython compatibility)
+# ============================================================================
+
+# Parsed SPF/DMARC/DKIM records, keyed by (kind, exact record text). Tenants
+# and domains share a handful of records (e.g. a provider's SPF include), so an
+# LRU keeps repeated records from being re-parsed. Callers get a copy.
+RECORD_CACHE = {}
+RECORD_CACHE_LIMIT = 4096
+SPF_LOOKUP_MECHANISMS = ("include", "a", "mx", "ptr", "exists")
+SPF_LOOKUP_LIMIT = 10
+
+
+def parse_spf(text):
+    """Parse an SPF TXT record into mechanisms, the 'all' qualifier and DNS lookup count."""
+    terms = text.split()
+    result = {"valid": bool(terms) and terms[0].lower() == "v=spf1", "includes": [],
+              "allQualifier": None, "redirect": None, "dnsLookups": 0, "mechanismCount": 0}
+    lookups = 0
+    for term in terms[1:]:
+        lowered = term.lower()
+        if "=" in lowered and ":" not in lowered.split("=", 1)[0]:
+            name, value = lowered.split("=", 1)
+            if name == "redirect":
+                result["redirect"] = value
+                lookups = lookups + 1
+            continue
+        qualifier = "+"
+        if lowered[:1] in ("+", "-", "~", "?"):
+            qualifier = lowered[0]
+            lowered = lowered[1:]
+        name = lowered.split(":", 1)[0].split("/", 1)[0]
+        result["mechanismCount"] = result["mechanismCount"] + 1
+        if name == "all":
+            result["allQualifier"] = qualifier
+        elif name in SPF_LOOKUP_MECHANISMS:
+            lookups = lookups + 1
+            if name == "include" and ":" in lowered:
+                result["includes"].append(lowered.split(":", 1)[1])
+    result["dnsLookups"] = lookups
+    result["exceedsLookupLimit"] = lookups > SPF_LOOKUP_LIMIT
+    return result
+
+
+def parse_tag_list(text):
+    """Parse a 'k=v; k=v' tag list (DMARC/DKIM) into a dict with lower-cased tag names."""
+    tags = {}
+    for part in text.split(";"):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            tags[name.strip().lower()] = value.strip()
+    return tags
+
+
+def parse_dmarc(text):
+    """Parse a DMARC TXT record into its policy, subdomain policy, pct and reporting tags."""
+    tags = parse_tag_list(text)
+    policy = tags.get("p", "").lower()
+    try:
+        pct = int(tags.get("pct", "100"))
+    except ValueError:
+        pct = 100
+    return {
+        "valid": tags.get("v", "").upper() == "DMARC1" and policy in ("none", "quarantine", "reject"),
+        "policy": policy or "none",
+        "subdomainPolicy": tags.get("sp", "").lower() or policy or "none",
+        "pct": pct,
+        "hasAggregateReporting": bool(tags.get("rua")),
+        "enforced": policy in ("quarantine", "reject") and pct > 0,
+    }
+
+
+def parse_dkim(text):
+    """Parse a DKIM key record; an empty p= tag means the key has been revoked."""
+    tags = parse_tag_list(text)
+    return {
+        "valid": "p" in tags and (tags.get("v", "DKIM1").upper() == "DKIM1"),
+        "revoked": "p" in tags and tags.get("p") == "",
+        "keyType": tags.get("k", "rsa").lower(),
+    }
+
+
+RECORD_PARSERS = {"SPF": parse_spf, "DMARC": parse_dmarc, "DKIM": parse_dkim}
+
+
+def parse_record(kind, text):
+    """LRU-cached parse of a record's text; returns a copy so callers may keep or change it."""
+    key = (kind, text)
+    cached = RECORD_CACHE.pop(key, None)
+    if cached is None:
+        cached = RECORD_PARSERS[kind](text)
+        if len(RECORD_CACHE) >= RECORD_CACHE_LIMIT:
+            del RECORD_CACHE[next(iter(RECORD_CACHE))]
+    RECORD_CACHE[key] = cached
+    return {name: list(value) if isinstance(value, list) else value for name, value in cached.items()}
+
+
+def record_configured(kind, parsed):
+    """Verdict for a parsed record: DMARC must enforce (p != none), DKIM must not be revoked, SPF must be valid."""
+    if kind == "DMARC":
+        return parsed["valid"] and parsed["policy"] != "none"
+    if kind == "DKIM":
+        return parsed["valid"] and not parsed["revoked"]
+    return parsed["valid"]
+
+
+def looks_like_record(kind, text):
+    lowered = text.lower()
+    if kind == "SPF":
+        return lowered.startswith("v=spf1")
+    if kind == "DMARC":
+        return "v=dmarc1" in lowered
+    return lowered.startswith("v=dkim1") or ("p=" in lowered and ";" in lowered)
+
+
+def record_present(value):
+    """True if a non-record value (flag, probe result) indicates the record exists."""
+    if value is None:
+        return False
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        stripped = value.strip()
+        if stripped.lower() in ("false", "none", "null", "", "no", "0", "not found", "n/a", "no banner found"):
+            return False
+        return len(stripped) > 0
+    return bool(value)
+
+
+def record_status(kind, value):
+    """
+    Return (configured, parsed) for one protocol value. Record text is parsed and
+    judged by record_configured; any other value counts by presence (parsed None).
+    """
+    if isinstance(value, str) and looks_like_record(kind, value.strip().strip('"').strip()):
+        parsed = parse_record(kind, value.strip().strip('"').strip())
+        return record_configured(kind, parsed), parsed
+    return record_present(value), None
+
+
 def transform(input):
     """
     Evaluates if DMARC, DKIM and SPF records are set up properly.
@@ -46,32 +187,42 @@ def transform(input):
         if 'result' in input:
             input = parse_input(input['result'])
 
+        records = {}
+
         # Check for DMARC configuration
         dmarc_data = input.get('DMARC', input.get('dmarc', None))
-        if dmarc_data:
-            is_dmarc_configured = True
+        if isinstance(dmarc_data, dict):
+            is_dmarc_configured = bool(dmarc_data)
             # Check for policy enforcement level
-            if isinstance(dmarc_data, dict):
-                policy = dmarc_data.get('policy', dmarc_data.get('p', ''))
-                if policy.lower() in ['none', '']:
-                    is_dmarc_configured = False  # DMARC exists but not enforcing
-        
+            policy = dmarc_data.get('policy', dmarc_data.get('p', ''))
+            if policy.lower() in ['none', '']:
+                is_dmarc_configured = False  # DMARC exists but not enforcing
+        else:
+            # Record text is parsed, so "p=none" (not enforcing) is caught here too
+            is_dmarc_configured, parsed = record_status("DMARC", dmarc_data)
+            if parsed:
+                records["DMARC"] = parsed
+
         # Check for DKIM configuration
         dkim_data = input.get('DKIM', input.get('dkim', None))
-        if dkim_data:
-            is_dkim_configured = True
-            
+        is_dkim_configured, parsed = record_status("DKIM", dkim_data)
+        if parsed:
+            records["DKIM"] = parsed
+
         # Check for SPF configuration
         spf_data = input.get('SPF', input.get('spf', None))
-        if spf_data:
-            is_spf_configured = True
-            
+        is_spf_configured, parsed = record_status("SPF", spf_data)
+        if parsed:
+            records["SPF"] = parsed
+
         dns_info = {
             "isDMARCConfigured": is_dmarc_configured,
             "isDKIMConfigured": is_dkim_configured,
             "isSPFConfigured": is_spf_configured,
             "isDNSConfigured": is_dmarc_configured and is_dkim_configured and is_spf_configured
         }
+        if records:
+            dns_info["records"] = records
         return dns_info
     except Exception as e:
         print(f"Error occurred: {str(e)}")
@@ -68,6 +68,146 @@ def create_response(result, validation=None, pass_reasons=None, fail_reasons=Non
     }
 
 
+# ============================================================================
+# DNS Records (inline for RestrictedPython compatibility)
+# ============================================================================
+
+# Parsed SPF/DMARC/DKIM records, keyed by (kind, exact record text). Tenants
+# and domains share a handful of records (e.g. a provider's SPF include), so an
+# LRU keeps repeated records from being re-parsed. Callers get a copy.
+RECORD_CACHE = {}
+RECORD_CACHE_LIMIT = 4096
+SPF_LOOKUP_MECHANISMS = ("include", "a", "mx", "ptr", "exists")
+SPF_LOOKUP_LIMIT = 10
+
+
+def parse_spf(text):
+    """Parse an SPF TXT record into mechanisms, the 'all' qualifier and DNS lookup count."""
+    terms = text.split()
+    result = {"valid": bool(terms) and terms[0].lower() == "v=spf1", "includes": [],
+              "allQualifier": None, "redirect": None, "dnsLookups": 0, "mechanismCount": 0}
+    lookups = 0
+    for term in terms[1:]:
+        lowered = term.lower()
+        if "=" in lowered and ":" not in lowered.split("=", 1)[0]:
+            name, value = lowered.split("=", 1)
+            if name == "redirect":
+                result["redirect"] = value
+                lookups = lookups + 1
+            continue
+        qualifier = "+"
+        if lowered[:1] in ("+", "-", "~", "?"):
+            qualifier = lowered[0]
+            lowered = lowered[1:]
+        name = lowered.split(":", 1)[0].split("/", 1)[0]
+        result["mechanismCount"] = result["mechanismCount"] + 1
+        if name == "all":
+            result["allQualifier"] = qualifier
+        elif name in SPF_LOOKUP_MECHANISMS:
+            lookups = lookups + 1
+            if name == "include" and ":" in lowered:
+                result["includes"].append(lowered.split(":", 1)[1])
+    result["dnsLookups"] = lookups
+    result["exceedsLookupLimit"] = lookups > SPF_LOOKUP_LIMIT
+    return result
+
+
+def parse_tag_list(text):
+    """Parse a 'k=v; k=v' tag list (DMARC/DKIM) into a dict with lower-cased tag names."""
+    tags = {}
+    for part in text.split(";"):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            tags[name.strip().lower()] = value.strip()
+    return tags
+
+
+def parse_dmarc(text):
+    """Parse a DMARC TXT record into its policy, subdomain policy, pct and reporting tags."""
+    tags = parse_tag_list(text)
+    policy = tags.get("p", "").lower()
+    try:
+        pct = int(tags.get("pct", "100"))
+    except ValueError:
+        pct = 100
+    return {
+        "valid": tags.get("v", "").upper() == "DMARC1" and policy in ("none", "quarantine", "reject"),
+        "policy": policy or "none",
+        "subdomainPolicy": tags.get("sp", "").lower() or policy or "none",
+        "pct": pct,
+        "hasAggregateReporting": bool(tags.get("rua")),
+        "enforced": policy in ("quarantine", "reject") and pct > 0,
+    }
+
+
+def parse_dkim(text):
+    """Parse a DKIM key record; an empty p= tag means the key has been revoked."""
+    tags = parse_tag_list(text)
+    return {
+        "valid": "p" in tags and (tags.get("v", "DKIM1").upper() == "DKIM1"),
+        "revoked": "p" in tags and tags.get("p") == "",
+        "keyType": tags.get("k", "rsa").lower(),
+    }
+
+
+RECORD_PARSERS = {"SPF": parse_spf, "DMARC": parse_dmarc, "DKIM": parse_dkim}
+
+
+def parse_record(kind, text):
+    """LRU-cached parse of a record's text; returns a copy so callers may keep or change it."""
+    key = (kind, text)
+    cached = RECORD_CACHE.pop(key, None)
+    if cached is None:
+        cached = RECORD_PARSERS[kind](text)
+        if len(RECORD_CACHE) >= RECORD_CACHE_LIMIT:
+            del RECORD_CACHE[next(iter(RECORD_CACHE))]
+    RECORD_CACHE[key] = cached
+    return {name: list(value) if isinstance(value, list) else value for name, value in cached.items()}
+
+
+def record_configured(kind, parsed):
+    """Verdict for a parsed record: DMARC must enforce (p != none), DKIM must not be revoked, SPF must be valid."""
+    if kind == "DMARC":
+        return parsed["valid"] and parsed["policy"] != "none"
+    if kind == "DKIM":
+        return parsed["valid"] and not parsed["revoked"]
+    return parsed["valid"]
+
+
+def looks_like_record(kind, text):
+    lowered = text.lower()
+    if kind == "SPF":
+        return lowered.startswith("v=spf1")
+    if kind == "DMARC":
+        return "v=dmarc1" in lowered
+    return lowered.startswith("v=dkim1") or ("p=" in lowered and ";" in lowered)
+
+
+def record_present(value):
+    """True if a non-record value (flag, probe result) indicates the record exists."""
+    if value is None:
+        return False
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        stripped = value.strip()
+        if stripped.lower() in ("false", "none", "null", "", "no", "0", "not found", "n/a", "no banner found"):
+            return False
+        return len(stripped) > 0
+    return bool(value)
+
+
+def record_status(kind, value):
+    """
+    Return (configured, parsed) for one protocol value. Record text is parsed and
+    judged by record_configured; any other value counts by presence (parsed None).
+    """
+    if isinstance(value, str) and looks_like_record(kind, value.strip().strip('"').strip()):
+        parsed = parse_record(kind, value.strip().strip('"').strip())
+        return record_configured(kind, parsed), parsed
+    return record_present(value), None
+
+
 def transform(input):
     criteriaKey = "isDNSConfigured"
 
@@ -127,11 +267,11 @@ def transform(input):
             # Direct boolean fields
             if not dns_configured:
                 if 'spf' in data:
-                    spf_configured = bool(data['spf'])
+                    spf_configured = record_status("SPF", data['spf'])[0]
                 if 'dkim' in data:
-                    dkim_configured = bool(data['dkim'])
+                    dkim_configured = record_status("DKIM", data['dkim'])[0]
                 if 'dmarc' in data:
-                    dmarc_configured = bool(data['dmarc'])
+                    dmarc_configured = record_status("DMARC", data['dmarc'])[0]
                 dns_configured = spf_configured or dkim_configured or dmarc_configured
 
             # Check DNS records list (from Cloudflare zones DNS endpoint)
@@ -142,14 +282,15 @@ def transform(input):
                         if not isinstance(record, dict):
                             continue
                         rtype = record.get('type', '').upper()
-                        content = record.get('content', '').lower()
+                        content = str(record.get('content', '') or '')
+                        lowered = content.lower()
                         if rtype == 'TXT':
-                            if 'v=spf1' in content:
-                                spf_configured = True
-                            elif 'v=dkim1' in content:
-                                dkim_configured = True
-                            elif 'v=dmarc1' in content:
-                                dmarc_configured = True
+                            if 'v=spf1' in lowered:
+                                spf_configured = spf_configured or record_status("SPF", content)[0]
+                            elif 'v=dkim1' in lowered:
+                                dkim_configured = dkim_configured or record_status("DKIM", content)[0]
+                            elif 'v=dmarc1' in lowered:
+                                dmarc_configured = dmarc_configured or record_status("DMARC", content)[0]
                         elif rtype == 'CNAME' and 'dkim' in record.get('name', '').lower():
                             dkim_configured = True
                     dns_configured = spf_configured or dkim_configured or dmarc_configured
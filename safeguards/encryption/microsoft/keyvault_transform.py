@@ -0,0 +1,238 @@
+# keyvault_transform.py
+# Azure Key Vault - subscription-level evaluation of all Key Vault checks
+
+import json
+import ast
+
+
+# Vault-level checks, in the order they are reported
+VAULT_CHECKS = [
+    "isSoftDeleteEnabled",
+    "isPurgeProtectionEnabled",
+    "isRbacAuthorizationEnabled",
+    "isFirewallEnabled",
+    "isPublicNetworkAccessDisabled",
+    "isVNetIntegrationEnabled",
+    "isAzureADAuthEnabled",
+    "isDataAtRestEncrypted",
+    "isDataInTransitEncrypted",
+    "isManagedIdentityUsed",
+    "isPrivateLinkEnabled",
+    "isDiagnosticLoggingEnabled",
+    "isAzurePolicyCompliant",
+    "isDefenderForKeyVaultEnabled",
+    "keysHaveExpirationDate",
+    "certificatesHaveValidityPeriod",
+]
+MAX_VALIDITY_DAYS = 397  # CA/Browser Forum baseline requirement
+SECONDS_PER_DAY = 86400
+
+
+def transform(input):
+    """
+    Evaluates every Key Vault check for all vaults in a subscription in one pass.
+
+    The per-vault transforms in this directory each parse one vault payload.
+    This transform accepts the whole subscription once, evaluates all 16
+    checks per vault from the same parsed objects, and rolls them up.
+
+    API Endpoints (bundled):
+        vaults:                     GET https://management.azure.com/subscriptions/{subscriptionId}/providers/Microsoft.KeyVault/vaults?api-version=2023-07-01
+        keys:                       {vaultName: GET https://{vaultName}.vault.azure.net/keys?api-version=7.4}
+        certificates:               {vaultName: GET https://{vaultName}.vault.azure.net/certificates?api-version=7.4}
+        diagnosticSettings:         {vaultName: GET {resourceId}/providers/Microsoft.Insights/diagnosticSettings}
+        privateEndpointConnections: {vaultName: GET {resourceId}/privateEndpointConnections}
+        policyStates:               {vaultName: POST {resourceId}/providers/Microsoft.PolicyInsights/policyStates/latest/queryResults}
+        defenderPricing:            GET .../providers/Microsoft.Security/pricings/KeyVaults
+
+    Per-vault listings may be keyed by vault name or resource id (case-insensitive).
+    The vault list may be a single ARM list response, a list of vaults, or a list
+    of nextLink pages.
+
+    Transformation Logic:
+        Each vault is evaluated with the same rules as the matching per-vault transform.
+        A rolled-up check is True only when every vault passes it (and at least one vault exists).
+
+    Returns: {<check>: bool, ..., "vaultCount": int, "checkSummary": {...}, "vaults": {vaultName: {...}}}
+    """
+    try:
+        def parse_input(input):
+            if isinstance(input, str):
+                try:
+                    parsed = ast.literal_eval(input)
+                    if isinstance(parsed, dict):
+                        return parsed
+                except:
+                    pass
+                try:
+                    input = input.replace("'", '"')
+                    return json.loads(input)
+                except:
+                    raise ValueError("Input string is neither valid Python literal nor JSON")
+            if isinstance(input, bytes):
+                return json.loads(input.decode("utf-8"))
+            if isinstance(input, dict):
+                return input
+            raise ValueError("Input must be JSON string, bytes, or dict")
+
+        def list_value(payload):
+            """Flatten an ARM list response, a bare list, or a list of nextLink pages."""
+            if isinstance(payload, dict):
+                value = payload.get("value", [])
+                return value if isinstance(value, list) else []
+            if isinstance(payload, list):
+                items = []
+                for item in payload:
+                    if isinstance(item, dict) and isinstance(item.get("value"), list) and "id" not in item:
+                        items.extend(item["value"])
+                    elif isinstance(item, dict):
+                        items.append(item)
+                return items
+            return []
+
+        def index_by_vault(payload):
+            """Lower-case vault name/resource id -> listing, built once per bundle."""
+            index = {}
+            if isinstance(payload, dict):
+                for key, value in payload.items():
+                    index[str(key).lower()] = value
+            return index
+
+        def vault_listing(index, vault):
+            name = str(vault.get("name", "")).lower()
+            vault_id = str(vault.get("id", "")).lower()
+            listing = index.get(name)
+            if listing is None:
+                listing = index.get(vault_id)
+            return listing
+
+        def check_vault(vault, listings, defender_enabled):
+            properties = vault.get("properties", {}) or {}
+            network_acls = properties.get("networkAcls", {}) or {}
+            default_action = network_acls.get("defaultAction", "Allow")
+            rbac_enabled = properties.get("enableRbacAuthorization", False)
+            public_access = properties.get("publicNetworkAccess", "")
+            results = {}
+
+            results["isSoftDeleteEnabled"] = properties.get("enableSoftDelete", True) is True
+            results["isPurgeProtectionEnabled"] = properties.get("enablePurgeProtection", False) is True
+            results["isRbacAuthorizationEnabled"] = rbac_enabled is True
+            results["isFirewallEnabled"] = default_action == "Deny"
+            results["isPublicNetworkAccessDisabled"] = (
+                (isinstance(public_access, str) and public_access.lower() == "disabled")
+                or (default_action == "Deny" and len(network_acls.get("ipRules", [])) == 0)
+            )
+            results["isVNetIntegrationEnabled"] = len(network_acls.get("virtualNetworkRules", [])) > 0
+            results["isAzureADAuthEnabled"] = bool(properties.get("tenantId", ""))
+            results["isDataAtRestEncrypted"] = bool(vault.get("id", ""))
+            results["isDataInTransitEncrypted"] = str(properties.get("vaultUri", "")).startswith("https://")
+
+            if rbac_enabled:
+                # For RBAC vaults, principals are assumed configured
+                results["isManagedIdentityUsed"] = True
+            else:
+                results["isManagedIdentityUsed"] = len(properties.get("accessPolicies", [])) > 0
+
+            connections = list_value(vault_listing(listings["privateEndpointConnections"], vault))
+            if not connections:
+                connections = properties.get("privateEndpointConnections", []) or []
+            results["isPrivateLinkEnabled"] = any(
+                ((conn.get("properties", {}) or {}).get("privateLinkServiceConnectionState", {}) or {}).get("status") == "Approved"
+                for conn in connections if isinstance(conn, dict)
+            )
+
+            diagnostic_logging = False
+            for setting in list_value(vault_listing(listings["diagnosticSettings"], vault)):
+                setting_props = setting.get("properties", {}) or {}
+                has_enabled_log = any(log.get("enabled", False) for log in setting_props.get("logs", []))
+                has_destination = (
+                    setting_props.get("workspaceId") or
+                    setting_props.get("storageAccountId") or
+                    setting_props.get("eventHubAuthorizationRuleId") or
+                    setting_props.get("eventHubName")
+                )
+                if has_enabled_log and has_destination:
+                    diagnostic_logging = True
+                    break
+            results["isDiagnosticLoggingEnabled"] = diagnostic_logging
+
+            policy_states = vault_listing(listings["policyStates"], vault)
+            odata_count = policy_states.get("@odata.count") if isinstance(policy_states, dict) else None
+            if odata_count is not None and odata_count > 0:
+                results["isAzurePolicyCompliant"] = False
+            else:
+                results["isAzurePolicyCompliant"] = len(list_value(policy_states)) == 0
+
+            results["isDefenderForKeyVaultEnabled"] = defender_enabled
+
+            keys_ok = True
+            for key in list_value(vault_listing(listings["keys"], vault)):
+                if (key.get("attributes", {}) or {}).get("exp") is None:
+                    keys_ok = False
+                    break
+            results["keysHaveExpirationDate"] = keys_ok
+
+            certificates_ok = True
+            for cert in list_value(vault_listing(listings["certificates"], vault)):
+                attributes = cert.get("attributes", {}) or {}
+                nbf = attributes.get("nbf")
+                exp = attributes.get("exp")
+                if nbf is None or exp is None or (exp - nbf) / SECONDS_PER_DAY > MAX_VALIDITY_DAYS:
+                    certificates_ok = False
+                    break
+            results["certificatesHaveValidityPeriod"] = certificates_ok
+
+            return results
+
+        data = parse_input(input)
+        data = data.get("response", data)
+        data = data.get("result", data)
+        data = data.get("apiResponse", data)
+        data = data.get("data", data)
+
+        vaults = list_value(data.get("vaults", data))
+        listings = {
+            "keys": index_by_vault(data.get("keys")),
+            "certificates": index_by_vault(data.get("certificates")),
+            "diagnosticSettings": index_by_vault(data.get("diagnosticSettings")),
+            "privateEndpointConnections": index_by_vault(data.get("privateEndpointConnections")),
+            "policyStates": index_by_vault(data.get("policyStates")),
+        }
+        defender = data.get("defenderPricing", {}) or {}
+        defender_enabled = (defender.get("properties", {}) or {}).get("pricingTier", "Free") == "Standard"
+
+        per_vault = {}
+        passing = {}
+        for check in VAULT_CHECKS:
+            passing[check] = 0
+        for vault in vaults:
+            if not isinstance(vault, dict):
+                continue
+            results = check_vault(vault, listings, defender_enabled)
+            per_vault[vault.get("name") or vault.get("id", "")] = results
+            for check in VAULT_CHECKS:
+                if results[check]:
+                    passing[check] = passing[check] + 1
+
+        vault_count = len(per_vault)
+        rolled_up = {}
+        check_summary = {}
+        for check in VAULT_CHECKS:
+            rolled_up[check] = vault_count > 0 and passing[check] == vault_count
+            check_summary[check] = {
+                "passingVaults": passing[check],
+                "failingVaults": vault_count - passing[check],
+                "passPercentage": round(passing[check] / vault_count * 100, 1) if vault_count > 0 else 0.0
+            }
+
+        return {
+            **rolled_up,
+            "vaultCount": vault_count,
+            "checkSummary": check_summary,
+            "vaults": per_vault
+        }
+
+    except json.JSONDecodeError:
+        return {"vaultCount": 0, "error": "Invalid JSON"}
+    except Exception as e:
+        return {"vaultCount": 0, "error": str(e)}
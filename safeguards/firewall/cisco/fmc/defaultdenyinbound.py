@@ -2,6 +2,11 @@
 Transformation: defaultDenyInbound
 Vendor: Cisco FMC  |  Category: Firewall
 Evaluates: Whether access policy default action is set to BLOCK (deny inbound by default)
+
+When access rules are merged in (accessRules[], from .../accessrules?expanded=true), enabled
+rules are indexed as a rule table: an ALLOW/TRUST rule matching all traffic ahead of the
+default action defeats default deny, and rules fully covered by earlier rules are reported
+as shadowed.
 """
 import json
 from datetime import datetime
@@ -42,7 +47,428 @@ def create_response(result, validation=None, pass_reasons=None, fail_reasons=Non
     }
 
 
-def evaluate(data):
+# ============================================================================
+# Rule Table (inline for RestrictedPython compatibility)
+# ============================================================================
+#
+# Rules are normalized into boxes: one (src, srcPorts, dst, dstPorts, protocol)
+# combination of integer intervals per box, numbered in evaluation order. Each
+# dimension keeps its interval boundaries sorted, with a bitset (int) of boxes
+# covering every elementary segment, so "which boxes contain this point" is a
+# binary search and "which boxes contain this interval" is two of them ANDed.
+# Bit order equals rule order, so the lowest set bit is the first matching rule.
+
+IPV4_MAX = 4294967295
+PORT_MAX = 65535
+ANY_TOKENS = ("any", "any-ipv4", "0.0.0.0/0", "*", "")
+RULE_DIMENSIONS = ("src", "srcPorts", "dst", "dstPorts")
+FULL_RANGES = {"src": (0, IPV4_MAX), "srcPorts": (0, PORT_MAX), "dst": (0, IPV4_MAX), "dstPorts": (0, PORT_MAX)}
+MAX_BOXES_PER_RULE = 256
+
+
+def parse_ipv4(text):
+    parts = text.split(".")
+    if len(parts) != 4:
+        return None
+    value = 0
+    for part in parts:
+        if not part.isdigit() or int(part) > 255:
+            return None
+        value = value * 256 + int(part)
+    return value
+
+
+def parse_address(token):
+    """Return the IPv4 (start, end) interval for an address, CIDR or range token, or None."""
+    token = token.strip().lower()
+    if token in ANY_TOKENS:
+        return FULL_RANGES["src"]
+    if "-" in token:
+        first, last = token.split("-", 1)
+        start = parse_ipv4(first.strip())
+        end = parse_ipv4(last.strip())
+        if start is None or end is None or start > end:
+            return None
+        return (start, end)
+    prefix = 32
+    if "/" in token:
+        token, bits = token.split("/", 1)
+        if not bits.isdigit() or int(bits) > 32:
+            return None
+        prefix = int(bits)
+    address = parse_ipv4(token)
+    if address is None:
+        return None
+    size = 2 ** (32 - prefix)
+    start = address - address % size
+    return (start, start + size - 1)
+
+
+def parse_port(token):
+    """Return the (start, end) interval for a port or port range token, or None."""
+    token = token.strip().lower()
+    if token in ANY_TOKENS:
+        return FULL_RANGES["dstPorts"]
+    first, last = token, token
+    if "-" in token:
+        first, last = token.split("-", 1)
+    first = first.strip()
+    last = last.strip()
+    if not first.isdigit() or not last.isdigit() or int(first) > int(last) or int(last) > PORT_MAX:
+        return None
+    return (int(first), int(last))
+
+
+def parse_intervals(tokens, parser):
+    """Parse and merge tokens into sorted intervals; None if any token is unresolvable (named objects, FQDNs, IPv6)."""
+    intervals = []
+    for token in tokens:
+        interval = parser(str(token))
+        if interval is None:
+            return None
+        intervals.append(interval)
+    if not intervals:
+        return None
+    intervals = sorted(intervals)
+    merged = [intervals[0]]
+    for start, end in intervals[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def build_segment_index(intervals):
+    """Sorted boundaries plus, per elementary segment, the bitset of intervals covering it."""
+    starts = {}
+    ends = {}
+    for bit, (start, end) in enumerate(intervals):
+        starts[start] = starts.get(start, 0) | (1 << bit)
+        ends[end + 1] = ends.get(end + 1, 0) | (1 << bit)
+    boundaries = sorted(set(starts) | set(ends))
+    segments = []
+    active = 0
+    for boundary in boundaries:
+        active = (active & ~ends.get(boundary, 0)) | starts.get(boundary, 0)
+        segments.append(active)
+    return {"boundaries": boundaries, "segments": segments}
+
+
+def boxes_at(index, point):
+    """Bitset of boxes whose interval contains point (binary search over boundaries)."""
+    boundaries = index["boundaries"]
+    low = 0
+    high = len(boundaries)
+    while low < high:
+        middle = (low + high) // 2
+        if boundaries[middle] <= point:
+            low = middle + 1
+        else:
+            high = middle
+    return index["segments"][low - 1] if low > 0 else 0
+
+
+def set_bits(bits):
+    """Positions of the set bits, lowest first."""
+    positions = []
+    while bits:
+        lowest = bits & -bits
+        positions.append(lowest.bit_length() - 1)
+        bits = bits ^ lowest
+    return positions
+
+
+def build_rule_table(rules):
+    """
+    Index normalized rules. Each rule is a dict with "action" ("allow"/"deny"),
+    "src", "srcPorts", "dst" (interval lists, None when unresolvable) and
+    "services" ([(protocol, dstPort intervals)], None when unresolvable). A rule
+    flagged "restricted" (zones, applications, users, ...) matches less than its
+    boxes, so it can be found shadowed but never shadows or catches all traffic.
+    """
+    boxes = []
+    first_box = []
+    indexed = []
+    for position, rule in enumerate(rules):
+        first_box.append(len(boxes))
+        services = rule.get("services")
+        if rule.get("src") is None or rule.get("srcPorts") is None or rule.get("dst") is None or services is None:
+            indexed.append(False)
+            continue
+        count = len(rule["src"]) * len(rule["srcPorts"]) * len(rule["dst"])
+        count = count * sum(len(ports) for _, ports in services)
+        if count > MAX_BOXES_PER_RULE:
+            indexed.append(False)
+            continue
+        indexed.append(True)
+        for src in rule["src"]:
+            for src_ports in rule["srcPorts"]:
+                for dst in rule["dst"]:
+                    for protocol, dst_port_list in services:
+                        for dst_ports in dst_port_list:
+                            boxes.append({"rule": position, "src": src, "srcPorts": src_ports, "dst": dst,
+                                          "dstPorts": dst_ports, "protocol": protocol})
+    first_box.append(len(boxes))
+
+    indexes = {}
+    for dimension in RULE_DIMENSIONS:
+        indexes[dimension] = build_segment_index([box[dimension] for box in boxes])
+    protocols = {"any": 0}
+    for bit, box in enumerate(boxes):
+        if rules[box["rule"]].get("restricted"):
+            continue
+        protocols[box["protocol"]] = protocols.get(box["protocol"], 0) | (1 << bit)
+    return {"rules": rules, "boxes": boxes, "firstBox": first_box, "indexed": indexed,
+            "indexes": indexes, "protocols": protocols}
+
+
+def covering_boxes(table, box):
+    """Bitset of boxes that contain box in every dimension."""
+    bits = table["protocols"]["any"]
+    if box["protocol"] != "any":
+        bits = bits | table["protocols"].get(box["protocol"], 0)
+    for dimension in RULE_DIMENSIONS:
+        start, end = box[dimension]
+        index = table["indexes"][dimension]
+        bits = bits & boxes_at(index, start) & boxes_at(index, end)
+        if not bits:
+            return 0
+    return bits
+
+
+def catch_all_rules(table):
+    """Positions, in order, of rules matching all traffic (any protocol, address and port)."""
+    full = dict(FULL_RANGES)
+    full["protocol"] = "any"
+    positions = []
+    for bit in set_bits(covering_boxes(table, full)):
+        position = table["boxes"][bit]["rule"]
+        if not positions or positions[-1] != position:
+            positions.append(position)
+    return positions
+
+
+def shadowed_rules(table):
+    """[(position, shadowing position)] for rules whose every box is contained in some earlier rule's box."""
+    shadowed = []
+    first_box = table["firstBox"]
+    for position in range(len(table["rules"])):
+        if not table["indexed"][position] or first_box[position] == first_box[position + 1]:
+            continue
+        earlier = (1 << first_box[position]) - 1
+        shadowing = None
+        for bit in range(first_box[position], first_box[position + 1]):
+            covered = covering_boxes(table, table["boxes"][bit]) & earlier
+            if not covered:
+                shadowing = None
+                break
+            if shadowing is None:
+                shadowing = table["boxes"][(covered & -covered).bit_length() - 1]["rule"]
+        if shadowing is not None:
+            shadowed.append((position, shadowing))
+    return shadowed
+
+
+MAX_REPORTED_RULES = 20
+FMC_PROTOCOLS = {"6": "tcp", "17": "udp", "1": "icmp", "58": "ipv6-icmp"}
+ALLOW_ACTIONS = ("ALLOW", "TRUST")
+RESTRICTING_FIELDS = ("sourceZones", "destinationZones", "applications", "urls", "users",
+                      "vlanTags", "sourceSecurityGroupTags", "destinationSecurityGroupTags")
+
+
+def rule_policy(rule):
+    """Id (or name) of the access policy a rule belongs to, from its FMC metadata."""
+    metadata = rule.get("metadata") if isinstance(rule.get("metadata"), dict) else {}
+    policy = metadata.get("accessPolicy") if isinstance(metadata.get("accessPolicy"), dict) else {}
+    return policy.get("id") or policy.get("name")
+
+
+def extract_access_rules(data):
+    """
+    Extract access rules from workflow output, grouped by access policy.
+
+    accessRules may be {policyId: rules-page-or-list} or a list of per-policy
+    pages ({"items": [...]}), rule lists or rules. A rule's policy comes from
+    its metadata.accessPolicy; otherwise each page/list is its own policy.
+    Returns [(policy, [rules])] in input order.
+    """
+    if not isinstance(data, dict):
+        return []
+    raw = data.get("accessRules", [])
+    if isinstance(raw, dict):
+        entries = list(raw.items())
+    elif isinstance(raw, list):
+        entries = [("accessRules[" + str(position) + "]", entry) for position, entry in enumerate(raw)]
+    else:
+        return []
+    groups = {}
+    for fallback, entry in entries:
+        if isinstance(entry, dict) and "items" in entry:
+            rules = entry["items"] if isinstance(entry["items"], list) else []
+        elif isinstance(entry, list):
+            rules = entry
+        elif isinstance(entry, dict):
+            rules = [entry]
+            fallback = "accessRules"
+        else:
+            continue
+        for rule in rules:
+            if not isinstance(rule, dict):
+                continue
+            policy = str(rule_policy(rule) or fallback)
+            if policy not in groups:
+                groups[policy] = []
+            groups[policy].append(rule)
+    return list(groups.items())
+
+
+def condition_entries(condition):
+    """Objects and literals of an FMC rule condition; [] when the condition is absent (any)."""
+    if not isinstance(condition, dict):
+        return []
+    entries = []
+    for key in ("literals", "objects"):
+        if isinstance(condition.get(key), list):
+            entries.extend(item for item in condition[key] if isinstance(item, dict))
+    return entries
+
+
+def network_intervals(condition):
+    entries = condition_entries(condition)
+    if not entries:
+        return [FULL_RANGES["src"]]
+    return parse_intervals([entry.get("value", entry.get("name", "")) for entry in entries], parse_address)
+
+
+def entry_protocol(entry):
+    protocol = str(entry.get("protocol", "")).lower()
+    protocol = FMC_PROTOCOLS.get(protocol, protocol)
+    if not protocol and entry.get("type") == "ICMPV4Object":
+        protocol = "icmp"
+    return protocol
+
+
+def port_token(entry):
+    """
+    Port token of a port entry. A literal without a port covers every port of its
+    protocol; a named object without a literal port is unresolvable (None).
+    """
+    if "port" in entry:
+        return entry["port"]
+    if str(entry.get("type", "")).endswith("Literal"):
+        return "any"
+    return None
+
+
+def source_ports(condition):
+    """
+    (protocol, port intervals) for sourcePorts: protocol "any" when the condition is
+    absent. None when an entry is unresolvable or entries mix protocols, since one
+    source-port range per rule cannot express per-protocol ranges.
+    """
+    entries = condition_entries(condition)
+    if not entries:
+        return ("any", [FULL_RANGES["srcPorts"]])
+    protocols = set()
+    tokens = []
+    for entry in entries:
+        protocol = entry_protocol(entry)
+        token = port_token(entry)
+        if not protocol or token is None:
+            return None
+        protocols.add(protocol)
+        tokens.append(token)
+    intervals = parse_intervals(tokens, parse_port)
+    if len(protocols) > 1 or intervals is None:
+        return None
+    return (protocols.pop(), intervals)
+
+
+def service_list(condition):
+    """[(protocol, port intervals)] for destinationPorts; None when an entry is unresolvable."""
+    entries = condition_entries(condition)
+    if not entries:
+        return [("any", [FULL_RANGES["dstPorts"]])]
+    services = []
+    for entry in entries:
+        protocol = entry_protocol(entry)
+        token = port_token(entry)
+        if not protocol or token is None:
+            return None
+        ports = parse_intervals([token], parse_port)
+        if ports is None:
+            return None
+        services.append((protocol, ports))
+    return services
+
+
+def restrict_services(services, protocol):
+    """Limit services to the source-port protocol: "any" takes it on, other protocols drop out."""
+    if services is None or protocol == "any":
+        return services
+    restricted = []
+    for service_protocol, ports in services:
+        if service_protocol == "any":
+            restricted.append((protocol, ports))
+        elif service_protocol == protocol:
+            restricted.append((service_protocol, ports))
+    return restricted or None
+
+
+def normalize_access_rule(rule):
+    """FMC access rule -> rule table form. Named objects without a value leave the rule unindexed."""
+    restricted = False
+    for field in RESTRICTING_FIELDS:
+        if condition_entries(rule.get(field)):
+            restricted = True
+    src_ports = source_ports(rule.get("sourcePorts"))
+    services = service_list(rule.get("destinationPorts"))
+    if src_ports is not None:
+        services = restrict_services(services, src_ports[0])
+    return {
+        "action": "allow" if str(rule.get("action", "")).upper() in ALLOW_ACTIONS else "deny",
+        "src": network_intervals(rule.get("sourceNetworks")),
+        "srcPorts": src_ports[1] if src_ports is not None else None,
+        "dst": network_intervals(rule.get("destinationNetworks")),
+        "services": services,
+        "restricted": restricted,
+    }
+
+
+def evaluate_access_rules(access_rules):
+    """Index enabled, terminal access rules and report any-any allow and shadowed rules."""
+    rules = []
+    for rule in access_rules:
+        if not isinstance(rule, dict) or rule.get("enabled") is False:
+            continue
+        if str(rule.get("action", "")).upper() == "MONITOR":
+            continue
+        rules.append(rule)
+    table = build_rule_table([normalize_access_rule(rule) for rule in rules])
+    any_any_allow = []
+    for position in catch_all_rules(table):
+        if table["rules"][position]["action"] == "deny":
+            break
+        any_any_allow.append(rules[position].get("name", "Unknown"))
+    shadowed = shadowed_rules(table)
+    result = {
+        "accessRulesEvaluated": len(rules),
+        "shadowedRuleCount": len(shadowed),
+        "unindexedRuleCount": len([flag for flag in table["indexed"] if not flag])
+    }
+    if any_any_allow:
+        result["anyAnyAllowRules"] = any_any_allow[:MAX_REPORTED_RULES]
+    if shadowed:
+        result["shadowedRules"] = [
+            str(rules[position].get("name", "Unknown")) + " shadowed by " + str(rules[by].get("name", "Unknown"))
+            for position, by in shadowed[:MAX_REPORTED_RULES]
+        ]
+    return result
+
+
+def evaluate_default_actions(data):
     """Check that all access policy default actions are set to BLOCK."""
     try:
         policies = data.get('items', [])
@@ -102,6 +528,41 @@ def evaluate(data):
         return {"defaultDenyInbound": False, "error": str(e)}
 
 
+def evaluate_policy_rules(groups):
+    """Evaluate each access policy's rules in its own table and combine the per-policy reports."""
+    combined = {"accessPoliciesEvaluated": len(groups), "accessRulesEvaluated": 0,
+                "shadowedRuleCount": 0, "unindexedRuleCount": 0}
+    any_any_allow = []
+    shadowed = []
+    for policy, rules in groups:
+        rule_result = evaluate_access_rules(rules)
+        for key in ("accessRulesEvaluated", "shadowedRuleCount", "unindexedRuleCount"):
+            combined[key] = combined[key] + rule_result[key]
+        prefix = policy + ": " if len(groups) > 1 else ""
+        any_any_allow.extend(prefix + str(name) for name in rule_result.get("anyAnyAllowRules", []))
+        shadowed.extend(prefix + entry for entry in rule_result.get("shadowedRules", []))
+    if any_any_allow:
+        combined["anyAnyAllowRules"] = any_any_allow[:MAX_REPORTED_RULES]
+    if shadowed:
+        combined["shadowedRules"] = shadowed[:MAX_REPORTED_RULES]
+    return combined
+
+
+def evaluate(data):
+    """Default actions must be BLOCK, with no access rule allowing all traffic ahead of them."""
+    result = evaluate_default_actions(data)
+    groups = extract_access_rules(data)
+    if not groups or "error" in result:
+        return result
+    try:
+        rule_result = evaluate_policy_rules(groups)
+    except Exception as e:
+        return {**result, "accessRuleError": str(e)}
+    if rule_result.get("anyAnyAllowRules"):
+        result["defaultDenyInbound"] = False
+    return {**result, **rule_result}
+
+
 def transform(input):
     criteriaKey = "defaultDenyInbound"
     try:
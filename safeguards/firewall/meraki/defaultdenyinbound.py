@@ -1,7 +1,9 @@
 """
 Transformation: defaultDenyInbound
 Vendor: Cisco Meraki  |  Category: Firewall
-Evaluates: Whether the last firewall rule is a default deny-all
+Evaluates: Whether the first rule matching all traffic (any protocol, source, destination
+and port) is a deny rule, i.e. whether traffic not explicitly allowed is denied. Rules are
+indexed once so any-any allow and shadowed-rule checks stay logarithmic per rule.
 """
 import json
 from datetime import datetime
@@ -42,17 +44,298 @@ def create_response(result, validation=None, pass_reasons=None, fail_reasons=Non
     }
 
 
+# ============================================================================
+# Rule Table (inline for RestrictedPython compatibility)
+# ============================================================================
+#
+# Rules are normalized into boxes: one (src, srcPorts, dst, dstPorts, protocol)
+# combination of integer intervals per box, numbered in evaluation order. Each
+# dimension keeps its interval boundaries sorted, with a bitset (int) of boxes
+# covering every elementary segment, so "which boxes contain this point" is a
+# binary search and "which boxes contain this interval" is two of them ANDed.
+# Bit order equals rule order, so the lowest set bit is the first matching rule.
+
+IPV4_MAX = 4294967295
+PORT_MAX = 65535
+ANY_TOKENS = ("any", "any-ipv4", "0.0.0.0/0", "*", "")
+RULE_DIMENSIONS = ("src", "srcPorts", "dst", "dstPorts")
+FULL_RANGES = {"src": (0, IPV4_MAX), "srcPorts": (0, PORT_MAX), "dst": (0, IPV4_MAX), "dstPorts": (0, PORT_MAX)}
+MAX_BOXES_PER_RULE = 256
+
+
+def parse_ipv4(text):
+    parts = text.split(".")
+    if len(parts) != 4:
+        return None
+    value = 0
+    for part in parts:
+        if not part.isdigit() or int(part) > 255:
+            return None
+        value = value * 256 + int(part)
+    return value
+
+
+def parse_address(token):
+    """Return the IPv4 (start, end) interval for an address, CIDR or range token, or None."""
+    token = token.strip().lower()
+    if token in ANY_TOKENS:
+        return FULL_RANGES["src"]
+    if "-" in token:
+        first, last = token.split("-", 1)
+        start = parse_ipv4(first.strip())
+        end = parse_ipv4(last.strip())
+        if start is None or end is None or start > end:
+            return None
+        return (start, end)
+    prefix = 32
+    if "/" in token:
+        token, bits = token.split("/", 1)
+        if not bits.isdigit() or int(bits) > 32:
+            return None
+        prefix = int(bits)
+    address = parse_ipv4(token)
+    if address is None:
+        return None
+    size = 2 ** (32 - prefix)
+    start = address - address % size
+    return (start, start + size - 1)
+
+
+def parse_port(token):
+    """Return the (start, end) interval for a port or port range token, or None."""
+    token = token.strip().lower()
+    if token in ANY_TOKENS:
+        return FULL_RANGES["dstPorts"]
+    first, last = token, token
+    if "-" in token:
+        first, last = token.split("-", 1)
+    first = first.strip()
+    last = last.strip()
+    if not first.isdigit() or not last.isdigit() or int(first) > int(last) or int(last) > PORT_MAX:
+        return None
+    return (int(first), int(last))
+
+
+def parse_intervals(tokens, parser):
+    """Parse and merge tokens into sorted intervals; None if any token is unresolvable (named objects, FQDNs, IPv6)."""
+    intervals = []
+    for token in tokens:
+        interval = parser(str(token))
+        if interval is None:
+            return None
+        intervals.append(interval)
+    if not intervals:
+        return None
+    intervals = sorted(intervals)
+    merged = [intervals[0]]
+    for start, end in intervals[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def build_segment_index(intervals):
+    """Sorted boundaries plus, per elementary segment, the bitset of intervals covering it."""
+    starts = {}
+    ends = {}
+    for bit, (start, end) in enumerate(intervals):
+        starts[start] = starts.get(start, 0) | (1 << bit)
+        ends[end + 1] = ends.get(end + 1, 0) | (1 << bit)
+    boundaries = sorted(set(starts) | set(ends))
+    segments = []
+    active = 0
+    for boundary in boundaries:
+        active = (active & ~ends.get(boundary, 0)) | starts.get(boundary, 0)
+        segments.append(active)
+    return {"boundaries": boundaries, "segments": segments}
+
+
+def boxes_at(index, point):
+    """Bitset of boxes whose interval contains point (binary search over boundaries)."""
+    boundaries = index["boundaries"]
+    low = 0
+    high = len(boundaries)
+    while low < high:
+        middle = (low + high) // 2
+        if boundaries[middle] <= point:
+            low = middle + 1
+        else:
+            high = middle
+    return index["segments"][low - 1] if low > 0 else 0
+
+
+def set_bits(bits):
+    """Positions of the set bits, lowest first."""
+    positions = []
+    while bits:
+        lowest = bits & -bits
+        positions.append(lowest.bit_length() - 1)
+        bits = bits ^ lowest
+    return positions
+
+
+def build_rule_table(rules):
+    """
+    Index normalized rules. Each rule is a dict with "action" ("allow"/"deny"),
+    "src", "srcPorts", "dst" (interval lists, None when unresolvable) and
+    "services" ([(protocol, dstPort intervals)], None when unresolvable). A rule
+    flagged "restricted" (zones, applications, users, ...) matches less than its
+    boxes, so it can be found shadowed but never shadows or catches all traffic.
+    """
+    boxes = []
+    first_box = []
+    indexed = []
+    for position, rule in enumerate(rules):
+        first_box.append(len(boxes))
+        services = rule.get("services")
+        if rule.get("src") is None or rule.get("srcPorts") is None or rule.get("dst") is None or services is None:
+            indexed.append(False)
+            continue
+        count = len(rule["src"]) * len(rule["srcPorts"]) * len(rule["dst"])
+        count = count * sum(len(ports) for _, ports in services)
+        if count > MAX_BOXES_PER_RULE:
+            indexed.append(False)
+            continue
+        indexed.append(True)
+        for src in rule["src"]:
+            for src_ports in rule["srcPorts"]:
+                for dst in rule["dst"]:
+                    for protocol, dst_port_list in services:
+                        for dst_ports in dst_port_list:
+                            boxes.append({"rule": position, "src": src, "srcPorts": src_ports, "dst": dst,
+                                          "dstPorts": dst_ports, "protocol": protocol})
+    first_box.append(len(boxes))
+
+    indexes = {}
+    for dimension in RULE_DIMENSIONS:
+        indexes[dimension] = build_segment_index([box[dimension] for box in boxes])
+    protocols = {"any": 0}
+    for bit, box in enumerate(boxes):
+        if rules[box["rule"]].get("restricted"):
+            continue
+        protocols[box["protocol"]] = protocols.get(box["protocol"], 0) | (1 << bit)
+    return {"rules": rules, "boxes": boxes, "firstBox": first_box, "indexed": indexed,
+            "indexes": indexes, "protocols": protocols}
+
+
+def covering_boxes(table, box):
+    """Bitset of boxes that contain box in every dimension."""
+    bits = table["protocols"]["any"]
+    if box["protocol"] != "any":
+        bits = bits | table["protocols"].get(box["protocol"], 0)
+    for dimension in RULE_DIMENSIONS:
+        start, end = box[dimension]
+        index = table["indexes"][dimension]
+        bits = bits & boxes_at(index, start) & boxes_at(index, end)
+        if not bits:
+            return 0
+    return bits
+
+
+def catch_all_rules(table):
+    """Positions, in order, of rules matching all traffic (any protocol, address and port)."""
+    full = dict(FULL_RANGES)
+    full["protocol"] = "any"
+    positions = []
+    for bit in set_bits(covering_boxes(table, full)):
+        position = table["boxes"][bit]["rule"]
+        if not positions or positions[-1] != position:
+            positions.append(position)
+    return positions
+
+
+def shadowed_rules(table):
+    """[(position, shadowing position)] for rules whose every box is contained in some earlier rule's box."""
+    shadowed = []
+    first_box = table["firstBox"]
+    for position in range(len(table["rules"])):
+        if not table["indexed"][position] or first_box[position] == first_box[position + 1]:
+            continue
+        earlier = (1 << first_box[position]) - 1
+        shadowing = None
+        for bit in range(first_box[position], first_box[position + 1]):
+            covered = covering_boxes(table, table["boxes"][bit]) & earlier
+            if not covered:
+                shadowing = None
+                break
+            if shadowing is None:
+                shadowing = table["boxes"][(covered & -covered).bit_length() - 1]["rule"]
+        if shadowing is not None:
+            shadowed.append((position, shadowing))
+    return shadowed
+
+
+MAX_REPORTED_RULES = 20
+
+
+def split_tokens(value):
+    if isinstance(value, list):
+        return [str(item) for item in value]
+    return str(value if value is not None else "Any").split(",")
+
+
+def normalize_rule(rule):
+    """Meraki L3 rule -> rule table form. VLAN/FQDN/IPv6 tokens leave the rule unindexed."""
+    protocol = str(rule.get('protocol') or 'any').lower()
+    dst_ports = parse_intervals(split_tokens(rule.get('destPort', 'Any')), parse_port)
+    return {
+        "action": "deny" if str(rule.get('policy', '')).lower() == 'deny' else "allow",
+        "src": parse_intervals(split_tokens(rule.get('srcCidr', 'Any')), parse_address),
+        "srcPorts": parse_intervals(split_tokens(rule.get('srcPort', 'Any')), parse_port),
+        "dst": parse_intervals(split_tokens(rule.get('destCidr', 'Any')), parse_address),
+        "services": [(protocol, dst_ports)] if dst_ports is not None else None,
+    }
+
+
+def rule_label(rules, position):
+    comment = rules[position].get('comment') if isinstance(rules[position], dict) else None
+    return "#" + str(position + 1) + (" (" + str(comment) + ")" if comment else "")
+
+
 def evaluate(data):
     try:
         rules = data.get('rules', [])
         if not rules:
             return {"defaultDenyInbound": False, "error": "No rules found"}
+        rules = [rule for rule in rules if isinstance(rule, dict)]
+        table = build_rule_table([normalize_rule(rule) for rule in rules])
+        catch_all = catch_all_rules(table)
+        any_any_allow = []
+        catch_all_policy = None
+        for position in catch_all:
+            if table["rules"][position]["action"] == "deny":
+                catch_all_policy = "deny"
+                break
+            any_any_allow.append(rule_label(rules, position))
+        if catch_all_policy is None and catch_all:
+            catch_all_policy = "allow"
+        shadowed = shadowed_rules(table)
+        if any(table["rules"][position]["action"] == "deny" for position in catch_all):
+            # Meraki appends an implicit allow-any "Default rule"; behind a deny-all it is shadowed by design
+            default_position = len(rules) - 1
+            if str(rules[default_position].get('comment', '')).strip().lower() == "default rule":
+                shadowed = [(position, by) for position, by in shadowed if position != default_position]
         last_rule = rules[-1]
-        is_deny = (
-            last_rule.get('policy') == 'deny'
-            and last_rule.get('destCidr') in ['Any', 'any', '0.0.0.0/0']
-        )
-        return {"defaultDenyInbound": is_deny, "lastRulePolicy": last_rule.get('policy'), "lastRuleDest": last_rule.get('destCidr')}
+        result = {
+            "defaultDenyInbound": catch_all_policy == "deny",
+            "catchAllPolicy": catch_all_policy,
+            "lastRulePolicy": last_rule.get('policy'),
+            "lastRuleDest": last_rule.get('destCidr'),
+            "totalRules": len(rules),
+            "shadowedRuleCount": len(shadowed),
+            "unindexedRuleCount": len([flag for flag in table["indexed"] if not flag])
+        }
+        if any_any_allow:
+            result["anyAnyAllowRules"] = any_any_allow[:MAX_REPORTED_RULES]
+        if shadowed:
+            result["shadowedRules"] = [
+                rule_label(rules, position) + " shadowed by " + rule_label(rules, by)
+                for position, by in shadowed[:MAX_REPORTED_RULES]
+            ]
+        return result
     except Exception as e:
         return {"defaultDenyInbound": False, "error": str(e)}
 
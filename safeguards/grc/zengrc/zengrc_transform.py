@@ -0,0 +1,420 @@
+"""
+Transformation: zengrc_transform
+Vendor: ZenGRC  |  Category: GRC
+Evaluates: Every ZenGRC criterion from aggregates kept between runs:
+
+  areIssuesTracked, isControlMonitoringEnabled, isRiskAssessmentCurrent,
+  isAuditPlanActive, isAssessmentProcessActive, isComplianceProgramActive
+
+Each object's contribution to the counters is stored in an aggregate state keyed
+by object id together with its updated_at. An object whose id and updated_at
+match the stored state is skipped. A changed object has its old contribution
+subtracted and its new one added. The state is returned as "aggregateState"
+next to the standard envelope. The caller passes it back on the next run
+(input key "aggregateState").
+
+Source: GET /api/v2/{issues,controls,risks,audits,assessments,programs}
+    Each listing is a JSON:API {"data": [...]} response or a bare list.
+    syncMode "full" (default) treats each present listing as the complete
+    collection, so objects missing from it are dropped. syncMode "delta" treats
+    listings as only the changed objects (e.g. filtered on updated_at), with
+    removals given as {"deleted": {collection: [id, ...]}}.
+"""
+import json
+from datetime import datetime
+
+
+def extract_input(input_data):
+    if isinstance(input_data, dict) and "data" in input_data and "validation" in input_data:
+        return input_data["data"], input_data["validation"]
+    data = input_data
+    if isinstance(data, dict):
+        wrapper_keys = ["api_response", "response", "result", "apiResponse", "Output"]
+        for _ in range(3):
+            unwrapped = False
+            for key in wrapper_keys:
+                if key in data and isinstance(data.get(key), dict):
+                    data = data[key]
+                    unwrapped = True
+                    break
+            if not unwrapped:
+                break
+    return data, {"status": "unknown", "errors": [], "warnings": ["Legacy input format"]}
+
+
+def create_response(result, validation=None, pass_reasons=None, fail_reasons=None,
+                    recommendations=None, input_summary=None, transformation_errors=None,
+                    api_errors=None, additional_findings=None):
+    if validation is None:
+        validation = {"status": "unknown", "errors": [], "warnings": []}
+    return {
+        "transformedResponse": result,
+        "additionalInfo": {
+            "dataCollection": {"status": "error" if (api_errors or []) else "success", "errors": api_errors or []},
+            "validation": {"status": validation.get("status", "unknown"), "errors": validation.get("errors", []), "warnings": validation.get("warnings", [])},
+            "transformation": {"status": "error" if (transformation_errors or []) else "success", "errors": transformation_errors or [], "inputSummary": input_summary or {}},
+            "evaluation": {"passReasons": pass_reasons or [], "failReasons": fail_reasons or [], "recommendations": recommendations or [], "additionalFindings": additional_findings or []},
+            "metadata": {"evaluatedAt": datetime.utcnow().isoformat() + "Z", "schemaVersion": "1.0", "transformationId": "zengrc_transform", "vendor": "ZenGRC", "category": "GRC"}
+        }
+    }
+
+
+STATE_VERSION = 1
+UPDATED_KEYS = ("updated_at", "updatedAt", "modified_at", "modifiedAt")
+OPEN_ISSUE_STATUSES = ("open", "active", "in progress", "in_progress", "new", "assigned")
+REMEDIATED_ISSUE_STATUSES = ("closed", "resolved", "remediated", "fixed", "completed")
+ACTIVE_CONTROL_STATUSES = ("active", "effective", "implemented", "operative", "enabled", "")
+RISK_LEVELS = ("critical", "high", "medium", "low")
+ACTIVE_AUDIT_STATUSES = ("in progress", "active", "in_progress", "started", "open")
+COMPLETED_AUDIT_STATUSES = ("completed", "closed", "finished", "done")
+PLANNED_AUDIT_STATUSES = ("planned", "not started", "not_started", "draft", "scheduled")
+ACTIVE_ASSESSMENT_STATUSES = ("in progress", "active", "in_progress", "started", "open", "not started", "not_started", "draft")
+COMPLETED_ASSESSMENT_STATUSES = ("completed", "closed", "finished", "done", "submitted")
+ACTIVE_PROGRAM_STATUSES = ("active", "enabled", "in progress", "draft", "effective", "launched")
+MAX_REPORTED_LABELS = 10
+
+
+def first_of(attrs, keys, default=None):
+    for key in keys:
+        if key in attrs:
+            return attrs[key]
+    return default
+
+
+def related_owner(record, attrs, owner_keys, relationship_keys):
+    owner = first_of(attrs, owner_keys)
+    relationships = record.get("relationships", {})
+    if isinstance(relationships, dict):
+        rel_owner = first_of(relationships, relationship_keys)
+        if rel_owner:
+            owner = rel_owner
+    return owner
+
+
+# Each contribution function returns (counters, label) for one object: the
+# counters it adds to its collection, and an optional label (audit title,
+# assessment type, program name) reported as a list.
+
+def issue_contribution(record, attrs):
+    counters = {"total": 1}
+    status = str(first_of(attrs, ("status", "state", "issue_status"), "")).lower()
+    if status in OPEN_ISSUE_STATUSES:
+        counters["open"] = 1
+    elif status in REMEDIATED_ISSUE_STATUSES:
+        counters["remediated"] = 1
+    if related_owner(record, attrs, ("owner", "owners", "assigned_to", "contact"), ("owners", "contacts")):
+        counters["withOwners"] = 1
+    if first_of(attrs, ("due_on", "dueOn", "due_date", "dueDate", "end_date"), ""):
+        counters["withDueDates"] = 1
+    return counters, None
+
+
+def control_contribution(record, attrs):
+    counters = {"total": 1}
+    if str(first_of(attrs, ("status", "state"), "")).lower() in ACTIVE_CONTROL_STATUSES:
+        counters["active"] = 1
+    if (first_of(attrs, ("last_assessed_at", "lastAssessedAt", "verified_date"), "")
+            or first_of(attrs, ("frequency", "assessment_frequency", "verify_frequency"), "")):
+        counters["withAssessments"] = 1
+    relationships = record.get("relationships", {})
+    if isinstance(relationships, dict) and first_of(relationships, ("objectives", "regulations", "standards")):
+        counters["mappedToFrameworks"] = 1
+    return counters, None
+
+
+def risk_contribution(record, attrs):
+    counters = {"total": 1}
+    risk_score = first_of(attrs, ("risk_score", "riskScore", "score", "inherent_risk"))
+    risk_level = str(first_of(attrs, ("risk_level", "riskLevel", "severity", "rating"), "")).lower()
+    if risk_score is not None or risk_level:
+        counters["scored"] = 1
+    if risk_level in RISK_LEVELS:
+        counters["level:" + risk_level] = 1
+    if first_of(attrs, ("category", "risk_category", "riskCategory", "type"), ""):
+        counters["categorized"] = 1
+    if related_owner(record, attrs, ("owner", "owners", "contact", "assigned_to"), ("owners", "contacts")):
+        counters["withOwners"] = 1
+    return counters, None
+
+
+def audit_contribution(record, attrs):
+    counters = {"total": 1}
+    status = str(first_of(attrs, ("status", "state", "audit_status"), "")).lower()
+    title = first_of(attrs, ("title", "name", "slug"), "")
+    label = None
+    if status in COMPLETED_AUDIT_STATUSES:
+        counters["completed"] = 1
+    elif status in PLANNED_AUDIT_STATUSES:
+        counters["planned"] = 1
+    elif status in ACTIVE_AUDIT_STATUSES or title:
+        # Unrecognized statuses count as active when the audit has a title
+        counters["active"] = 1
+        label = str(title) if title else None
+    return counters, label
+
+
+def assessment_contribution(record, attrs):
+    counters = {"total": 1}
+    status = str(first_of(attrs, ("status", "state", "assessment_status"), "")).lower()
+    title = first_of(attrs, ("title", "name", "slug"), "")
+    if status in COMPLETED_ASSESSMENT_STATUSES:
+        counters["completed"] = 1
+    elif status in ACTIVE_ASSESSMENT_STATUSES or title:
+        # Treat unrecognized status as active
+        counters["active"] = 1
+    relationships = record.get("relationships", {})
+    if isinstance(relationships, dict) and first_of(relationships, ("assessment_questions", "questions", "criteria")):
+        counters["withCriteria"] = 1
+    assessment_type = first_of(attrs, ("assessment_type", "assessmentType", "type"), "")
+    return counters, str(assessment_type) if assessment_type else None
+
+
+def program_contribution(record, attrs):
+    counters = {"total": 1}
+    status = first_of(attrs, ("status", "state"), "")
+    title = first_of(attrs, ("title", "name", "slug"), "")
+    # If no explicit status, treat presence as active
+    is_active = str(status).lower() in ACTIVE_PROGRAM_STATUSES or (not status and bool(title))
+    label = None
+    if is_active:
+        counters["active"] = 1
+        label = str(title) if title else None
+    if related_owner(record, attrs, ("owner", "owners", "contact", "primary_contact"), ("owners", "primary_contact")):
+        counters["withOwners"] = 1
+    return counters, label
+
+
+COLLECTIONS = {
+    "issues": issue_contribution,
+    "controls": control_contribution,
+    "risks": risk_contribution,
+    "audits": audit_contribution,
+    "assessments": assessment_contribution,
+    "programs": program_contribution,
+}
+
+
+def new_aggregate():
+    return {"objects": {}, "counters": {}, "labels": {}}
+
+
+def load_state(state):
+    """Previous aggregate state, or a fresh one when missing or from another version."""
+    if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+        state = {"version": STATE_VERSION, "collections": {}}
+    for name in COLLECTIONS:
+        aggregate = state["collections"].get(name)
+        if not isinstance(aggregate, dict):
+            state["collections"][name] = new_aggregate()
+    return state
+
+
+def apply_contribution(aggregate, counters, label, sign):
+    totals = aggregate["counters"]
+    for key, value in counters.items():
+        totals[key] = totals.get(key, 0) + sign * value
+        if totals[key] == 0:
+            del totals[key]
+    if label is not None:
+        labels = aggregate["labels"]
+        labels[label] = labels.get(label, 0) + sign
+        if labels[label] == 0:
+            del labels[label]
+
+
+def remove_object(aggregate, object_id):
+    stored = aggregate["objects"].pop(object_id, None)
+    if stored is not None:
+        apply_contribution(aggregate, stored[1], stored[2], -1)
+
+
+def listing(data, name):
+    """Records of a collection, or None when the payload does not include it."""
+    records = data.get(name)
+    if isinstance(records, dict):
+        records = records.get("data", records.get("results"))
+    if not isinstance(records, list):
+        return None
+    return records
+
+
+def sync_collection(aggregate, records, contribute, full_sync, stats):
+    """Fold new or changed objects into the aggregate; objects without an id go to a one-run overlay."""
+    overlay = new_aggregate()
+    seen = {}
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        attrs = record.get("attributes", record)
+        if not isinstance(attrs, dict):
+            continue
+        object_id = record.get("id", attrs.get("id"))
+        updated_at = first_of(attrs, UPDATED_KEYS)
+        if object_id is None:
+            counters, label = contribute(record, attrs)
+            apply_contribution(overlay, counters, label, 1)
+            stats["processed"] = stats["processed"] + 1
+            continue
+        object_id = str(object_id)
+        seen[object_id] = True
+        stored = aggregate["objects"].get(object_id)
+        if stored is not None and updated_at is not None and stored[0] == str(updated_at):
+            stats["unchanged"] = stats["unchanged"] + 1
+            continue
+        if stored is not None:
+            apply_contribution(aggregate, stored[1], stored[2], -1)
+        counters, label = contribute(record, attrs)
+        aggregate["objects"][object_id] = [None if updated_at is None else str(updated_at), counters, label]
+        apply_contribution(aggregate, counters, label, 1)
+        stats["processed"] = stats["processed"] + 1
+    if full_sync:
+        for object_id in [i for i in aggregate["objects"] if i not in seen]:
+            remove_object(aggregate, object_id)
+            stats["removed"] = stats["removed"] + 1
+    return overlay
+
+
+def merged_view(aggregate, overlay):
+    counters = dict(aggregate["counters"])
+    labels = dict(aggregate["labels"])
+    for key, value in overlay["counters"].items():
+        counters[key] = counters.get(key, 0) + value
+    for key, value in overlay["labels"].items():
+        labels[key] = labels.get(key, 0) + value
+    return counters, list(labels)[:MAX_REPORTED_LABELS]
+
+
+def evaluate(data, state):
+    full_sync = str(data.get("syncMode", "full")).lower() != "delta"
+    deleted = data.get("deleted", {}) if isinstance(data.get("deleted"), dict) else {}
+    views = {}
+    sync_stats = {}
+    for name, contribute in COLLECTIONS.items():
+        aggregate = state["collections"][name]
+        stats = {"processed": 0, "unchanged": 0, "removed": 0}
+        for object_id in deleted.get(name, []) or []:
+            if str(object_id) in aggregate["objects"]:
+                remove_object(aggregate, str(object_id))
+                stats["removed"] = stats["removed"] + 1
+        records = listing(data, name)
+        overlay = new_aggregate()
+        if records is not None:
+            overlay = sync_collection(aggregate, records, contribute, full_sync, stats)
+        views[name] = merged_view(aggregate, overlay)
+        stats["cachedObjects"] = len(aggregate["objects"])
+        sync_stats[name] = stats
+
+    issues = views["issues"][0]
+    controls = views["controls"][0]
+    risks = views["risks"][0]
+    audits, audit_titles = views["audits"]
+    assessments, assessment_types = views["assessments"]
+    programs, program_names = views["programs"]
+
+    return {
+        # Even zero issues is acceptable (no findings = good posture)
+        "areIssuesTracked": issues.get("total", 0) == 0 or issues.get("withOwners", 0) > 0 or issues.get("withDueDates", 0) > 0,
+        "isControlMonitoringEnabled": controls.get("total", 0) > 0 and (controls.get("withAssessments", 0) > 0 or controls.get("active", 0) > 0),
+        "isRiskAssessmentCurrent": risks.get("total", 0) > 0 and risks.get("scored", 0) > 0,
+        "isAuditPlanActive": audits.get("active", 0) > 0 or audits.get("completed", 0) > 0 or audits.get("planned", 0) > 0,
+        "isAssessmentProcessActive": assessments.get("active", 0) > 0 or assessments.get("completed", 0) > 0,
+        "isComplianceProgramActive": programs.get("active", 0) > 0,
+        "totalIssues": issues.get("total", 0),
+        "openIssues": issues.get("open", 0),
+        "remediatedIssues": issues.get("remediated", 0),
+        "issuesWithOwners": issues.get("withOwners", 0),
+        "issuesWithDueDates": issues.get("withDueDates", 0),
+        "totalControls": controls.get("total", 0),
+        "activeControls": controls.get("active", 0),
+        "controlsWithAssessments": controls.get("withAssessments", 0),
+        "controlsMappedToFrameworks": controls.get("mappedToFrameworks", 0),
+        "totalRisks": risks.get("total", 0),
+        "scoredRisks": risks.get("scored", 0),
+        "risksWithOwners": risks.get("withOwners", 0),
+        "categorizedRisks": risks.get("categorized", 0),
+        "riskLevels": {level: risks.get("level:" + level, 0) for level in RISK_LEVELS},
+        "totalAudits": audits.get("total", 0),
+        "activeAudits": audits.get("active", 0),
+        "completedAudits": audits.get("completed", 0),
+        "plannedAudits": audits.get("planned", 0),
+        "auditTitles": audit_titles,
+        "totalAssessments": assessments.get("total", 0),
+        "activeAssessments": assessments.get("active", 0),
+        "completedAssessments": assessments.get("completed", 0),
+        "assessmentsWithCriteria": assessments.get("withCriteria", 0),
+        "assessmentTypes": assessment_types,
+        "totalPrograms": programs.get("total", 0),
+        "activePrograms": programs.get("active", 0),
+        "programsWithOwners": programs.get("withOwners", 0),
+        "programNames": program_names,
+    }, sync_stats
+
+
+CRITERIA = [
+    "areIssuesTracked",
+    "isControlMonitoringEnabled",
+    "isRiskAssessmentCurrent",
+    "isAuditPlanActive",
+    "isAssessmentProcessActive",
+    "isComplianceProgramActive",
+]
+
+
+def transform(input):
+    try:
+        if isinstance(input, str):
+            input = json.loads(input)
+        elif isinstance(input, bytes):
+            input = json.loads(input.decode("utf-8"))
+
+        previous_state = input.get("aggregateState") if isinstance(input, dict) else None
+        data, validation = extract_input(input)
+
+        if validation.get("status") == "failed":
+            return create_response(
+                result={key: False for key in CRITERIA},
+                validation=validation,
+                fail_reasons=["Input validation failed"]
+            )
+        if isinstance(data, dict) and isinstance(data.get("data"), dict):
+            data = data["data"]
+        if not isinstance(data, dict):
+            data = {}
+        if previous_state is None:
+            previous_state = data.get("aggregateState")
+
+        state = load_state(previous_state)
+        result, sync_stats = evaluate(data, state)
+
+        pass_reasons = []
+        fail_reasons = []
+        recommendations = []
+        additional_findings = []
+        for key in CRITERIA:
+            additional_findings.append({"metric": key, "status": "pass" if result[key] else "fail"})
+            if result[key]:
+                pass_reasons.append(f"{key} check passed")
+            else:
+                fail_reasons.append(f"{key} check failed")
+                recommendations.append(f"Review ZenGRC configuration for {key}")
+
+        response = create_response(
+            result=result,
+            validation=validation,
+            pass_reasons=pass_reasons,
+            fail_reasons=fail_reasons,
+            recommendations=recommendations,
+            additional_findings=additional_findings,
+            input_summary={"syncMode": "delta" if str(data.get("syncMode", "full")).lower() == "delta" else "full",
+                           "collections": sync_stats}
+        )
+        response["aggregateState"] = state
+        return response
+
+    except Exception as e:
+        return create_response(
+            result={key: False for key in CRITERIA},
+            validation={"status": "error", "errors": [], "warnings": []},
+            transformation_errors=[str(e)],
+            fail_reasons=[f"Transformation error: {str(e)}"]
+        )
@@ -0,0 +1,390 @@
+"""
+Transformation: identity_transform
+Vendor: Britive  |  Category: Identity & Access Management
+Evaluates: Every Britive identity criterion from one identity graph per payload.
+
+Users, admin roles, profiles (entitlements), applications and identity providers
+are numbered once into integer ids. Each role, profile and identity provider keeps
+the bitset of users it reaches, each application the bitset of its profiles, and
+user/profile status and privilege flags are bitsets too, so the criteria below are
+AND/OR/NOT over ints instead of rescans of the user directory:
+
+  areAdminAccountsSeparate, isZeroStandingPrivilegesEnabled,
+  isMFAEnabledForIdentityProvider, areInactiveUsersDeprovisioned,
+  plus pamCoverage and mfaCoverage percentages
+
+Input bundle (each listing a bare list or a {"data": [...]} response):
+  users:              GET /api/users
+  profiles:           GET /api/apps/{appId}/paps, merged across applications
+  applications:       GET /api/apps
+  identityProviders:  GET /api/v1/identity-providers
+  profileAssignments: {papId: GET /api/apps/{appId}/paps/{papId}/users} (optional)
+"""
+import json
+from datetime import datetime
+
+
+def extract_input(input_data):
+    if isinstance(input_data, dict) and "data" in input_data and "validation" in input_data:
+        return input_data["data"], input_data["validation"]
+    data = input_data
+    if isinstance(data, dict):
+        wrapper_keys = ["api_response", "response", "result", "apiResponse", "Output"]
+        for _ in range(3):
+            unwrapped = False
+            for key in wrapper_keys:
+                if key in data and isinstance(data.get(key), dict):
+                    data = data[key]
+                    unwrapped = True
+                    break
+            if not unwrapped:
+                break
+    return data, {"status": "unknown", "errors": [], "warnings": ["Legacy input format"]}
+
+
+def create_response(result, validation=None, pass_reasons=None, fail_reasons=None,
+                    recommendations=None, input_summary=None, transformation_errors=None,
+                    api_errors=None, additional_findings=None):
+    if validation is None:
+        validation = {"status": "unknown", "errors": [], "warnings": []}
+    return {
+        "transformedResponse": result,
+        "additionalInfo": {
+            "dataCollection": {"status": "error" if (api_errors or []) else "success", "errors": api_errors or []},
+            "validation": {"status": validation.get("status", "unknown"), "errors": validation.get("errors", []), "warnings": validation.get("warnings", [])},
+            "transformation": {"status": "error" if (transformation_errors or []) else "success", "errors": transformation_errors or [], "inputSummary": input_summary or {}},
+            "evaluation": {"passReasons": pass_reasons or [], "failReasons": fail_reasons or [], "recommendations": recommendations or [], "additionalFindings": additional_findings or []},
+            "metadata": {"evaluatedAt": datetime.utcnow().isoformat() + "Z", "schemaVersion": "1.0", "transformationId": "identity_transform", "vendor": "Britive", "category": "Identity & Access Management"}
+        }
+    }
+
+
+ADMIN_ROLE_NAMES = ("TenantAdmin",)
+ADMIN_RATIO_LIMIT = 0.20
+EXPIRY_FIELDS = ("expirationDuration", "expirationInMinutes", "sessionDuration")
+SERVICE_IDENTITY_TYPES = ("serviceidentity",)
+MAX_REPORTED_NAMES = 50
+
+
+def listing(data, keys):
+    """Records under the first present key: a bare list or a {"data": [...]} response; None if absent."""
+    if not isinstance(data, dict):
+        return None
+    for key in keys:
+        value = data.get(key)
+        if isinstance(value, dict):
+            value = value.get("data", value.get("result"))
+        if isinstance(value, list):
+            return [item for item in value if isinstance(item, dict)]
+    return None
+
+
+def truthy(value):
+    if isinstance(value, str):
+        return value.lower() in ("true", "yes", "1")
+    return bool(value)
+
+
+def has_expiry(profile):
+    # Britive returns expirationDuration in milliseconds; older shapes
+    # used expirationInMinutes / sessionDuration.
+    for field in EXPIRY_FIELDS:
+        value = profile.get(field)
+        if value is None:
+            continue
+        try:
+            if int(value) > 0:
+                return True
+        except (TypeError, ValueError):
+            continue
+    return False
+
+
+def popcount(bits):
+    return bin(bits).count("1")
+
+
+def set_bits(bits):
+    """Positions of the set bits, lowest first."""
+    positions = []
+    while bits:
+        lowest = bits & -bits
+        positions.append(lowest.bit_length() - 1)
+        bits = bits ^ lowest
+    return positions
+
+
+def new_nodes():
+    return {"ids": {}, "names": [], "edges": []}
+
+
+def node_id(nodes, key, name):
+    """Integer id for key, allocating the next id (and an empty edge bitset) on first sight."""
+    position = nodes["ids"].get(key)
+    if position is None:
+        position = len(nodes["names"])
+        nodes["ids"][key] = position
+        nodes["names"].append(name)
+        nodes["edges"].append(0)
+    return position
+
+
+def reference_id(value, keys):
+    """Id of a referenced object given inline as a dict or directly as an id."""
+    if isinstance(value, dict):
+        for key in keys:
+            if value.get(key) is not None:
+                return str(value[key])
+        return None
+    if value is None or value == "":
+        return None
+    return str(value)
+
+
+def build_identity_graph(data):
+    """
+    Number every node once and record its edges as bitsets:
+    roles/profiles/providers -> users, applications -> profiles. profileApp is the
+    user-independent profile -> application adjacency array.
+    """
+    graph = {
+        "users": new_nodes(), "roles": new_nodes(), "profiles": new_nodes(),
+        "applications": new_nodes(), "providers": new_nodes(), "profileApp": [],
+        "activeUsers": 0, "adminUsers": 0, "serviceUsers": 0,
+        "activeProfiles": 0, "timeBoundProfiles": 0, "mfaProviders": 0,
+        "present": {}
+    }
+    users = graph["users"]
+    roles = graph["roles"]
+    profiles = graph["profiles"]
+    applications = graph["applications"]
+    providers = graph["providers"]
+
+    user_list = data if isinstance(data, list) else listing(data, ("users", "data"))
+    provider_list = listing(data, ("identityProviders",))
+    profile_list = listing(data, ("profiles", "paps"))
+    application_list = listing(data, ("applications", "apps"))
+    graph["present"] = {"users": user_list is not None, "profiles": profile_list is not None,
+                        "identityProviders": provider_list is not None}
+
+    for provider in provider_list or []:
+        key = reference_id(provider, ("id",))
+        position = node_id(providers, key, provider.get("name", key))
+        if truthy(provider.get("mfaEnabled", False)):
+            graph["mfaProviders"] = graph["mfaProviders"] | (1 << position)
+    single_provider = len(providers["names"]) == 1
+
+    for user in user_list or []:
+        key = str(user.get("userId", user.get("id", len(users["names"]))))
+        position = node_id(users, key, user.get("username", key))
+        bit = 1 << position
+        if str(user.get("status", "")).lower() == "active":
+            graph["activeUsers"] = graph["activeUsers"] | bit
+        if str(user.get("type", "")).lower() in SERVICE_IDENTITY_TYPES:
+            graph["serviceUsers"] = graph["serviceUsers"] | bit
+        # Britive flags tenant admins either via a populated adminRoles list
+        # (e.g. "TenantAdmin") or the rootUser boolean. Count both.
+        if user.get("rootUser", False):
+            graph["adminUsers"] = graph["adminUsers"] | bit
+        admin_roles = user.get("adminRoles", [])
+        for role in admin_roles if isinstance(admin_roles, list) else []:
+            name = role.get("name", "") if isinstance(role, dict) else str(role)
+            role_position = node_id(roles, name, name)
+            roles["edges"][role_position] = roles["edges"][role_position] | bit
+            if name in ADMIN_ROLE_NAMES:
+                graph["adminUsers"] = graph["adminUsers"] | bit
+        provider_key = reference_id(user.get("identityProvider"), ("id",))
+        provider_position = providers["ids"].get(provider_key)
+        if provider_position is None and provider_key is None and single_provider:
+            provider_position = 0
+        if provider_position is not None:
+            providers["edges"][provider_position] = providers["edges"][provider_position] | bit
+
+    for application in application_list or []:
+        key = reference_id(application, ("appContainerId", "id"))
+        node_id(applications, key, application.get("catalogAppDisplayName", application.get("applicationName", key)))
+
+    for profile in profile_list or []:
+        key = reference_id(profile, ("papId", "id"))
+        position = node_id(profiles, key, profile.get("name", key))
+        bit = 1 << position
+        if str(profile.get("status", "")).lower() == "active":
+            graph["activeProfiles"] = graph["activeProfiles"] | bit
+        if has_expiry(profile):
+            graph["timeBoundProfiles"] = graph["timeBoundProfiles"] | bit
+        app_key = reference_id(profile.get("appContainerId"), ("appContainerId", "id"))
+        app_position = None
+        if app_key is not None:
+            app_position = node_id(applications, app_key, app_key)
+            applications["edges"][app_position] = applications["edges"][app_position] | bit
+        while len(graph["profileApp"]) <= position:
+            graph["profileApp"].append(None)
+        graph["profileApp"][position] = app_position
+
+    assignments = data.get("profileAssignments") if isinstance(data, dict) else None
+    graph["present"]["profileAssignments"] = isinstance(assignments, dict)
+    if isinstance(assignments, dict):
+        for pap_id, assigned in assignments.items():
+            position = profiles["ids"].get(str(pap_id))
+            if position is None:
+                continue
+            if isinstance(assigned, dict):
+                assigned = assigned.get("data", [])
+            for member in assigned if isinstance(assigned, list) else []:
+                user_position = users["ids"].get(reference_id(member, ("userId", "id")))
+                if user_position is not None:
+                    profiles["edges"][position] = profiles["edges"][position] | (1 << user_position)
+    return graph
+
+
+def union_edges(nodes, bits):
+    """OR of the edge bitsets of the nodes selected by bits."""
+    reached = 0
+    for position in set_bits(bits):
+        reached = reached | nodes["edges"][position]
+    return reached
+
+
+def names_of(nodes, bits):
+    return [nodes["names"][position] for position in set_bits(bits)[:MAX_REPORTED_NAMES]]
+
+
+def percentage(part, total):
+    return round(part / total * 100, 1) if total else 0.0
+
+
+def evaluate(data):
+    graph = build_identity_graph(data)
+    users = graph["users"]
+    profiles = graph["profiles"]
+    applications = graph["applications"]
+    all_users = (1 << len(users["names"])) - 1
+    all_applications = (1 << len(applications["names"])) - 1
+    active = graph["activeUsers"]
+    active_count = popcount(active)
+
+    admin_active = graph["adminUsers"] & active
+    admin_count = popcount(admin_active)
+    admin_ratio = admin_count / active_count if active_count else 0
+    admin_separate = active_count > 0 and admin_count > 0 and admin_ratio <= ADMIN_RATIO_LIMIT
+
+    active_profiles = graph["activeProfiles"]
+    standing_profiles = active_profiles & ~graph["timeBoundProfiles"]
+    zero_standing = graph["present"]["profiles"] and standing_profiles == 0
+
+    # PAM coverage: applications whose access is brokered by at least one active, time-bound profile
+    brokered_applications = 0
+    for position in set_bits(active_profiles & graph["timeBoundProfiles"]):
+        app_position = graph["profileApp"][position]
+        if app_position is not None:
+            brokered_applications = brokered_applications | (1 << app_position)
+    unbrokered_applications = all_applications & ~brokered_applications
+
+    mfa_users = union_edges(graph["providers"], graph["mfaProviders"])
+    active_without_mfa = active & ~mfa_users & ~graph["serviceUsers"]
+    human_active_count = popcount(active & ~graph["serviceUsers"])
+
+    # Without profileAssignments no user is linked to a profile, so deprovisioning can't be shown
+    assignments_present = graph["present"]["profileAssignments"]
+    assigned_users = union_edges(profiles, active_profiles)
+    inactive_with_access = all_users & ~active & assigned_users
+    admins_with_standing_access = admin_active & union_edges(profiles, standing_profiles)
+
+    return {
+        "areAdminAccountsSeparate": admin_separate,
+        "isZeroStandingPrivilegesEnabled": zero_standing,
+        "isMFAEnabledForIdentityProvider": graph["mfaProviders"] != 0,
+        "areInactiveUsersDeprovisioned": (graph["present"]["users"] and assignments_present
+                                          and inactive_with_access == 0),
+        "pamCoverage": percentage(popcount(brokered_applications), len(applications["names"])),
+        "mfaCoverage": percentage(human_active_count - popcount(active_without_mfa), human_active_count),
+        "totalUsers": len(users["names"]),
+        "totalActiveUsers": active_count,
+        "adminAccounts": admin_count,
+        "adminRatio": round(admin_ratio, 3),
+        "adminRoles": {name: popcount(graph["roles"]["edges"][i] & active) for i, name in enumerate(graph["roles"]["names"])},
+        "activeProfiles": popcount(active_profiles),
+        "profilesWithoutExpiry": names_of(profiles, standing_profiles),
+        "applications": len(applications["names"]),
+        "applicationsWithoutTimeBoundProfiles": names_of(applications, unbrokered_applications),
+        "identityProvidersChecked": len(graph["providers"]["names"]),
+        "mfaEnabledCount": popcount(graph["mfaProviders"]),
+        "activeUsersWithoutMFA": popcount(active_without_mfa),
+        "inactiveUsersWithAccess": names_of(users, inactive_with_access),
+        "adminsWithStandingAccess": names_of(users, admins_with_standing_access),
+        "profileAssignmentsProvided": assignments_present,
+    }
+
+
+CRITERIA = [
+    "areAdminAccountsSeparate",
+    "isZeroStandingPrivilegesEnabled",
+    "isMFAEnabledForIdentityProvider",
+    "areInactiveUsersDeprovisioned",
+]
+
+
+def transform(input):
+    try:
+        if isinstance(input, str):
+            input = json.loads(input)
+        elif isinstance(input, bytes):
+            input = json.loads(input.decode("utf-8"))
+
+        data, validation = extract_input(input)
+
+        if validation.get("status") == "failed":
+            return create_response(
+                result={key: False for key in CRITERIA},
+                validation=validation,
+                fail_reasons=["Input validation failed"]
+            )
+
+        result = evaluate(data)
+
+        pass_reasons = []
+        fail_reasons = []
+        recommendations = []
+        additional_findings = []
+        for key in CRITERIA:
+            additional_findings.append({"metric": key, "status": "pass" if result[key] else "fail"})
+            if result[key]:
+                pass_reasons.append(f"{key} check passed")
+            else:
+                fail_reasons.append(f"{key} check failed")
+                recommendations.append(f"Review Britive configuration for {key}")
+        if not result["profileAssignmentsProvided"]:
+            fail_reasons.append("profileAssignments not provided: inactive-user and standing-access "
+                                "checks cannot see who is assigned to profiles")
+            recommendations.append("Collect GET /api/apps/{appId}/paps/{papId}/users as profileAssignments")
+        if result["inactiveUsersWithAccess"]:
+            fail_reasons.append("Inactive users still assigned to active profiles: "
+                                + ", ".join(result["inactiveUsersWithAccess"]))
+        if result["adminsWithStandingAccess"]:
+            fail_reasons.append("Admins with standing (non-expiring) profile access: "
+                                + ", ".join(result["adminsWithStandingAccess"]))
+
+        return create_response(
+            result=result,
+            validation=validation,
+            pass_reasons=pass_reasons,
+            fail_reasons=fail_reasons,
+            recommendations=recommendations,
+            additional_findings=additional_findings,
+            input_summary={
+                "totalUsers": result["totalUsers"],
+                "totalActiveUsers": result["totalActiveUsers"],
+                "activeProfiles": result["activeProfiles"],
+                "applications": result["applications"],
+                "pamCoverage": result["pamCoverage"],
+                "mfaCoverage": result["mfaCoverage"]
+            }
+        )
+
+    except Exception as e:
+        return create_response(
+            result={key: False for key in CRITERIA},
+            validation={"status": "error", "errors": [], "warnings": []},
+            transformation_errors=[str(e)],
+            fail_reasons=[f"Transformation error: {str(e)}"]
+        )
@@ -1,3 +1,67 @@
+from datetime import datetime, timedelta
+
+
+DATE_FORMATS = [
+    '%Y-%m-%dT%H:%M:%S.%fZ',
+    '%Y-%m-%dT%H:%M:%SZ',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d'
+]
+DATE_CACHE_LIMIT = 100000
+EPOCH_MILLIS_CUTOFF = 100000000000  # Larger epoch values are milliseconds
+
+
+def new_date_parser():
+    """Per-payload parser state: candidate formats (last winner first) and parsed strings."""
+    return {"formats": list(DATE_FORMATS), "cache": {}}
+
+
+def parse_date(parser, date_str):
+    """
+    Parse a date string, trying the format that last succeeded first.
+
+    A payload almost always uses one format, so after the first record every
+    parse is a single strptime call instead of a walk through failing formats.
+    Numeric values are read as Unix epochs in seconds or milliseconds.
+    """
+    if isinstance(date_str, bool):
+        return None
+    if isinstance(date_str, (int, float)):
+        seconds = date_str / 1000 if date_str > EPOCH_MILLIS_CUTOFF else date_str
+        try:
+            return datetime.utcfromtimestamp(seconds)
+        except (ValueError, OverflowError, OSError):
+            return None
+    if not date_str or not isinstance(date_str, str):
+        return None
+    cache = parser["cache"]
+    if date_str in cache:
+        return cache[date_str]
+    formats = parser["formats"]
+    parsed = None
+    for position, fmt in enumerate(formats):
+        try:
+            parsed = datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+        if position:
+            formats.insert(0, formats.pop(position))
+        break
+    if len(cache) < DATE_CACHE_LIMIT:
+        cache[date_str] = parsed
+    return parsed
+
+
+def older_than(parser, date_strings, threshold):
+    """For each date string: True if before threshold, False if not, None if missing or unparseable."""
+    flags = []
+    for date_str in date_strings:
+        parsed = parse_date(parser, date_str)
+        flags.append(None if parsed is None else parsed < threshold)
+    return flags
+
+
 def transform(input):
     """
     Validates that dormant accounts (inactive >45 days) are disabled in Keeper.
@@ -18,8 +82,6 @@ def transform(input):
     criteria_key = "isDormantAccountsDisabled"
 
     try:
-        from datetime import datetime, timedelta
-
         # Handle nested response structures
         if 'response' in input:
             input = input['response']
@@ -37,6 +99,7 @@ def transform(input):
             "dormantUsers": 0,
             "dormantEnabled": 0,  # Dormant but still enabled (violations)
             "dormantDisabled": 0,
+            "unparseableLastLogin": 0,  # Activity value present but not a recognised date
             "dormancyThresholdDays": 45
         }
 
@@ -44,24 +107,6 @@ def transform(input):
         DORMANCY_THRESHOLD_DAYS = 45
         threshold_date = datetime.utcnow() - timedelta(days=DORMANCY_THRESHOLD_DAYS)
 
-        def parse_date(date_str):
-            """Parse various date formats."""
-            if not date_str:
-                return None
-            formats = [
-                '%Y-%m-%dT%H:%M:%S.%fZ',
-                '%Y-%m-%dT%H:%M:%SZ',
-                '%Y-%m-%dT%H:%M:%S',
-                '%Y-%m-%d %H:%M:%S',
-                '%Y-%m-%d'
-            ]
-            for fmt in formats:
-                try:
-                    return datetime.strptime(date_str, fmt)
-                except ValueError:
-                    continue
-            return None
-
         # Check SCIM Resources
         resources = input.get('Resources', input.get('resources', []))
         if isinstance(resources, list):
@@ -74,48 +119,49 @@ def transform(input):
                     # SCIM doesn't typically include last login, so we check active status
                     # If user is inactive, they're properly disabled
                     if not is_active:
-                        dormant_details["dormantDisabled"] += 1
+                        dormant_details["dormantDisabled"] = dormant_details["dormantDisabled"] + 1
                     else:
-                        dormant_details["activeUsers"] += 1
+                        dormant_details["activeUsers"] = dormant_details["activeUsers"] + 1
 
         # Check users array with activity data (Commander user-report format)
         users = input.get('users', [])
         if isinstance(users, list) and len(users) > 0:
             dormant_details["totalUsers"] = len(users)
+            users = [user for user in users if isinstance(user, dict)]
 
-            for user in users:
-                if isinstance(user, dict):
-                    # Get last activity/login timestamp
-                    last_activity = user.get('last_login', user.get('lastLogin',
-                                   user.get('last_activity', user.get('lastActivity'))))
-
-                    is_active = user.get('active', user.get('status', 'active'))
-                    is_enabled = is_active in [True, 'active', 'ACTIVE', 'enabled']
-
-                    if last_activity:
-                        activity_date = parse_date(last_activity)
-                        if activity_date:
-                            is_dormant = activity_date < threshold_date
-
-                            if is_dormant:
-                                dormant_details["dormantUsers"] += 1
-                                if is_enabled:
-                                    # Violation: dormant but still enabled
-                                    dormant_details["dormantEnabled"] += 1
-                                    dormant_disabled = False
-                                else:
-                                    dormant_details["dormantDisabled"] += 1
+            # Get last activity/login timestamps and classify them in one pass
+            last_activities = [
+                user.get('last_login', user.get('lastLogin',
+                         user.get('last_activity', user.get('lastActivity'))))
+                for user in users
+            ]
+            dormant_flags = older_than(new_date_parser(), last_activities, threshold_date)
+
+            for user, last_activity, is_dormant in zip(users, last_activities, dormant_flags):
+                is_active = user.get('active', user.get('status', 'active'))
+                is_enabled = is_active in [True, 'active', 'ACTIVE', 'enabled']
+
+                if last_activity:
+                    if is_dormant is not None:
+                        if is_dormant:
+                            dormant_details["dormantUsers"] = dormant_details["dormantUsers"] + 1
+                            if is_enabled:
+                                # Violation: dormant but still enabled
+                                dormant_details["dormantEnabled"] = dormant_details["dormantEnabled"] + 1
+                                dormant_disabled = False
                             else:
-                                dormant_details["activeUsers"] += 1
+                                dormant_details["dormantDisabled"] = dormant_details["dormantDisabled"] + 1
                         else:
-                            # Can't parse date, assume active
-                            dormant_details["activeUsers"] += 1
+                            dormant_details["activeUsers"] = dormant_details["activeUsers"] + 1
                     else:
-                        # No activity data, check enabled status only
-                        if is_enabled:
-                            dormant_details["activeUsers"] += 1
-                        else:
-                            dormant_details["dormantDisabled"] += 1
+                        # Can't parse date, report it rather than assume active
+                        dormant_details["unparseableLastLogin"] = dormant_details["unparseableLastLogin"] + 1
+                else:
+                    # No activity data, check enabled status only
+                    if is_enabled:
+                        dormant_details["activeUsers"] = dormant_details["activeUsers"] + 1
+                    else:
+                        dormant_details["dormantDisabled"] = dormant_details["dormantDisabled"] + 1
 
         # Check for security audit data with dormant account info
         if 'security_audit' in input or 'securityAudit' in input:
@@ -138,9 +184,15 @@ def transform(input):
                     if isinstance(user, dict):
                         if user.get('status', user.get('active', 'inactive')) in ['active', 'enabled', True]:
                             dormant_disabled = False
-                            dormant_details["dormantEnabled"] += 1
+                            dormant_details["dormantEnabled"] = dormant_details["dormantEnabled"] + 1
                         else:
-                            dormant_details["dormantDisabled"] += 1
+                            dormant_details["dormantDisabled"] = dormant_details["dormantDisabled"] + 1
+
+        if dormant_details["unparseableLastLogin"] > 0:
+            dormant_details["warning"] = (
+                f"{dormant_details['unparseableLastLogin']} user(s) have a last login value "
+                "that could not be parsed; their dormancy was not evaluated"
+            )
 
         # Calculate compliance score
         total_dormant = dormant_details["dormantUsers"] or (dormant_details["dormantEnabled"] + dormant_details["dormantDisabled"])
@@ -1,59 +1,349 @@
-def transform(input):
+"""
+Transformation: isSegregationOfDutiesEnabled
+Vendor: Saviynt  |  Category: Identity & Access Management
+Evaluates: Whether SoD rules are defined and, when entitlement assignments are
+supplied, which users hold a toxic combination of entitlements.
+
+A rule (Saviynt risk) lists functions, each a set of entitlements; a user violates
+the rule when they hold at least one entitlement from every function. Only
+entitlements named by some rule get a bit. Each user's assignments fold into one
+int mask, and each rule compiles to its function masks. A user violates a rule when
+every function mask ANDed with the user mask is non-zero. Users sharing a mask share
+the answer, so rules run once per distinct mask rather than once per user.
+
+Input:
+  controls / sodPolicies / sodEnabled: legacy policy-existence shapes
+  sodRules (or risks): [{"riskname", "risklevel", "functions": [{"functionname",
+      "entitlements": [{"entitlement_value", "endpoint"} | str]}]}]
+      or [{"name", "conflictingEntitlements": [...]}] (one function per entitlement)
+  entitlementAssignments: [{"username" (or userName/userkey/userKey/user), "entitlement_value", "endpoint"}, ...]
+      or {username: [entitlement, ...]}
+"""
+import json
+from datetime import datetime
+
+
+def extract_input(input_data):
+    if isinstance(input_data, dict) and "data" in input_data and "validation" in input_data:
+        return input_data["data"], input_data["validation"]
+    data = input_data
+    if isinstance(data, dict):
+        wrapper_keys = ["api_response", "response", "result", "apiResponse", "Output"]
+        for _ in range(3):
+            unwrapped = False
+            for key in wrapper_keys:
+                if key in data and isinstance(data.get(key), dict):
+                    data = data[key]
+                    unwrapped = True
+                    break
+            if not unwrapped:
+                break
+    return data, {"status": "unknown", "errors": [], "warnings": ["Legacy input format"]}
+
+
+def create_response(result, validation=None, pass_reasons=None, fail_reasons=None,
+                    recommendations=None, input_summary=None, transformation_errors=None,
+                    api_errors=None, additional_findings=None):
+    if validation is None:
+        validation = {"status": "unknown", "errors": [], "warnings": []}
+    return {
+        "transformedResponse": result,
+        "additionalInfo": {
+            "dataCollection": {"status": "error" if (api_errors or []) else "success", "errors": api_errors or []},
+            "validation": {"status": validation.get("status", "unknown"), "errors": validation.get("errors", []), "warnings": validation.get("warnings", [])},
+            "transformation": {"status": "error" if (transformation_errors or []) else "success", "errors": transformation_errors or [], "inputSummary": input_summary or {}},
+            "evaluation": {"passReasons": pass_reasons or [], "failReasons": fail_reasons or [], "recommendations": recommendations or [], "additionalFindings": additional_findings or []},
+            "metadata": {"evaluatedAt": datetime.utcnow().isoformat() + "Z", "schemaVersion": "1.0", "transformationId": "isSegregationOfDutiesEnabled", "vendor": "Saviynt", "category": "Identity & Access Management"}
+        }
+    }
+
+
+MAX_TOP_OFFENDERS = 10
+MAX_REPORTED_RULES = 50
+USER_ID_KEYS = ("username", "userName", "userkey", "userKey", "user")
+
+
+def entitlement_keys(entitlement):
+    """Lookup keys for an entitlement: endpoint-qualified first (when known), then the bare value."""
+    if isinstance(entitlement, dict):
+        value = entitlement.get("entitlement_value", entitlement.get("entitlementValue", entitlement.get("name")))
+        endpoint = entitlement.get("endpoint", entitlement.get("endpointname"))
+    else:
+        value = entitlement
+        endpoint = None
+    if value is None:
+        return []
+    value = str(value).strip().lower()
+    if endpoint:
+        return [str(endpoint).strip().lower() + "/" + value, value]
+    return [value]
+
+
+def compile_rules(rules):
+    """
+    Give every rule entitlement a bit and compile each rule into its function masks.
+    Returns (compiled rules, entitlement key -> bit mask, bare value -> mask of the
+    endpoint-qualified bits carrying that value). The last map lets assignment rows
+    that omit the endpoint still match endpoint-qualified rule entitlements.
+    """
+    bits = {}
+    bare_bits = {}
+    compiled = []
+    for position, rule in enumerate(rules):
+        if not isinstance(rule, dict):
+            continue
+        functions = rule.get("functions")
+        if not isinstance(functions, list):
+            conflicting = rule.get("conflictingEntitlements", rule.get("entitlements", []))
+            functions = [{"entitlements": [e]} for e in conflicting] if isinstance(conflicting, list) else []
+        masks = []
+        for function in functions:
+            entitlements = function.get("entitlements", []) if isinstance(function, dict) else function
+            mask = 0
+            for entitlement in entitlements if isinstance(entitlements, list) else [entitlements]:
+                keys = entitlement_keys(entitlement)
+                if not keys:
+                    continue
+                if keys[0] not in bits:
+                    bits[keys[0]] = 1 << len(bits)
+                    if len(keys) > 1:
+                        bare_bits[keys[1]] = bare_bits.get(keys[1], 0) | bits[keys[0]]
+                mask = mask | bits[keys[0]]
+            if mask:
+                masks.append(mask)
+        # A rule needs two functions to describe a conflict
+        if len(masks) < 2:
+            continue
+        compiled.append({
+            "name": str(rule.get("riskname", rule.get("name", rule.get("rulename", "rule-" + str(position))))),
+            "level": str(rule.get("risklevel", rule.get("priority", ""))),
+            "functions": masks,
+        })
+    return compiled, bits, bare_bits
+
+
+def row_user(row):
+    """First non-empty user identifier on an assignment row, or None."""
+    for key in USER_ID_KEYS:
+        value = row.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def assignment_rows(assignments):
+    """
+    (user, entitlement) pairs from a row list or a {user: [entitlement, ...]} map,
+    plus the number of rows skipped because they carry no user identifier.
     """
-    Validate SoD policies exist
+    if isinstance(assignments, dict):
+        rows = []
+        for user, entitlements in assignments.items():
+            for entitlement in entitlements if isinstance(entitlements, list) else [entitlements]:
+                rows.append((user, entitlement))
+        return rows, 0
+    rows = []
+    skipped = 0
+    for row in assignments if isinstance(assignments, list) else []:
+        if isinstance(row, dict):
+            user = row_user(row)
+            # Rows without a user would otherwise share one mask and raise false conflicts
+            if user is None:
+                skipped = skipped + 1
+                continue
+            rows.append((user, row))
+    return rows, skipped
 
-    Parameters:
-        input (dict): The JSON data containing Saviynt API response
 
-    Returns:
-        dict: A dictionary with the isSegregationOfDutiesEnabled evaluation result
+def user_masks(rows, bits, bare_bits):
+    """
+    Fold assignments into one entitlement mask per user; entitlements outside every rule
+    are skipped. A row without an endpoint matches the value on any endpoint; returns
+    the masks and the number of rows matched that way.
     """
+    masks = {}
+    endpointless_matches = 0
+    for user, entitlement in rows:
+        keys = entitlement_keys(entitlement)
+        mask = 0
+        for key in keys:
+            bit = bits.get(key)
+            if bit is not None:
+                mask = mask | bit
+        if len(keys) == 1 and keys[0] in bare_bits:
+            mask = mask | bare_bits[keys[0]]
+            endpointless_matches = endpointless_matches + 1
+        if mask:
+            masks[user] = masks.get(user, 0) | mask
+    return masks, endpointless_matches
+
+
+def violated_rules(mask, rules):
+    """Positions of the rules whose every function mask intersects mask."""
+    violated = []
+    for position, rule in enumerate(rules):
+        for function in rule["functions"]:
+            if not mask & function:
+                break
+        else:
+            violated.append(position)
+    return violated
+
 
-    criteria_key = "isSegregationOfDutiesEnabled"
+def detect_violations(rules, masks):
+    """Per-user violated rule positions, evaluating each distinct entitlement mask once."""
+    by_mask = {}
+    violations = {}
+    for user, mask in masks.items():
+        violated = by_mask.get(mask)
+        if violated is None:
+            violated = violated_rules(mask, rules)
+            by_mask[mask] = violated
+        if violated:
+            violations[user] = violated
+    return violations, len(by_mask)
 
+
+def policies_defined(data):
+    """Legacy policy-existence check over controls / sodPolicies / sodEnabled."""
+    details = {}
+    if isinstance(data.get("controls"), list):
+        controls = data["controls"]
+        # Filter for SoD-specific controls
+        sod_controls = [c for c in controls if isinstance(c, dict) and (
+            str(c.get("controltype", "")).lower() == "sod" or
+            "segregation" in str(c).lower() or
+            "sod" in str(c.get("controlname", "")).lower()
+        )]
+        if len(sod_controls) == 0 and len(controls) > 0:
+            # If filtering returns nothing, use all controls
+            sod_controls = controls
+        details["totalControls"] = len(controls)
+        details["sodPolicies"] = len(sod_controls)
+        return len(sod_controls) > 0, details
+    if isinstance(data.get("sodPolicies"), list):
+        details["sodPolicyCount"] = len(data["sodPolicies"])
+        return len(data["sodPolicies"]) > 0, details
+    if "sodEnabled" in data:
+        return bool(data["sodEnabled"]), details
+    return False, details
+
+
+def evaluate(data):
+    """Core evaluation logic extracted from doc transform."""
     try:
-        # Handle nested response structures
-        if 'response' in input:
-            input = input['response']
-        if 'apiResponse' in input:
-            input = input['apiResponse']
-        if 'result' in input:
-            input = input['result']
-
-        sod_enabled = False
-        sod_details = {}
-
-        # Check for controls array (Saviynt fetchControlAttributes response with SoD type)
-        if 'controls' in input:
-            controls = input['controls']
-            if isinstance(controls, list):
-                # Filter for SoD-specific controls
-                sod_controls = [c for c in controls if
-                    c.get('controltype', '').lower() == 'sod' or
-                    'segregation' in str(c).lower() or
-                    'sod' in str(c.get('controlname', '')).lower()
-                ]
-                if len(sod_controls) == 0 and len(controls) > 0:
-                    # If filtering returns nothing, use all controls
-                    sod_controls = controls
-                sod_enabled = len(sod_controls) > 0
-                sod_details['totalControls'] = len(controls)
-                sod_details['sodPolicies'] = len(sod_controls)
-        elif 'sodPolicies' in input:
-            policies = input['sodPolicies']
-            if isinstance(policies, list):
-                sod_enabled = len(policies) > 0
-                sod_details['sodPolicyCount'] = len(policies)
-        elif 'sodEnabled' in input:
-            sod_enabled = bool(input['sodEnabled'])
-
-        return {
-            criteria_key: sod_enabled,
-            **sod_details
-        }
+        if not isinstance(data, dict):
+            return {"isSegregationOfDutiesEnabled": False, "reason": "Unexpected SoD data shape"}
+
+        enabled, details = policies_defined(data)
+        rules = data.get("sodRules", data.get("risks"))
+        if not isinstance(rules, list):
+            return {"isSegregationOfDutiesEnabled": enabled, **details}
+
+        compiled, bits, bare_bits = compile_rules(rules)
+        enabled = enabled or len(compiled) > 0
+        details["sodRuleCount"] = len(compiled)
+        details["ruleEntitlements"] = len(bits)
 
+        assignments = data.get("entitlementAssignments", data.get("userEntitlements"))
+        if assignments is None:
+            return {"isSegregationOfDutiesEnabled": enabled, **details}
+
+        rows, skipped_rows = assignment_rows(assignments)
+        masks, endpointless_matches = user_masks(rows, bits, bare_bits)
+        violations, distinct_masks = detect_violations(compiled, masks)
+
+        rule_counts = [0] * len(compiled)
+        violation_count = 0
+        for violated in violations.values():
+            violation_count = violation_count + len(violated)
+            for position in violated:
+                rule_counts[position] = rule_counts[position] + 1
+        offenders = sorted(violations.items(), key=lambda item: (-len(item[1]), str(item[0])))
+        violated_rule_counts = {}
+        for position in sorted(range(len(compiled)), key=lambda p: -rule_counts[p]):
+            if rule_counts[position] == 0 or len(violated_rule_counts) >= MAX_REPORTED_RULES:
+                break
+            violated_rule_counts[compiled[position]["name"]] = rule_counts[position]
+
+        details["assignmentsEvaluated"] = len(rows)
+        details["assignmentsWithoutUser"] = skipped_rows
+        details["assignmentsMatchedWithoutEndpoint"] = endpointless_matches
+        details["usersEvaluated"] = len(masks)
+        details["distinctEntitlementSets"] = distinct_masks
+        details["usersInViolation"] = len(violations)
+        details["violationCount"] = violation_count
+        details["violationsByRule"] = violated_rule_counts
+        details["topOffenders"] = [
+            {"user": user, "violations": len(violated),
+             "rules": [compiled[position]["name"] for position in violated]}
+            for user, violated in offenders[:MAX_TOP_OFFENDERS]
+        ]
+        return {"isSegregationOfDutiesEnabled": enabled and len(violations) == 0, **details}
     except Exception as e:
-        return {
-            criteria_key: False,
-            "error": str(e)
-        }
+        return {"isSegregationOfDutiesEnabled": False, "error": str(e)}
+
+
+def transform(input):
+    criteriaKey = "isSegregationOfDutiesEnabled"
+    try:
+        if isinstance(input, str):
+            input = json.loads(input)
+        elif isinstance(input, bytes):
+            input = json.loads(input.decode("utf-8"))
+
+        data, validation = extract_input(input)
+
+        if validation.get("status") == "failed":
+            return create_response(
+                result={criteriaKey: False},
+                validation=validation,
+                fail_reasons=["Input validation failed"]
+            )
+
+        eval_result = evaluate(data)
+
+        result_value = eval_result.get(criteriaKey, False)
+        extra_fields = {k: v for k, v in eval_result.items() if k != criteriaKey and k != "error"}
+
+        pass_reasons = []
+        fail_reasons = []
+        recommendations = []
+
+        if result_value:
+            pass_reasons.append(f"{criteriaKey} check passed")
+            if "sodRuleCount" in extra_fields:
+                pass_reasons.append(f"{extra_fields['sodRuleCount']} SoD rules defined")
+            if "usersEvaluated" in extra_fields:
+                pass_reasons.append(f"No toxic entitlement combinations across {extra_fields['usersEvaluated']} users")
+        else:
+            fail_reasons.append(f"{criteriaKey} check failed")
+            if "error" in eval_result:
+                fail_reasons.append(eval_result["error"])
+            if extra_fields.get("usersInViolation"):
+                fail_reasons.append(f"{extra_fields['usersInViolation']} users hold conflicting entitlements "
+                                    f"({extra_fields['violationCount']} rule violations)")
+                recommendations.append("Remove or mitigate conflicting entitlements for the top offenders")
+            else:
+                recommendations.append(f"Review Saviynt configuration for {criteriaKey}")
+
+        if extra_fields.get("assignmentsWithoutUser"):
+            recommendations.append(f"{extra_fields['assignmentsWithoutUser']} entitlement assignments have no "
+                                   "username/userkey and were not evaluated")
+
+        return create_response(
+            result={criteriaKey: result_value, **extra_fields},
+            validation=validation,
+            pass_reasons=pass_reasons,
+            fail_reasons=fail_reasons,
+            recommendations=recommendations,
+            input_summary={k: v for k, v in extra_fields.items() if k not in ("topOffenders", "violationsByRule")}
+        )
+
+    except Exception as e:
+        return create_response(
+            result={criteriaKey: False},
+            validation={"status": "error", "errors": [], "warnings": []},
+            transformation_errors=[str(e)],
+            fail_reasons=[f"Transformation error: {str(e)}"]
+        )
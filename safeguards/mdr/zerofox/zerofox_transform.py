@@ -0,0 +1,452 @@
+"""
+Transformation: zerofox_transform
+Vendor: ZeroFox  |  Category: Managed Detection & Response
+Evaluates: Every ZeroFox criterion from one entity index:
+
+  isEntityMonitoringActive, requiredCoveragePercentage, isAuthorizedModeEnabled,
+  isAlertingEnabled, isTakedownServiceEnabled, isMDREnabled
+
+Entity pages are merged into a compact index as they are read. The index keeps
+one [type, status, flags, policy id, last alert epoch, sweep] entry per entity id
+and none of the raw entity objects. Alerts update the last-alert time of indexed
+entities; an alert for an entity not yet indexed is held in "pendingAlerts" and
+applied when the entity arrives, so alerts and entities may come in any order.
+The index is returned as "entityIndex" next to the standard envelope. Passing it
+back with the next page (input key "entityIndex") merges large tenants page by
+page across calls.
+
+syncMode controls removals:
+  "merge" (default)  pages are added to the index; nothing is removed.
+  "start"            first page of a full sweep: starts a new sweep number.
+  "end"              last page of a full sweep: entities not re-sent since the
+                     sweep started are dropped, with their pending alerts.
+  "full"             "start" and "end" in one call (the call holds every page).
+Removed entities may also be given as {"deleted": {"entities": [id, ...]}}.
+
+Input bundle:
+  entities:  GET /1.0/entities/ (a page {"entities"|"results": [...]}, a list,
+             or "entityPages": [page, ...])
+  alerts:    GET /1.0/alerts/ (same shapes, "alertPages" for pages)
+  policies:  GET /1.0/policies/
+  user:      GET /1.0/users/me/ ({"is_active", "company": {...}})
+"""
+import json
+from datetime import datetime
+
+
+INDEX_VERSION = 2
+PENDING_ALERT_LIMIT = 10000
+SYNC_MODES = ("merge", "start", "end", "full")
+POLICY_ENABLED = 1
+AUTO_REMEDIATION = 2
+COVERAGE_THRESHOLD = 95
+RECENT_ALERT_DAYS = 30
+SECONDS_PER_DAY = 86400
+ENTERPRISE_PLANS = ("enterprise", "enterprise_plus", "enterprise_premium", "premium")
+ACTIVE_SUBSCRIPTION_STATUSES = ("active", "trial", "enterprise", "valid")
+
+
+def extract_input(input_data):
+    if isinstance(input_data, dict) and "data" in input_data and "validation" in input_data:
+        return input_data["data"], input_data["validation"]
+    data = input_data
+    if isinstance(data, dict):
+        wrapper_keys = ["api_response", "response", "result", "apiResponse", "Output"]
+        for _ in range(3):
+            unwrapped = False
+            for key in wrapper_keys:
+                if key in data and isinstance(data.get(key), dict):
+                    data = data[key]
+                    unwrapped = True
+                    break
+            if not unwrapped:
+                break
+    return data, {"status": "unknown", "errors": [], "warnings": ["Legacy input format"]}
+
+
+def create_response(result, validation=None, pass_reasons=None, fail_reasons=None,
+                    recommendations=None, input_summary=None, transformation_errors=None,
+                    api_errors=None, additional_findings=None):
+    if validation is None:
+        validation = {"status": "unknown", "errors": [], "warnings": []}
+    return {
+        "transformedResponse": result,
+        "additionalInfo": {
+            "dataCollection": {"status": "error" if (api_errors or []) else "success", "errors": api_errors or []},
+            "validation": {"status": validation.get("status", "unknown"), "errors": validation.get("errors", []), "warnings": validation.get("warnings", [])},
+            "transformation": {"status": "error" if (transformation_errors or []) else "success", "errors": transformation_errors or [], "inputSummary": input_summary or {}},
+            "evaluation": {"passReasons": pass_reasons or [], "failReasons": fail_reasons or [], "recommendations": recommendations or [], "additionalFindings": additional_findings or []},
+            "metadata": {"evaluatedAt": datetime.utcnow().isoformat() + "Z", "schemaVersion": "1.0", "transformationId": "zerofox_transform", "vendor": "ZeroFox", "category": "Managed Detection & Response"}
+        }
+    }
+
+
+# Fixed-format ISO-8601 parsing straight to epoch seconds. Vendor timestamps
+# repeat heavily, so parsed values are cached by their raw string.
+EPOCH_CACHE = {}
+EPOCH_CACHE_LIMIT = 100000
+
+
+def days_from_civil(year, month, day):
+    """Days since 1970-01-01 for a proleptic Gregorian date."""
+    if month <= 2:
+        year = year - 1
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def parse_epoch_uncached(value):
+    """Parse 'YYYY-MM-DD[THH:MM:SS[.fff]][Z|+HH:MM]' into epoch seconds, or None."""
+    text = value.strip()
+    if len(text) < 10 or text[4] != "-" or text[7] != "-":
+        return None
+    try:
+        month = int(text[5:7])
+        day = int(text[8:10])
+        if month < 1 or month > 12 or day < 1 or day > 31:
+            return None
+        seconds = days_from_civil(int(text[0:4]), month, day) * 86400
+        if len(text) >= 19 and text[10] in "T " and text[13] == ":" and text[16] == ":":
+            seconds = seconds + int(text[11:13]) * 3600 + int(text[14:16]) * 60 + int(text[17:19])
+            tail = text[19:]
+            if tail.startswith("."):
+                cut = 1
+                while cut < len(tail) and tail[cut].isdigit():
+                    cut = cut + 1
+                tail = tail[cut:]
+            if tail and tail not in ("Z", "z"):
+                sign = -1 if tail[0] == "-" else 1
+                offset = tail[1:].replace(":", "")
+                seconds = seconds - sign * (int(offset[0:2]) * 3600 + int(offset[2:4] or 0) * 60)
+        elif len(text) > 10:
+            return None
+        return seconds
+    except (ValueError, IndexError):
+        return None
+
+
+def parse_epoch(value):
+    """Cached epoch-seconds parse of an ISO-8601 string; None when unparseable."""
+    if not isinstance(value, str) or not value:
+        return None
+    cached = EPOCH_CACHE.get(value)
+    if cached is not None or value in EPOCH_CACHE:
+        return cached
+    seconds = parse_epoch_uncached(value)
+    if len(EPOCH_CACHE) < EPOCH_CACHE_LIMIT:
+        EPOCH_CACHE[value] = seconds
+    return seconds
+
+
+def truthy(value):
+    if isinstance(value, str):
+        return value.lower() in ("true", "yes", "1")
+    return bool(value)
+
+
+def page_records(page, keys):
+    if isinstance(page, list):
+        return page
+    if isinstance(page, dict):
+        for key in keys:
+            if isinstance(page.get(key), list):
+                return page[key]
+    return []
+
+
+def resource_pages(data, name):
+    """Pages of a resource: "<name>Pages", else the single response or list under name."""
+    if isinstance(data.get(name + "Pages"), list):
+        return data[name + "Pages"]
+    if name in data:
+        return [data[name]]
+    return []
+
+
+def load_index(index):
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION or not isinstance(index.get("entities"), dict):
+        return {"version": INDEX_VERSION, "entities": {}, "pendingAlerts": {}, "sweep": 0, "pagesMerged": 0}
+    return index
+
+
+def start_sweep(index):
+    """Begin a full sweep: entities merged from here on carry the new sweep number."""
+    index["sweep"] = index["sweep"] + 1
+    index["pagesMerged"] = 0
+
+
+def end_sweep(index):
+    """Drop entities and pending alerts not seen since the current sweep started; returns the count dropped."""
+    stale = [key for key, entry in index["entities"].items() if entry[5] < index["sweep"]]
+    for key in stale:
+        del index["entities"][key]
+    index["pendingAlerts"] = {}
+    return len(stale)
+
+
+def delete_entities(index, ids):
+    removed = 0
+    for entity_id in ids if isinstance(ids, list) else []:
+        key = str(entity_id)
+        if key in index["entities"]:
+            del index["entities"][key]
+            removed = removed + 1
+        if key in index["pendingAlerts"]:
+            del index["pendingAlerts"][key]
+    return removed
+
+
+def merge_entity_page(index, page):
+    """
+    Fold one entities page into the index; a re-sent entity replaces its entry but
+    keeps its last alert time, and a new entity picks up any pending alert time.
+    """
+    for entity in page_records(page, ("entities", "results", "items")):
+        if not isinstance(entity, dict) or entity.get("id") is None:
+            continue
+        entity_type = entity.get("type", "")
+        if isinstance(entity_type, dict):
+            entity_type = entity_type.get("name", entity_type.get("id", ""))
+        status = entity.get("status", "")
+        if not status and "is_active" in entity:
+            status = "active" if truthy(entity["is_active"]) else "inactive"
+        policy = entity.get("policy", entity.get("policy_id"))
+        policy_id = None
+        flags = 0
+        if isinstance(policy, dict):
+            policy_id = policy.get("id")
+            if truthy(policy.get("enabled", False)):
+                flags = flags | POLICY_ENABLED
+        elif isinstance(policy, bool):
+            flags = flags | (POLICY_ENABLED if policy else 0)
+        elif policy is not None:
+            policy_id = policy
+        if truthy(entity.get("auto_remediation_enabled", False)):
+            flags = flags | AUTO_REMEDIATION
+        key = str(entity["id"])
+        previous = index["entities"].get(key)
+        last_alert = previous[4] if previous else index["pendingAlerts"].pop(key, None)
+        index["entities"][key] = [str(entity_type).lower(), str(status).lower(), flags,
+                                  None if policy_id is None else str(policy_id),
+                                  last_alert, index["sweep"]]
+    index["pagesMerged"] = index["pagesMerged"] + 1
+
+
+def merge_alert_page(index, page):
+    """Record the newest alert time per entity, holding alerts for entities not yet indexed."""
+    entities = index["entities"]
+    pending = index["pendingAlerts"]
+    for alert in page_records(page, ("alerts", "results", "items")):
+        if not isinstance(alert, dict):
+            continue
+        entity = alert.get("entity")
+        entity_id = entity.get("id") if isinstance(entity, dict) else alert.get("entity_id", entity)
+        if entity_id is None:
+            continue
+        seconds = parse_epoch(alert.get("timestamp", alert.get("created_at", alert.get("offending_content_timestamp"))))
+        if seconds is None:
+            continue
+        key = str(entity_id)
+        entry = entities.get(key)
+        if entry is not None:
+            if entry[4] is None or seconds > entry[4]:
+                entry[4] = seconds
+        elif key in pending:
+            if seconds > pending[key]:
+                pending[key] = seconds
+        elif len(pending) < PENDING_ALERT_LIMIT:
+            pending[key] = seconds
+
+
+def notifying_policies(policies):
+    """Ids of policies with an email or webhook notification channel (None key when ids are missing)."""
+    notifying = {}
+    for policy in page_records(policies, ("policies", "results", "items")):
+        if not isinstance(policy, dict):
+            continue
+        notifications = policy.get("notifications", {})
+        if not isinstance(notifications, dict):
+            continue
+        emails = notifications.get("email", [])
+        webhook = notifications.get("webhook", None)
+        if (isinstance(emails, list) and len(emails) > 0) or (isinstance(webhook, str) and len(webhook.strip()) > 0):
+            notifying[str(policy.get("id"))] = True
+    return notifying
+
+
+def current_epoch():
+    now = datetime.utcnow()
+    return days_from_civil(now.year, now.month, now.day) * SECONDS_PER_DAY + now.hour * 3600 + now.minute * 60 + now.second
+
+
+def evaluate_index(index, notifying, now):
+    """Type/status counters, policy coverage and alert recency from one pass over the index entries."""
+    by_type = {}
+    by_status = {}
+    enabled = 0
+    auto_remediation = 0
+    alerting_policy = 0
+    recently_alerted = 0
+    never_alerted = 0
+    recent_cutoff = now - RECENT_ALERT_DAYS * SECONDS_PER_DAY
+    for entity_type, status, flags, policy_id, last_alert, _ in index["entities"].values():
+        by_type[entity_type or "unknown"] = by_type.get(entity_type or "unknown", 0) + 1
+        by_status[status or "unknown"] = by_status.get(status or "unknown", 0) + 1
+        if flags & POLICY_ENABLED:
+            enabled = enabled + 1
+        if flags & AUTO_REMEDIATION:
+            auto_remediation = auto_remediation + 1
+        if policy_id is not None and policy_id in notifying:
+            alerting_policy = alerting_policy + 1
+        if last_alert is None:
+            never_alerted = never_alerted + 1
+        elif last_alert >= recent_cutoff:
+            recently_alerted = recently_alerted + 1
+    total = len(index["entities"])
+    coverage = round(enabled / total * 100, 2) if total else 0.0
+    return {
+        "isEntityMonitoringActive": enabled > 0,
+        "requiredCoveragePercentage": total > 0 and coverage >= COVERAGE_THRESHOLD,
+        "isAuthorizedModeEnabled": auto_remediation > 0,
+        "coverage": coverage,
+        "totalEntities": total,
+        "activeEntities": enabled,
+        "autoRemediationEntities": auto_remediation,
+        "entitiesWithAlertingPolicy": alerting_policy,
+        "entitiesAlertedRecently": recently_alerted,
+        "entitiesNeverAlerted": never_alerted,
+        "entitiesByType": by_type,
+        "entitiesByStatus": by_status,
+    }
+
+
+def evaluate_account(user):
+    """Takedown and MDR entitlement from the account (users/me) response."""
+    company = user.get("company", {})
+    if not isinstance(company, dict):
+        company = {}
+    features = company.get("features", None)
+    if not isinstance(features, dict):
+        features = {}
+    subscription_plan = str(company.get("subscription_plan", "")).lower()
+    takedown = features.get("takedown_services", None)
+    if takedown is None:
+        # No takedown key — infer from plan
+        takedown_enabled = subscription_plan in ENTERPRISE_PLANS
+    else:
+        takedown_enabled = truthy(takedown)
+
+    is_active = truthy(user.get("is_active", False))
+    subscription_status = str(company.get("subscription_status", "")).lower()
+    subscription_ok = subscription_status in ACTIVE_SUBSCRIPTION_STATUSES or subscription_status == ""
+    mdr_feature = features.get("mdr_service", None)
+    if mdr_feature is None:
+        mdr_enabled = is_active and subscription_ok
+    else:
+        mdr_enabled = is_active and truthy(mdr_feature)
+    return {"isTakedownServiceEnabled": takedown_enabled, "isMDREnabled": mdr_enabled,
+            "subscriptionPlan": subscription_plan}
+
+
+def evaluate(data, index):
+    sync_mode = str(data.get("syncMode", "merge")).lower()
+    if sync_mode not in SYNC_MODES:
+        sync_mode = "merge"
+    if sync_mode in ("start", "full"):
+        start_sweep(index)
+    deleted = data.get("deleted", {}) if isinstance(data.get("deleted"), dict) else {}
+    removed = delete_entities(index, deleted.get("entities", []))
+    for page in resource_pages(data, "entities"):
+        merge_entity_page(index, page)
+    for page in resource_pages(data, "alerts"):
+        merge_alert_page(index, page)
+    if sync_mode in ("end", "full"):
+        removed = removed + end_sweep(index)
+    notifying = notifying_policies(data.get("policies", []))
+
+    result = evaluate_index(index, notifying, current_epoch())
+    result["syncMode"] = sync_mode
+    result["entitiesRemoved"] = removed
+    result["pendingAlertEntities"] = len(index["pendingAlerts"])
+    result["isAlertingEnabled"] = len(notifying) > 0
+    user = data.get("user", data)
+    result.update(evaluate_account(user if isinstance(user, dict) else {}))
+    return result
+
+
+CRITERIA = [
+    "isEntityMonitoringActive",
+    "requiredCoveragePercentage",
+    "isAuthorizedModeEnabled",
+    "isAlertingEnabled",
+    "isTakedownServiceEnabled",
+    "isMDREnabled",
+]
+
+
+def transform(input):
+    try:
+        if isinstance(input, str):
+            input = json.loads(input)
+        elif isinstance(input, bytes):
+            input = json.loads(input.decode("utf-8"))
+
+        previous_index = input.get("entityIndex") if isinstance(input, dict) else None
+        data, validation = extract_input(input)
+
+        if validation.get("status") == "failed":
+            return create_response(
+                result={key: False for key in CRITERIA},
+                validation=validation,
+                fail_reasons=["Input validation failed"]
+            )
+        if not isinstance(data, dict):
+            data = {"entities": data} if isinstance(data, list) else {}
+        if previous_index is None:
+            previous_index = data.get("entityIndex")
+
+        index = load_index(previous_index)
+        result = evaluate(data, index)
+
+        pass_reasons = []
+        fail_reasons = []
+        recommendations = []
+        additional_findings = []
+        for key in CRITERIA:
+            additional_findings.append({"metric": key, "status": "pass" if result[key] else "fail"})
+            if result[key]:
+                pass_reasons.append(f"{key} check passed")
+            else:
+                fail_reasons.append(f"{key} check failed")
+                recommendations.append(f"Review ZeroFox configuration for {key}")
+        if result["totalEntities"] and not result["requiredCoveragePercentage"]:
+            fail_reasons.append(f"Monitoring coverage {result['coverage']}% is below {COVERAGE_THRESHOLD}%")
+
+        response = create_response(
+            result=result,
+            validation=validation,
+            pass_reasons=pass_reasons,
+            fail_reasons=fail_reasons,
+            recommendations=recommendations,
+            additional_findings=additional_findings,
+            input_summary={
+                "totalEntities": result["totalEntities"],
+                "entityPagesMerged": index["pagesMerged"],
+                "syncMode": result["syncMode"],
+                "entitiesRemoved": result["entitiesRemoved"],
+                "coverage": result["coverage"]
+            }
+        )
+        response["entityIndex"] = index
+        return response
+
+    except Exception as e:
+        return create_response(
+            result={key: False for key in CRITERIA},
+            validation={"status": "error", "errors": [], "warnings": []},
+            transformation_errors=[str(e)],
+            fail_reasons=[f"Transformation error: {str(e)}"]
+        )
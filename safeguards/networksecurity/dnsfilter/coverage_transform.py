@@ -0,0 +1,180 @@
+import json
+import ast
+
+
+PROTECTED_STATUSES = ("protected", "active", "online")
+ACTIVE_NETWORK_STATUSES = ("active", "protected")
+COVERAGE_THRESHOLD = 95
+SITE_KEYS = ("network_id", "networkId", "site_id", "siteId", "organization_id", "organizationId")
+UNASSIGNED_SITE = "unassigned"
+MAX_REPORTED_SITES = 50
+
+
+def parse_input(input):
+    if isinstance(input, str):
+        try:
+            parsed = ast.literal_eval(input)
+            if isinstance(parsed, dict):
+                return parsed
+        except:
+            pass
+        try:
+            input = input.replace("'", '"')
+            return json.loads(input)
+        except:
+            raise ValueError("Input string is neither valid Python literal nor JSON")
+    if isinstance(input, bytes):
+        return json.loads(input.decode("utf-8"))
+    if isinstance(input, dict):
+        return input
+    raise ValueError("Input must be JSON string, bytes, or dict")
+
+
+def page_items(page, keys):
+    """Records of one page: a bare list, a JSON:API {"data": [...]} page, or a keyed list."""
+    if isinstance(page, list):
+        return page
+    if isinstance(page, dict):
+        for key in keys + ("data",):
+            if isinstance(page.get(key), list):
+                return page[key]
+    return []
+
+
+def iter_pages(data, keys, pages_key):
+    """Pages for a resource: explicit "<resource>Pages", else the single list under one of keys."""
+    pages = data.get(pages_key) if isinstance(data, dict) else None
+    if isinstance(pages, list):
+        return pages
+    for key in keys:
+        if key in data:
+            return [data[key]]
+    return []
+
+
+def new_counters():
+    return {"total": 0, "protected": 0, "statuses": {}, "sites": {}, "statusCache": {}}
+
+
+def add_agent(counters, agent):
+    """Fold one roaming client into the running totals, per-status and per-site counters."""
+    if not isinstance(agent, dict):
+        return
+    attributes = agent.get("attributes") if isinstance(agent.get("attributes"), dict) else agent
+    raw_status = attributes.get("status", "")
+    status = counters["statusCache"].get(raw_status)
+    if status is None:
+        status = str(raw_status or "").lower()
+        counters["statusCache"][raw_status] = status
+    protected = status in PROTECTED_STATUSES
+
+    site = UNASSIGNED_SITE
+    for key in SITE_KEYS:
+        if attributes.get(key) is not None:
+            site = str(attributes[key])
+            break
+
+    counters["total"] = counters["total"] + 1
+    counters["statuses"][status or "unknown"] = counters["statuses"].get(status or "unknown", 0) + 1
+    site_counts = counters["sites"].get(site)
+    if site_counts is None:
+        site_counts = {"total": 0, "protected": 0}
+        counters["sites"][site] = site_counts
+    site_counts["total"] = site_counts["total"] + 1
+    if protected:
+        counters["protected"] = counters["protected"] + 1
+        site_counts["protected"] = site_counts["protected"] + 1
+
+
+def coverage_percentage(protected, total):
+    return round((protected / total) * 100, 2) if total else 0
+
+
+def transform(input):
+    """
+    Answers all DNSFilter coverage criteria from one pass over agents and networks
+
+    Agents and networks may each arrive as a single list or as pages
+    ("agentPages" / "networkPages", each page a list or a JSON:API
+    {"data": [...]} response). Agent pages are folded into per-status and
+    per-site counters as they are read, so memory does not grow with the
+    number of roaming clients.
+
+    Parameters:
+        input (dict): {"agents": [...], "networks": [...]} from GET /agents and GET /networks
+
+    Returns:
+        dict: {"roamingClientCoveragePercentage": boolean, "hasRoamingClientDeployment": boolean,
+               "hasActiveNetworkSites": boolean, "coverage": float, "sites": {...}, ...}
+    """
+    try:
+        data = parse_input(input)
+        for key in ("response", "result", "apiResponse"):
+            if isinstance(data, dict):
+                data = data.get(key, data)
+        if isinstance(data, list):
+            data = {"agents": data}
+
+        counters = new_counters()
+        for page in iter_pages(data, ("agents", "roamingClients"), "agentPages"):
+            for agent in page_items(page, ("agents", "roamingClients")):
+                add_agent(counters, agent)
+
+        network_names = {}
+        active_networks = 0
+        total_networks = 0
+        for page in iter_pages(data, ("networks",), "networkPages"):
+            for network in page_items(page, ("networks",)):
+                if not isinstance(network, dict):
+                    continue
+                attributes = network.get("attributes") if isinstance(network.get("attributes"), dict) else network
+                total_networks = total_networks + 1
+                if network.get("id") is not None:
+                    network_names[str(network["id"])] = attributes.get("name", "")
+                status = str(attributes.get("status", "active") or "active").lower()
+                if attributes.get("policy_id") and status in ACTIVE_NETWORK_STATUSES:
+                    active_networks = active_networks + 1
+
+        total_agents = counters["total"]
+        protected_agents = counters["protected"]
+        coverage = coverage_percentage(protected_agents, total_agents)
+
+        sites = {}
+        sites_below_threshold = []
+        for site, counts in counters["sites"].items():
+            site_coverage = coverage_percentage(counts["protected"], counts["total"])
+            sites[site] = {
+                "name": network_names.get(site, ""),
+                "totalAgents": counts["total"],
+                "protectedAgents": counts["protected"],
+                "coverage": site_coverage
+            }
+            if site_coverage < COVERAGE_THRESHOLD and len(sites_below_threshold) < MAX_REPORTED_SITES:
+                sites_below_threshold.append(site)
+
+        result = {
+            "roamingClientCoveragePercentage": total_agents > 0 and coverage >= COVERAGE_THRESHOLD,
+            "hasRoamingClientDeployment": total_agents > 0,
+            "hasActiveNetworkSites": active_networks > 0,
+            "coverage": coverage,
+            "totalAgents": total_agents,
+            "protectedAgents": protected_agents,
+            "activeAgents": protected_agents,
+            "networkCount": active_networks,
+            "totalNetworks": total_networks,
+            "statusCounts": counters["statuses"],
+            "siteCount": len(sites),
+            "sitesBelowThreshold": sites_below_threshold,
+            "sites": sites
+        }
+        if total_agents == 0:
+            result["error"] = "No roaming clients deployed"
+        return result
+
+    except Exception as e:
+        return {
+            "roamingClientCoveragePercentage": False,
+            "hasRoamingClientDeployment": False,
+            "hasActiveNetworkSites": False,
+            "error": str(e)
+        }
@@ -0,0 +1,546 @@
+"""
+Transformation: organization_transform
+Vendor: Cisco Meraki  |  Category: Network Security
+Evaluates: Organization-wide network security coverage from a bundle of per-network payloads.
+
+Bundle shape (per-network payloads may also be a list of {"networkId": ..., ...}):
+  {
+    "networks": [...],                  GET /organizations/{orgId}/networks
+    "securityEvents": [...],            GET /organizations/{orgId}/appliance/security/events
+    "perNetwork": {
+      "<networkId>": {
+        "airMarshalSettings": {...},    GET /networks/{networkId}/wireless/airMarshal/settings
+        "intrusion": {...},             GET /networks/{networkId}/appliance/security/intrusion
+        "syslogServers": {...},         GET /networks/{networkId}/syslogServers
+        "alertSettings": {...},         GET /networks/{networkId}/alerts/settings
+        "snmpSettings": {...},          GET /networks/{networkId}/snmp
+        "l3FirewallRules": {...},       GET /networks/{networkId}/appliance/firewall/l3FirewallRules
+        "vlans": [...]                  GET /networks/{networkId}/appliance/vlans
+      }
+    }
+  }
+
+Each network is evaluated once against every check using the same rules as the
+single-network transforms (defaultDenyInbound uses the same rule table as the
+Meraki firewall transform), and the per-network results are folded into org-wide
+coverage percentages over all networks. A network that returned no data for a
+check is reported as unknown and counts as not covered, so a check passes only
+when every network passes it. Per-network results are kept under
+"networkResults" for drill-down.
+"""
+import json
+from datetime import datetime
+
+
+def extract_input(input_data):
+    if isinstance(input_data, dict) and "data" in input_data and "validation" in input_data:
+        return input_data["data"], input_data["validation"]
+    data = input_data
+    if isinstance(data, dict):
+        wrapper_keys = ["api_response", "response", "result", "apiResponse", "Output"]
+        for _ in range(3):
+            unwrapped = False
+            for key in wrapper_keys:
+                if key in data and isinstance(data.get(key), dict):
+                    data = data[key]
+                    unwrapped = True
+                    break
+            if not unwrapped:
+                break
+    return data, {"status": "unknown", "errors": [], "warnings": ["Legacy input format"]}
+
+
+def create_response(result, validation=None, pass_reasons=None, fail_reasons=None,
+                    recommendations=None, input_summary=None, transformation_errors=None,
+                    api_errors=None, additional_findings=None):
+    if validation is None:
+        validation = {"status": "unknown", "errors": [], "warnings": []}
+    return {
+        "transformedResponse": result,
+        "additionalInfo": {
+            "dataCollection": {"status": "error" if (api_errors or []) else "success", "errors": api_errors or []},
+            "validation": {"status": validation.get("status", "unknown"), "errors": validation.get("errors", []), "warnings": validation.get("warnings", [])},
+            "transformation": {"status": "error" if (transformation_errors or []) else "success", "errors": transformation_errors or [], "inputSummary": input_summary or {}},
+            "evaluation": {"passReasons": pass_reasons or [], "failReasons": fail_reasons or [], "recommendations": recommendations or [], "additionalFindings": additional_findings or []},
+            "metadata": {"evaluatedAt": datetime.utcnow().isoformat() + "Z", "schemaVersion": "1.0", "transformationId": "organization_transform", "vendor": "Cisco Meraki", "category": "Network Security"}
+        }
+    }
+
+
+NETWORK_CHECKS = [
+    "isIDSEnabled",
+    "isIPSEnabled",
+    "isNetworkSecurityLoggingEnabled",
+    "isFirewallEnabled",
+    "defaultDenyInbound",
+    "isVLANSegmented",
+]
+SECURITY_SYSLOG_ROLES = {"IDS alerts", "Security events", "Appliance event log", "Air Marshal events", "Flows"}
+MAX_REPORTED_NETWORKS = 25
+
+
+def items_of(payload, key="items"):
+    if isinstance(payload, list):
+        return payload
+    if isinstance(payload, dict) and isinstance(payload.get(key), list):
+        return payload[key]
+    return []
+
+
+def network_payloads(data):
+    """networkId -> payload from "perNetwork" (dict or list of {"networkId": ...})."""
+    raw = data.get("perNetwork", data.get("networkPayloads", {}))
+    if isinstance(raw, dict):
+        return raw
+    payloads = {}
+    for entry in raw if isinstance(raw, list) else []:
+        if isinstance(entry, dict):
+            payloads[entry.get("networkId", entry.get("id", str(len(payloads))))] = entry
+    return payloads
+
+
+def merge_org_air_marshal(data, payloads):
+    """Fold an org-level airMarshalSettings.items list into the per-network payloads."""
+    for item in items_of(data.get("airMarshalSettings")):
+        if isinstance(item, dict) and item.get("networkId"):
+            payload = payloads.setdefault(item["networkId"], {})
+            if "airMarshalSettings" not in payload:
+                payload["airMarshalSettings"] = item
+
+
+def check_ids_ips(payload):
+    """(ids, ips) from appliance intrusion mode, else Air Marshal default policy; None when absent."""
+    intrusion = payload.get("intrusion")
+    if isinstance(intrusion, dict) and intrusion.get("mode"):
+        mode = str(intrusion.get("mode")).lower()
+        return mode in ("detection", "prevention"), mode == "prevention"
+    air_marshal = payload.get("airMarshalSettings")
+    if isinstance(air_marshal, dict) and air_marshal.get("defaultPolicy"):
+        enabled = air_marshal.get("defaultPolicy") != "allow"
+        return enabled, enabled
+    return None, None
+
+
+def check_logging(payload):
+    """Syslog, alert destinations or SNMP on the network; None when none of them were returned."""
+    if not any(key in payload for key in ("syslogServers", "alertSettings", "snmpSettings")):
+        return None, []
+    servers = [s for s in items_of(payload.get("syslogServers"), "servers") if isinstance(s, dict)]
+    security_hosts = []
+    for server in servers:
+        roles = server.get("roles", [])
+        if isinstance(roles, list) and SECURITY_SYSLOG_ROLES.intersection(set(roles)):
+            security_hosts.append(server.get("host", "unknown"))
+
+    alerts_configured = False
+    alert_data = payload.get("alertSettings")
+    if isinstance(alert_data, dict):
+        defaults = alert_data.get("defaultDestinations", {}) or {}
+        has_destination = bool(defaults.get("emails") or defaults.get("allAdmins")
+                               or defaults.get("httpServerIds") or defaults.get("snmp"))
+        enabled_alerts = len([a for a in alert_data.get("alerts", []) or [] if isinstance(a, dict) and a.get("enabled")])
+        alerts_configured = has_destination and enabled_alerts > 0
+
+    snmp = payload.get("snmpSettings")
+    snmp_enabled = isinstance(snmp, dict) and snmp.get("access", "none") != "none"
+    return len(servers) > 0 or alerts_configured or snmp_enabled, security_hosts
+
+
+# ============================================================================
+# Rule Table (inline for RestrictedPython compatibility)
+# ============================================================================
+#
+# Rules are normalized into boxes: one (src, srcPorts, dst, dstPorts, protocol)
+# combination of integer intervals per box, numbered in evaluation order. Each
+# dimension keeps its interval boundaries sorted, with a bitset (int) of boxes
+# covering every elementary segment, so "which boxes contain this point" is a
+# binary search and "which boxes contain this interval" is two of them ANDed.
+# Bit order equals rule order, so the lowest set bit is the first matching rule.
+
+IPV4_MAX = 4294967295
+PORT_MAX = 65535
+ANY_TOKENS = ("any", "any-ipv4", "0.0.0.0/0", "*", "")
+RULE_DIMENSIONS = ("src", "srcPorts", "dst", "dstPorts")
+FULL_RANGES = {"src": (0, IPV4_MAX), "srcPorts": (0, PORT_MAX), "dst": (0, IPV4_MAX), "dstPorts": (0, PORT_MAX)}
+MAX_BOXES_PER_RULE = 256
+
+
+def parse_ipv4(text):
+    parts = text.split(".")
+    if len(parts) != 4:
+        return None
+    value = 0
+    for part in parts:
+        if not part.isdigit() or int(part) > 255:
+            return None
+        value = value * 256 + int(part)
+    return value
+
+
+def parse_address(token):
+    """Return the IPv4 (start, end) interval for an address, CIDR or range token, or None."""
+    token = token.strip().lower()
+    if token in ANY_TOKENS:
+        return FULL_RANGES["src"]
+    if "-" in token:
+        first, last = token.split("-", 1)
+        start = parse_ipv4(first.strip())
+        end = parse_ipv4(last.strip())
+        if start is None or end is None or start > end:
+            return None
+        return (start, end)
+    prefix = 32
+    if "/" in token:
+        token, bits = token.split("/", 1)
+        if not bits.isdigit() or int(bits) > 32:
+            return None
+        prefix = int(bits)
+    address = parse_ipv4(token)
+    if address is None:
+        return None
+    size = 2 ** (32 - prefix)
+    start = address - address % size
+    return (start, start + size - 1)
+
+
+def parse_port(token):
+    """Return the (start, end) interval for a port or port range token, or None."""
+    token = token.strip().lower()
+    if token in ANY_TOKENS:
+        return FULL_RANGES["dstPorts"]
+    first, last = token, token
+    if "-" in token:
+        first, last = token.split("-", 1)
+    first = first.strip()
+    last = last.strip()
+    if not first.isdigit() or not last.isdigit() or int(first) > int(last) or int(last) > PORT_MAX:
+        return None
+    return (int(first), int(last))
+
+
+def parse_intervals(tokens, parser):
+    """Parse and merge tokens into sorted intervals; None if any token is unresolvable (named objects, FQDNs, IPv6)."""
+    intervals = []
+    for token in tokens:
+        interval = parser(str(token))
+        if interval is None:
+            return None
+        intervals.append(interval)
+    if not intervals:
+        return None
+    intervals = sorted(intervals)
+    merged = [intervals[0]]
+    for start, end in intervals[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def build_segment_index(intervals):
+    """Sorted boundaries plus, per elementary segment, the bitset of intervals covering it."""
+    starts = {}
+    ends = {}
+    for bit, (start, end) in enumerate(intervals):
+        starts[start] = starts.get(start, 0) | (1 << bit)
+        ends[end + 1] = ends.get(end + 1, 0) | (1 << bit)
+    boundaries = sorted(set(starts) | set(ends))
+    segments = []
+    active = 0
+    for boundary in boundaries:
+        active = (active & ~ends.get(boundary, 0)) | starts.get(boundary, 0)
+        segments.append(active)
+    return {"boundaries": boundaries, "segments": segments}
+
+
+def boxes_at(index, point):
+    """Bitset of boxes whose interval contains point (binary search over boundaries)."""
+    boundaries = index["boundaries"]
+    low = 0
+    high = len(boundaries)
+    while low < high:
+        middle = (low + high) // 2
+        if boundaries[middle] <= point:
+            low = middle + 1
+        else:
+            high = middle
+    return index["segments"][low - 1] if low > 0 else 0
+
+
+def set_bits(bits):
+    """Positions of the set bits, lowest first."""
+    positions = []
+    while bits:
+        lowest = bits & -bits
+        positions.append(lowest.bit_length() - 1)
+        bits = bits ^ lowest
+    return positions
+
+
+def build_rule_table(rules):
+    """
+    Index normalized rules. Each rule is a dict with "action" ("allow"/"deny"),
+    "src", "srcPorts", "dst" (interval lists, None when unresolvable) and
+    "services" ([(protocol, dstPort intervals)], None when unresolvable). A rule
+    flagged "restricted" (zones, applications, users, ...) matches less than its
+    boxes, so it can be found shadowed but never shadows or catches all traffic.
+    """
+    boxes = []
+    first_box = []
+    indexed = []
+    for position, rule in enumerate(rules):
+        first_box.append(len(boxes))
+        services = rule.get("services")
+        if rule.get("src") is None or rule.get("srcPorts") is None or rule.get("dst") is None or services is None:
+            indexed.append(False)
+            continue
+        count = len(rule["src"]) * len(rule["srcPorts"]) * len(rule["dst"])
+        count = count * sum(len(ports) for _, ports in services)
+        if count > MAX_BOXES_PER_RULE:
+            indexed.append(False)
+            continue
+        indexed.append(True)
+        for src in rule["src"]:
+            for src_ports in rule["srcPorts"]:
+                for dst in rule["dst"]:
+                    for protocol, dst_port_list in services:
+                        for dst_ports in dst_port_list:
+                            boxes.append({"rule": position, "src": src, "srcPorts": src_ports, "dst": dst,
+                                          "dstPorts": dst_ports, "protocol": protocol})
+    first_box.append(len(boxes))
+
+    indexes = {}
+    for dimension in RULE_DIMENSIONS:
+        indexes[dimension] = build_segment_index([box[dimension] for box in boxes])
+    protocols = {"any": 0}
+    for bit, box in enumerate(boxes):
+        if rules[box["rule"]].get("restricted"):
+            continue
+        protocols[box["protocol"]] = protocols.get(box["protocol"], 0) | (1 << bit)
+    return {"rules": rules, "boxes": boxes, "firstBox": first_box, "indexed": indexed,
+            "indexes": indexes, "protocols": protocols}
+
+
+def covering_boxes(table, box):
+    """Bitset of boxes that contain box in every dimension."""
+    bits = table["protocols"]["any"]
+    if box["protocol"] != "any":
+        bits = bits | table["protocols"].get(box["protocol"], 0)
+    for dimension in RULE_DIMENSIONS:
+        start, end = box[dimension]
+        index = table["indexes"][dimension]
+        bits = bits & boxes_at(index, start) & boxes_at(index, end)
+        if not bits:
+            return 0
+    return bits
+
+
+def catch_all_rules(table):
+    """Positions, in order, of rules matching all traffic (any protocol, address and port)."""
+    full = dict(FULL_RANGES)
+    full["protocol"] = "any"
+    positions = []
+    for bit in set_bits(covering_boxes(table, full)):
+        position = table["boxes"][bit]["rule"]
+        if not positions or positions[-1] != position:
+            positions.append(position)
+    return positions
+
+
+def shadowed_rules(table):
+    """[(position, shadowing position)] for rules whose every box is contained in some earlier rule's box."""
+    shadowed = []
+    first_box = table["firstBox"]
+    for position in range(len(table["rules"])):
+        if not table["indexed"][position] or first_box[position] == first_box[position + 1]:
+            continue
+        earlier = (1 << first_box[position]) - 1
+        shadowing = None
+        for bit in range(first_box[position], first_box[position + 1]):
+            covered = covering_boxes(table, table["boxes"][bit]) & earlier
+            if not covered:
+                shadowing = None
+                break
+            if shadowing is None:
+                shadowing = table["boxes"][(covered & -covered).bit_length() - 1]["rule"]
+        if shadowing is not None:
+            shadowed.append((position, shadowing))
+    return shadowed
+
+
+def split_tokens(value):
+    if isinstance(value, list):
+        return [str(item) for item in value]
+    return str(value if value is not None else "Any").split(",")
+
+
+def normalize_rule(rule):
+    """Meraki L3 rule -> rule table form. VLAN/FQDN/IPv6 tokens leave the rule unindexed."""
+    protocol = str(rule.get('protocol') or 'any').lower()
+    dst_ports = parse_intervals(split_tokens(rule.get('destPort', 'Any')), parse_port)
+    return {
+        "action": "deny" if str(rule.get('policy', '')).lower() == 'deny' else "allow",
+        "src": parse_intervals(split_tokens(rule.get('srcCidr', 'Any')), parse_address),
+        "srcPorts": parse_intervals(split_tokens(rule.get('srcPort', 'Any')), parse_port),
+        "dst": parse_intervals(split_tokens(rule.get('destCidr', 'Any')), parse_address),
+        "services": [(protocol, dst_ports)] if dst_ports is not None else None,
+    }
+
+
+def check_firewall(payload):
+    """(rules present, first rule matching all traffic is deny), as defaultDenyInbound decides it; None when no L3 rules were returned."""
+    if "l3FirewallRules" not in payload:
+        return None, None
+    rules = [r for r in items_of(payload.get("l3FirewallRules"), "rules") if isinstance(r, dict)]
+    table = build_rule_table([normalize_rule(rule) for rule in rules])
+    catch_all = catch_all_rules(table)
+    default_deny = bool(catch_all) and table["rules"][catch_all[0]]["action"] == "deny"
+    return len(rules) > 0, default_deny
+
+
+def check_vlans(payload):
+    if "vlans" not in payload:
+        return None
+    return len([v for v in items_of(payload.get("vlans")) if isinstance(v, dict)]) >= 2
+
+
+def evaluate_network(payload):
+    """Every per-network check for one network; None marks a check without data."""
+    ids, ips = check_ids_ips(payload)
+    logging_enabled, security_hosts = check_logging(payload)
+    firewall_enabled, default_deny = check_firewall(payload)
+    result = {
+        "isIDSEnabled": ids,
+        "isIPSEnabled": ips,
+        "isNetworkSecurityLoggingEnabled": logging_enabled,
+        "isFirewallEnabled": firewall_enabled,
+        "defaultDenyInbound": default_deny,
+        "isVLANSegmented": check_vlans(payload),
+    }
+    if security_hosts:
+        result["securitySyslogHosts"] = security_hosts
+    return result
+
+
+def reduce_networks(network_results):
+    """
+    Fold per-network results into org-wide counts, coverage percentages and failing networks.
+
+    A network that returned no data for a check is reported as unknown and
+    counts as not covered, so coverage is always measured over every network.
+    """
+    coverage = {}
+    for check in NETWORK_CHECKS:
+        coverage[check] = {"networks": len(network_results), "passing": 0, "unknown": 0,
+                           "failingNetworks": [], "unknownNetworks": []}
+    for network_id, result in network_results.items():
+        for check in NETWORK_CHECKS:
+            value = result.get(check)
+            entry = coverage[check]
+            if value is None:
+                entry["unknown"] = entry["unknown"] + 1
+                if len(entry["unknownNetworks"]) < MAX_REPORTED_NETWORKS:
+                    entry["unknownNetworks"].append(network_id)
+            elif value:
+                entry["passing"] = entry["passing"] + 1
+            elif len(entry["failingNetworks"]) < MAX_REPORTED_NETWORKS:
+                entry["failingNetworks"].append(network_id)
+    for check in NETWORK_CHECKS:
+        entry = coverage[check]
+        entry["coveragePercentage"] = round(entry["passing"] / entry["networks"] * 100, 1) if entry["networks"] else 0.0
+    return coverage
+
+
+def transform(input):
+    try:
+        if isinstance(input, str):
+            input = json.loads(input)
+        elif isinstance(input, bytes):
+            input = json.loads(input.decode("utf-8"))
+        data, validation = extract_input(input)
+        empty = {check: False for check in NETWORK_CHECKS}
+        empty["networkSegmentationActive"] = False
+        if validation.get("status") == "failed":
+            return create_response(result=empty, validation=validation, fail_reasons=["Input validation failed"])
+
+        payloads = network_payloads(data)
+        merge_org_air_marshal(data, payloads)
+        networks = items_of(data.get("networks"))
+        names = {}
+        for network in networks:
+            if isinstance(network, dict) and network.get("id"):
+                names[network["id"]] = network.get("name", "")
+                payloads.setdefault(network["id"], {})
+
+        network_results = {}
+        for network_id, payload in payloads.items():
+            if isinstance(payload, dict):
+                network_results[network_id] = evaluate_network(payload)
+        coverage = reduce_networks(network_results)
+
+        events_active = len(items_of(data.get("securityEvents"), "events")) > 0
+        result = {}
+        for check in NETWORK_CHECKS:
+            entry = coverage[check]
+            result[check] = entry["networks"] > 0 and entry["passing"] == entry["networks"]
+        if events_active:
+            result["isNetworkSecurityLoggingEnabled"] = True
+        network_count = len(networks) if networks else len(network_results)
+        result["networkSegmentationActive"] = network_count >= 2
+
+        pass_reasons = []
+        fail_reasons = []
+        recommendations = []
+        additional_findings = []
+        for check in NETWORK_CHECKS:
+            entry = coverage[check]
+            reason = (check + ": " + str(entry["passing"]) + "/" + str(entry["networks"]) + " networks ("
+                      + str(entry["coveragePercentage"]) + "%)")
+            if entry["unknown"]:
+                reason = reason + ", " + str(entry["unknown"]) + " without data"
+            if result[check]:
+                pass_reasons.append(reason)
+            else:
+                fail_reasons.append(reason)
+                if entry["failingNetworks"]:
+                    recommendations.append("Review " + check + " on networks: "
+                                           + ", ".join(names.get(n) or n for n in entry["failingNetworks"]))
+                if entry["unknownNetworks"]:
+                    recommendations.append("Collect " + check + " data for networks: "
+                                           + ", ".join(names.get(n) or n for n in entry["unknownNetworks"]))
+            additional_findings.append({
+                "metric": check,
+                "status": "pass" if result[check] else "fail",
+                "reason": reason
+            })
+        if events_active:
+            pass_reasons.append("Security event logging active at organization level")
+        if result["networkSegmentationActive"]:
+            pass_reasons.append(str(network_count) + " networks configured")
+        else:
+            fail_reasons.append("Fewer than 2 networks configured")
+
+        return create_response(
+            result={
+                **result,
+                "networkCount": network_count,
+                "coverage": {check: coverage[check]["coveragePercentage"] for check in NETWORK_CHECKS},
+                "networkResults": network_results
+            },
+            validation=validation,
+            pass_reasons=pass_reasons,
+            fail_reasons=fail_reasons,
+            recommendations=recommendations,
+            additional_findings=additional_findings,
+            input_summary={
+                "networksEvaluated": len(network_results),
+                "securityEventsActive": events_active,
+                "coverage": coverage
+            }
+        )
+    except Exception as e:
+        return create_response(
+            result={check: False for check in NETWORK_CHECKS}, validation={"status": "error", "errors": [], "warnings": []},
+            transformation_errors=[str(e)], fail_reasons=[f"Transformation error: {str(e)}"])
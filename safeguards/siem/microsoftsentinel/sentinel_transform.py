@@ -0,0 +1,221 @@
+# sentinel_transform.py
+# Microsoft Sentinel - tenant-level evaluation of all Sentinel checks across workspaces
+
+import json
+import ast
+
+
+# Workspace-level checks, in the order they are reported
+WORKSPACE_CHECKS = [
+    "isSIEMEnabled",
+    "isLogRetentionConfigured",
+    "isSIEMLoggingEnabled",
+    "isAlertingConfigured",
+]
+MINIMUM_RETENTION_DAYS = 90
+
+# Parsed workspace metadata keyed by (resource id, etag or modified date). The
+# same workspace ARM object feeds every Sentinel check and is usually unchanged
+# between evaluations, so its properties are read once. Entries are read-only.
+WORKSPACE_CACHE = {}
+WORKSPACE_CACHE_LIMIT = 1024
+
+
+def parse_input(input):
+    if isinstance(input, str):
+        try:
+            parsed = ast.literal_eval(input)
+            if isinstance(parsed, dict):
+                return parsed
+        except:
+            pass
+        try:
+            input = input.replace("'", '"')
+            return json.loads(input)
+        except:
+            raise ValueError("Input string is neither valid Python literal nor JSON")
+    if isinstance(input, bytes):
+        return json.loads(input.decode("utf-8"))
+    if isinstance(input, dict):
+        return input
+    raise ValueError("Input must be JSON string, bytes, or dict")
+
+
+def list_value(payload):
+    """Flatten an ARM list response, a bare list, or a list of nextLink pages."""
+    if isinstance(payload, dict):
+        value = payload.get("value", [])
+        return value if isinstance(value, list) else []
+    if isinstance(payload, list):
+        items = []
+        for item in payload:
+            if isinstance(item, dict) and isinstance(item.get("value"), list) and "id" not in item:
+                items.extend(item["value"])
+            elif isinstance(item, dict):
+                items.append(item)
+        return items
+    return []
+
+
+def index_by_workspace(payload):
+    """Lower-case workspace name/resource id -> listing, built once per bundle."""
+    index = {}
+    if isinstance(payload, dict):
+        for key, value in payload.items():
+            index[str(key).lower()] = value
+    return index
+
+
+def workspace_listing(index, workspace):
+    """Listing for a workspace, matched by resource id before the (non-unique) name."""
+    listing = None
+    if workspace.get("id"):
+        listing = index.get(str(workspace["id"]).lower())
+    if listing is None:
+        listing = index.get(str(workspace.get("name", "")).lower())
+    return listing
+
+
+def workspace_key(workspace, position):
+    """Result key: the resource id, unique across subscriptions and resource groups."""
+    if workspace.get("id"):
+        return str(workspace["id"])
+    return str(workspace.get("name") or "workspace-" + str(position))
+
+
+def build_workspace_metadata(workspace):
+    properties = workspace.get("properties", {}) or {}
+    retention_days = properties.get("retentionInDays", 0) or 0
+    capping = properties.get("workspaceCapping", {}) or {}
+    return {
+        "name": workspace.get("name", ""),
+        "provisioningState": str(properties.get("provisioningState", "")),
+        "retentionInDays": retention_days,
+        "meetsMinimumRetention": retention_days >= MINIMUM_RETENTION_DAYS,
+        "dailyQuotaGb": capping.get("dailyQuotaGb", -1) if capping else None,
+        "sku": properties.get("sku", workspace.get("sku", {})) or {},
+    }
+
+
+def workspace_metadata(workspace):
+    """Cached metadata for a workspace; workspaces without an id or version marker are not cached."""
+    properties = workspace.get("properties", {}) or {}
+    version = workspace.get("etag") or properties.get("modifiedDate")
+    if not workspace.get("id") or not version:
+        return build_workspace_metadata(workspace)
+    key = (str(workspace["id"]).lower(), str(version))
+    metadata = WORKSPACE_CACHE.get(key)
+    if metadata is None:
+        metadata = build_workspace_metadata(workspace)
+        if len(WORKSPACE_CACHE) >= WORKSPACE_CACHE_LIMIT:
+            del WORKSPACE_CACHE[next(iter(WORKSPACE_CACHE))]
+        WORKSPACE_CACHE[key] = metadata
+    return metadata
+
+
+def connected_sources(connectors):
+    """Names of data connectors with at least one enabled data type."""
+    connected = []
+    for connector in connectors:
+        state = (connector.get("properties", {}) or {}).get("dataTypes", {})
+        if not isinstance(state, dict):
+            continue
+        for dt_val in state.values():
+            if isinstance(dt_val, dict) and str(dt_val.get("state", "")).lower() == "enabled":
+                connected.append(connector.get("name", connector.get("kind", "")))
+                break
+    return connected
+
+
+def check_workspace(workspace, listings):
+    metadata = workspace_metadata(workspace)
+    connectors = list_value(workspace_listing(listings["dataConnectors"], workspace))
+    rules = list_value(workspace_listing(listings["alertRules"], workspace))
+    enabled_rules = [r for r in rules if (r.get("properties", {}) or {}).get("enabled", False)]
+    connected = connected_sources(connectors)
+
+    return {
+        "name": metadata["name"],
+        "isSIEMEnabled": metadata["provisioningState"].lower() == "succeeded",
+        "isLogRetentionConfigured": bool(metadata["retentionInDays"]) and metadata["retentionInDays"] > 0,
+        "isSIEMLoggingEnabled": len(connected) > 0,
+        "isAlertingConfigured": len(enabled_rules) > 0,
+        "retentionInDays": metadata["retentionInDays"],
+        "meetsMinimumRetention": metadata["meetsMinimumRetention"],
+        "dailyQuotaGb": metadata["dailyQuotaGb"],
+        "totalConnectors": len(connectors),
+        "connectedSources": len(connected),
+        "totalRules": len(rules),
+        "enabledRules": len(enabled_rules),
+    }
+
+
+def transform(input):
+    """
+    Evaluates every Sentinel check for all workspaces in a tenant in one pass.
+
+    The per-workspace transforms in this directory each parse one API response.
+    This transform accepts all workspaces' ARM objects, data connector listings
+    and analytics rule listings in one bundle, reads each workspace's metadata
+    once (cached across evaluations by resource id and etag), and rolls the
+    checks up across workspaces.
+
+    Parameters:
+        input (dict): {
+            "workspaces":     GET .../providers/Microsoft.OperationalInsights/workspaces (ARM list, list, or nextLink pages),
+            "dataConnectors": {workspaceName: GET .../providers/Microsoft.SecurityInsights/dataConnectors},
+            "alertRules":     {workspaceName: GET .../providers/Microsoft.SecurityInsights/alertRules}
+        }
+        Listings may be keyed by resource id or workspace name (case-insensitive);
+        the id is matched first, as names repeat across resource groups.
+
+    Returns:
+        dict: {<check>: bool (every workspace passes), ..., "workspaceCount": int,
+               "checkSummary": {...}, "workspaces": {resourceId: {"name": ..., ...}}}
+    """
+    try:
+        data = parse_input(input)
+        for key in ("response", "apiResponse", "result", "data"):
+            if isinstance(data, dict) and isinstance(data.get(key), dict):
+                data = data[key]
+
+        workspaces = list_value(data.get("workspaces", data))
+        listings = {
+            "dataConnectors": index_by_workspace(data.get("dataConnectors")),
+            "alertRules": index_by_workspace(data.get("alertRules")),
+        }
+
+        per_workspace = {}
+        for position, workspace in enumerate(workspaces):
+            if not isinstance(workspace, dict):
+                continue
+            per_workspace[workspace_key(workspace, position)] = check_workspace(workspace, listings)
+
+        # Counted after keying so a workspace repeated across pages is counted once
+        passing = {}
+        for check in WORKSPACE_CHECKS:
+            passing[check] = len([r for r in per_workspace.values() if r[check]])
+
+        workspace_count = len(per_workspace)
+        rolled_up = {}
+        check_summary = {}
+        for check in WORKSPACE_CHECKS:
+            rolled_up[check] = workspace_count > 0 and passing[check] == workspace_count
+            check_summary[check] = {
+                "passingWorkspaces": passing[check],
+                "failingWorkspaces": workspace_count - passing[check],
+                "passPercentage": round(passing[check] / workspace_count * 100, 1) if workspace_count > 0 else 0.0
+            }
+
+        return {
+            **rolled_up,
+            "workspaceCount": workspace_count,
+            "checkSummary": check_summary,
+            "workspaces": per_workspace
+        }
+
+    except Exception as e:
+        result = {check: False for check in WORKSPACE_CHECKS}
+        result["workspaceCount"] = 0
+        result["error"] = str(e)
+        return result
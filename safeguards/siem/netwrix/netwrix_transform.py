@@ -0,0 +1,481 @@
+"""
+Transformation: netwrix_transform
+Vendor: Netwrix  |  Category: SIEM
+
+Evaluates every Netwrix Auditor criterion from one streaming pass over activity
+records:
+
+  isRetentionCompliant, isLogIngestActionActive, isDataSourcesConfigured,
+  isAlertRulesConfigured, isIncidentWorkflowConfigured
+
+Records may arrive as JSON ("ActivityRecordSearch" / "ActivityRecordList", or
+"<key>Pages" when fetched with continuation marks) or as the Netwrix XML export
+(a raw XML string, "xml", or "xmlPages"). Each record is folded into fixed-size
+counters as it is read: oldest/newest timestamps, per-data-source counts, hourly
+ingest buckets over the last week, and alert/workflow indicators. No record
+list or XML tree is built, so memory does not grow with the number of records.
+"""
+import json
+from datetime import datetime
+
+
+def extract_input(input_data):
+    if isinstance(input_data, dict) and "data" in input_data and "validation" in input_data:
+        return input_data["data"], input_data["validation"]
+    data = input_data
+    if isinstance(data, dict):
+        wrapper_keys = ["api_response", "response", "result", "apiResponse", "Output"]
+        for _ in range(3):
+            unwrapped = False
+            for key in wrapper_keys:
+                if key in data and isinstance(data.get(key), dict):
+                    data = data[key]
+                    unwrapped = True
+                    break
+            if not unwrapped:
+                break
+    return data, {"status": "unknown", "errors": [], "warnings": ["Legacy input format"]}
+
+
+def create_response(result, validation=None, pass_reasons=None, fail_reasons=None,
+                    recommendations=None, input_summary=None, transformation_errors=None, api_errors=None, additional_findings=None):
+    if validation is None:
+        validation = {"status": "unknown", "errors": [], "warnings": []}
+    return {
+        "transformedResponse": result,
+        "additionalInfo": {
+            "dataCollection": {
+                "status": "error" if (api_errors or []) else "success",
+                "errors": api_errors or []
+            },
+            "validation": {
+                "status": validation.get("status", "unknown"),
+                "errors": validation.get("errors", []),
+                "warnings": validation.get("warnings", [])
+            },
+            "transformation": {
+                "status": "error" if (transformation_errors or []) else "success",
+                "errors": transformation_errors or [],
+                "inputSummary": input_summary or {}
+            },
+            "evaluation": {
+                "passReasons": pass_reasons or [],
+                "failReasons": fail_reasons or [],
+                "recommendations": recommendations or [],
+                "additionalFindings": additional_findings or []
+            },
+            "metadata": {
+                "evaluatedAt": datetime.utcnow().isoformat() + "Z",
+                "schemaVersion": "1.0",
+                "transformationId": "netwrix_transform",
+                "vendor": "Netwrix",
+                "category": "SIEM"
+            }
+        }
+    }
+
+
+# Fixed-format ISO-8601 parsing straight to epoch seconds. Vendor timestamps
+# repeat heavily, so parsed values are cached by their raw string.
+EPOCH_CACHE = {}
+EPOCH_CACHE_LIMIT = 100000
+
+
+def days_from_civil(year, month, day):
+    """Days since 1970-01-01 for a proleptic Gregorian date."""
+    if month <= 2:
+        year = year - 1
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def parse_epoch_uncached(value):
+    """Parse 'YYYY-MM-DD[THH:MM:SS[.fff]][Z|+HH:MM]' into epoch seconds, or None."""
+    text = value.strip()
+    if len(text) < 10 or text[4] != "-" or text[7] != "-":
+        return None
+    try:
+        month = int(text[5:7])
+        day = int(text[8:10])
+        if month < 1 or month > 12 or day < 1 or day > 31:
+            return None
+        seconds = days_from_civil(int(text[0:4]), month, day) * 86400
+        if len(text) >= 19 and text[10] in "T " and text[13] == ":" and text[16] == ":":
+            seconds = seconds + int(text[11:13]) * 3600 + int(text[14:16]) * 60 + int(text[17:19])
+            tail = text[19:]
+            if tail.startswith("."):
+                cut = 1
+                while cut < len(tail) and tail[cut].isdigit():
+                    cut = cut + 1
+                tail = tail[cut:]
+            if tail and tail not in ("Z", "z"):
+                sign = -1 if tail[0] == "-" else 1
+                offset = tail[1:].replace(":", "")
+                seconds = seconds - sign * (int(offset[0:2]) * 3600 + int(offset[2:4] or 0) * 60)
+        elif len(text) > 10:
+            return None
+        return seconds
+    except (ValueError, IndexError):
+        return None
+
+
+def parse_epoch(value):
+    """Cached epoch-seconds parse of an ISO-8601 string; None when unparseable."""
+    if not isinstance(value, str) or not value:
+        return None
+    cached = EPOCH_CACHE.get(value)
+    if cached is not None or value in EPOCH_CACHE:
+        return cached
+    seconds = parse_epoch_uncached(value)
+    if len(EPOCH_CACHE) < EPOCH_CACHE_LIMIT:
+        EPOCH_CACHE[value] = seconds
+    return seconds
+
+
+# ============================================================================
+# Activity Record Stream (inline for RestrictedPython compatibility)
+# ============================================================================
+#
+# Activity records are folded one at a time into counters whose size depends
+# only on the number of data sources and the ingest window, never on the number
+# of records. Ingest gaps are found from hourly record counts over the last
+# GAP_WINDOW_HOURS, so records may arrive in any order.
+
+RECORD_KEYS = ("ActivityRecordSearch", "activityRecordSearch", "ActivityRecordList", "activityRecordList")
+XML_FIELDS = ("When", "DataSource", "Action", "ObjectType")
+XML_ENTITIES = (("&lt;", "<"), ("&gt;", ">"), ("&quot;", '"'), ("&apos;", "'"), ("&amp;", "&"))
+ALERT_ACTIONS = ("alert", "alert triggered", "security alert", "risk alert")
+RESPONSE_ACTION_KEYWORDS = (
+    "run script", "script executed", "ticket created", "incident created",
+    "remediation", "response action", "blocked", "quarantined",
+    "alert response", "auto remediation", "automated response"
+)
+KNOWN_DATA_SOURCES = {
+    "directory": ("active directory", "azure ad", "entra", "group policy", "logon"),
+    "email": ("exchange",),
+    "fileStorage": ("file server", "netapp", "emc", "isilon", "qumulo", "nutanix"),
+    "collaboration": ("sharepoint", "teams", "onedrive"),
+    "database": ("sql server", "oracle"),
+    "virtualization": ("vmware",),
+    "servers": ("windows server", "event log", "user activity"),
+    "network": ("network device", "cisco", "fortinet", "palo alto"),
+}
+MIN_DATA_SOURCES = 2
+RETENTION_THRESHOLD_DAYS = 180
+INGEST_THRESHOLD_HOURS = 48
+GAP_WINDOW_HOURS = 168
+GAP_THRESHOLD_HOURS = 24
+MAX_REPORTED_GAPS = 20
+SECONDS_PER_HOUR = 3600
+
+
+def new_activity_stream(now):
+    return {
+        "now": now,
+        "records": 0,
+        "timedRecords": 0,
+        "oldest": None,
+        "newest": None,
+        "recent": 0,
+        "alerts": 0,
+        "apiWritten": 0,
+        "responseActions": 0,
+        "sources": {},
+        "hourBuckets": [0] * GAP_WINDOW_HOURS,
+    }
+
+
+def fold_activity(stream, when, data_source, action, object_type):
+    """Fold one activity record's fields into the stream counters."""
+    stream["records"] = stream["records"] + 1
+    source = str(data_source or "").strip()
+    action = str(action or "").lower()
+    object_type = str(object_type or "").lower()
+    seconds = parse_epoch(when)
+
+    if source:
+        counts = stream["sources"].get(source)
+        if counts is None:
+            counts = {"count": 0, "newest": None}
+            stream["sources"][source] = counts
+        counts["count"] = counts["count"] + 1
+        if seconds is not None and (counts["newest"] is None or seconds > counts["newest"]):
+            counts["newest"] = seconds
+
+    if seconds is not None:
+        stream["timedRecords"] = stream["timedRecords"] + 1
+        if stream["oldest"] is None or seconds < stream["oldest"]:
+            stream["oldest"] = seconds
+        if stream["newest"] is None or seconds > stream["newest"]:
+            stream["newest"] = seconds
+        hours_ago = max(0, (stream["now"] - seconds) // SECONDS_PER_HOUR)
+        if hours_ago < INGEST_THRESHOLD_HOURS:
+            stream["recent"] = stream["recent"] + 1
+        if hours_ago < GAP_WINDOW_HOURS:
+            bucket = GAP_WINDOW_HOURS - 1 - hours_ago
+            stream["hourBuckets"][bucket] = stream["hourBuckets"][bucket] + 1
+
+    if action in ALERT_ACTIONS:
+        stream["alerts"] = stream["alerts"] + 1
+    lowered_source = source.lower()
+    if "netwrix api" in lowered_source or "api" in lowered_source:
+        stream["apiWritten"] = stream["apiWritten"] + 1
+    for keyword in RESPONSE_ACTION_KEYWORDS:
+        if keyword in action or keyword in object_type:
+            stream["responseActions"] = stream["responseActions"] + 1
+            break
+
+
+def fold_json_record(stream, record):
+    if not isinstance(record, dict):
+        return
+    fold_activity(
+        stream,
+        record.get("When", record.get("when")),
+        record.get("DataSource", record.get("dataSource")),
+        record.get("Action", record.get("action")),
+        record.get("ObjectType", record.get("objectType"))
+    )
+
+
+def xml_text(record, field):
+    """Text of a direct <field>...</field> child within one record's XML, unescaped."""
+    start = record.find("<" + field + ">")
+    if start < 0:
+        return None
+    start = start + len(field) + 2
+    end = record.find("</" + field + ">", start)
+    if end < 0:
+        return None
+    text = record[start:end].strip()
+    if "&" in text:
+        for entity, char in XML_ENTITIES:
+            text = text.replace(entity, char)
+    return text
+
+
+def find_record_start(text, position):
+    """Offset of the next <ActivityRecord> element (not ActivityRecordList/Search), or -1."""
+    while True:
+        start = text.find("<ActivityRecord", position)
+        if start < 0:
+            return -1
+        following = text[start + 15:start + 16]
+        if following in (">", " ", "\t", "\r", "\n"):
+            return start
+        position = start + 15
+
+
+def fold_xml(stream, text):
+    """Scan an XML export record by record; only one record's slice is held at a time."""
+    position = 0
+    while True:
+        start = find_record_start(text, position)
+        if start < 0:
+            return
+        end = text.find("</ActivityRecord>", start)
+        if end < 0:
+            return
+        record = text[start:end]
+        fields = [xml_text(record, field) for field in XML_FIELDS]
+        fold_activity(stream, fields[0], fields[1], fields[2], fields[3])
+        position = end + 17
+
+
+def fold_page(stream, page):
+    """One page: an XML string, a bare record list, or a JSON page holding one of RECORD_KEYS."""
+    if isinstance(page, str):
+        fold_xml(stream, page)
+        return
+    if isinstance(page, dict):
+        for key in RECORD_KEYS:
+            if isinstance(page.get(key), list):
+                page = page[key]
+                break
+    if isinstance(page, list):
+        for record in page:
+            fold_json_record(stream, record)
+
+
+def activity_pages(data):
+    """Pages for the first record key present: "<key>Pages" (a list of pages) or the single listing under key."""
+    if isinstance(data, (str, list)):
+        return [data]
+    if not isinstance(data, dict):
+        return []
+    for key in RECORD_KEYS + ("xml",):
+        if isinstance(data.get(key + "Pages"), list):
+            return data[key + "Pages"]
+        if key in data:
+            return [data[key]]
+    return []
+
+
+def stream_activity(data, now):
+    stream = new_activity_stream(now)
+    for page in activity_pages(data):
+        fold_page(stream, page)
+    return stream
+
+
+def iso_from_epoch(seconds):
+    return datetime.utcfromtimestamp(seconds).isoformat() + "Z" if seconds is not None else None
+
+
+def ingest_gaps(stream):
+    """Runs of at least GAP_THRESHOLD_HOURS empty hours after the first record in the window, up to now."""
+    buckets = stream["hourBuckets"]
+    first = 0
+    while first < len(buckets) and buckets[first] == 0:
+        first = first + 1
+    window_start = stream["now"] - stream["now"] % SECONDS_PER_HOUR - (GAP_WINDOW_HOURS - 1) * SECONDS_PER_HOUR
+    gaps = []
+    longest = 0
+    run = 0
+    for index in range(first, len(buckets) + 1):
+        if index < len(buckets) and buckets[index] == 0:
+            run = run + 1
+            continue
+        if run > longest:
+            longest = run
+        if run >= GAP_THRESHOLD_HOURS and len(gaps) < MAX_REPORTED_GAPS:
+            gaps.append({"start": iso_from_epoch(window_start + (index - run) * SECONDS_PER_HOUR), "hours": run})
+        run = 0
+    return gaps, longest
+
+
+def source_categories(sources):
+    categories = set()
+    for source in sources:
+        source_lower = source.lower()
+        for category, keywords in KNOWN_DATA_SOURCES.items():
+            if any(kw in source_lower for kw in keywords):
+                categories.add(category)
+                break
+    return categories
+
+
+def activity_metrics(stream):
+    """Timestamp, data-source and ingest figures shared by every Netwrix criterion."""
+    now = stream["now"]
+    gaps, longest_gap = ingest_gaps(stream)
+    stale_sources = []
+    per_source = {}
+    for source in sorted(stream["sources"]):
+        counts = stream["sources"][source]
+        per_source[source] = {"records": counts["count"], "latestRecord": iso_from_epoch(counts["newest"])}
+        if counts["newest"] is None or now - counts["newest"] >= INGEST_THRESHOLD_HOURS * SECONDS_PER_HOUR:
+            stale_sources.append(source)
+    return {
+        "recordCount": stream["records"],
+        "timestampedRecords": stream["timedRecords"],
+        "oldestRecordFound": iso_from_epoch(stream["oldest"]),
+        "latestRecord": iso_from_epoch(stream["newest"]),
+        "retentionDays": (now - stream["oldest"]) // 86400 if stream["oldest"] is not None else 0,
+        "recentRecords": stream["recent"],
+        "dataSourceCount": len(per_source),
+        "dataSources": per_source,
+        "categoriesFound": sorted(source_categories(per_source)),
+        "staleDataSources": stale_sources,
+        "ingestGaps": gaps,
+        "longestIngestGapHours": longest_gap,
+        "alertRecordCount": stream["alerts"],
+        "apiWrittenRecords": stream["apiWritten"],
+        "responseActionRecords": stream["responseActions"],
+    }
+
+
+CRITERIA = [
+    "isRetentionCompliant",
+    "isLogIngestActionActive",
+    "isDataSourcesConfigured",
+    "isAlertRulesConfigured",
+    "isIncidentWorkflowConfigured",
+]
+
+
+def evaluate(data):
+    now = parse_epoch(datetime.utcnow().isoformat() + "Z")
+    stream = stream_activity(data, now)
+    metrics = activity_metrics(stream)
+    records = metrics["recordCount"]
+    return {
+        # Every criterion reads the same stream, so retention is judged by its oldest record
+        "isRetentionCompliant": records > 0 and metrics["retentionDays"] >= RETENTION_THRESHOLD_DAYS,
+        "isLogIngestActionActive": metrics["recentRecords"] > 0,
+        "isDataSourcesConfigured": metrics["dataSourceCount"] >= MIN_DATA_SOURCES,
+        # Only records whose Action is an alert count; ordinary activity says nothing about alert rules
+        "isAlertRulesConfigured": metrics["alertRecordCount"] > 0,
+        "isIncidentWorkflowConfigured": metrics["responseActionRecords"] + metrics["apiWrittenRecords"] > 0,
+        "complianceThresholdDays": RETENTION_THRESHOLD_DAYS,
+        "thresholdHours": INGEST_THRESHOLD_HOURS,
+        "minimumRequired": MIN_DATA_SOURCES,
+        "workflowActionCount": metrics["responseActionRecords"] + metrics["apiWrittenRecords"],
+        **metrics
+    }
+
+
+def transform(input):
+    try:
+        if isinstance(input, bytes):
+            input = input.decode("utf-8")
+        if isinstance(input, str) and not input.lstrip().startswith("<"):
+            input = json.loads(input)
+
+        data, validation = extract_input(input)
+
+        if validation.get("status") == "failed":
+            return create_response(
+                result={key: False for key in CRITERIA},
+                validation=validation,
+                fail_reasons=["Input validation failed"]
+            )
+
+        result = evaluate(data)
+
+        pass_reasons = []
+        fail_reasons = []
+        recommendations = []
+        additional_findings = []
+        for key in CRITERIA:
+            additional_findings.append({"metric": key, "status": "pass" if result[key] else "fail"})
+            if result[key]:
+                pass_reasons.append(f"{key} check passed")
+            else:
+                fail_reasons.append(f"{key} check failed")
+                recommendations.append(f"Review Netwrix configuration for {key}")
+        if not result["isRetentionCompliant"] and result["recordCount"]:
+            fail_reasons.append(f"Oldest record is {result['retentionDays']} days old; "
+                                f"{RETENTION_THRESHOLD_DAYS} days of activity records are required")
+        if result["ingestGaps"]:
+            fail_reasons.append(f"{len(result['ingestGaps'])} ingest gap(s) of at least {GAP_THRESHOLD_HOURS} hours in the last {GAP_WINDOW_HOURS} hours")
+        if result["staleDataSources"]:
+            fail_reasons.append(f"No records in the last {INGEST_THRESHOLD_HOURS} hours from: " + ", ".join(result["staleDataSources"]))
+
+        return create_response(
+            result=result,
+            validation=validation,
+            pass_reasons=pass_reasons,
+            fail_reasons=fail_reasons,
+            recommendations=recommendations,
+            additional_findings=additional_findings,
+            input_summary={
+                "recordCount": result["recordCount"],
+                "dataSourceCount": result["dataSourceCount"],
+                "oldestRecordFound": result["oldestRecordFound"],
+                "retentionDays": result["retentionDays"],
+                "latestRecord": result["latestRecord"],
+                "longestIngestGapHours": result["longestIngestGapHours"]
+            }
+        )
+
+    except Exception as e:
+        return create_response(
+            result={key: False for key in CRITERIA},
+            validation={"status": "error", "errors": [], "warnings": []},
+            transformation_errors=[str(e)],
+            fail_reasons=[f"Transformation error: {str(e)}"]
+        )
@@ -0,0 +1,328 @@
+"""
+Transformation: training_transform
+Vendor: Proofpoint SAT  |  Category: Security Awareness Training
+Evaluates: Every Proofpoint SAT criterion from one pass over Results API records:
+
+  isTrainingEnabled, isCompletionRateAcceptable, isPhishingSimulationEnabled,
+  isReportingEnabled
+
+Training assignment rows ("training", or "trainingPages" when paginated) and
+phishing event rows ("phishing" / "phishingPages") arrive as JSON:API
+{"data": [{"attributes": {...}}]} pages. A phishing simulation produces one row
+per event, so rows fold into one delivery per (user, campaign) before the
+per-campaign and per-department click and report rates are counted.
+"""
+import json
+from datetime import datetime
+
+
+def extract_input(input_data):
+    if isinstance(input_data, dict) and "data" in input_data and "validation" in input_data:
+        return input_data["data"], input_data["validation"]
+    data = input_data
+    if isinstance(data, dict):
+        wrapper_keys = ["api_response", "response", "result", "apiResponse", "Output"]
+        for _ in range(3):
+            unwrapped = False
+            for key in wrapper_keys:
+                if key in data and isinstance(data.get(key), dict):
+                    data = data[key]
+                    unwrapped = True
+                    break
+            if not unwrapped:
+                break
+    return data, {"status": "unknown", "errors": [], "warnings": ["Legacy input format"]}
+
+
+def create_response(result, validation=None, pass_reasons=None, fail_reasons=None,
+                    recommendations=None, input_summary=None, transformation_errors=None,
+                    api_errors=None, additional_findings=None):
+    if validation is None:
+        validation = {"status": "unknown", "errors": [], "warnings": []}
+    return {
+        "transformedResponse": result,
+        "additionalInfo": {
+            "dataCollection": {"status": "error" if (api_errors or []) else "success", "errors": api_errors or []},
+            "validation": {"status": validation.get("status", "unknown"), "errors": validation.get("errors", []), "warnings": validation.get("warnings", [])},
+            "transformation": {"status": "error" if (transformation_errors or []) else "success", "errors": transformation_errors or [], "inputSummary": input_summary or {}},
+            "evaluation": {"passReasons": pass_reasons or [], "failReasons": fail_reasons or [], "recommendations": recommendations or [], "additionalFindings": additional_findings or []},
+            "metadata": {"evaluatedAt": datetime.utcnow().isoformat() + "Z", "schemaVersion": "1.0", "transformationId": "training_transform", "vendor": "Proofpoint SAT", "category": "Security Awareness Training"}
+        }
+    }
+
+
+# ============================================================================
+# Training Analytics (inline for RestrictedPython compatibility)
+# ============================================================================
+#
+# Learner x assignment and learner x phishing-simulation records are folded into
+# counters as they are read. Each (learner, campaign) delivery keeps one int of
+# flags so repeated rows (overlapping pages, one row per phishing event) only
+# count the first time a flag is set; campaign and department groups hold a
+# fixed set of counters each.
+
+COMPLETED = 1
+CLICKED = 2
+REPORTED = 4
+FLAG_COUNTERS = (("completed", COMPLETED), ("clicked", CLICKED), ("reported", REPORTED))
+COMPLETED_STATUSES = ("completed", "complete", "passed", "finished")
+CLICK_EVENTS = ("email click", "clicked", "click", "data submission", "attachment open", "failed", "phished")
+REPORT_EVENTS = ("reported", "email reported", "report")
+LEARNER_KEYS = ("learner_id", "learnerId", "user_id", "userId", "employee_id", "employeeId",
+                "useremailaddress", "email")
+CAMPAIGN_KEYS = ("campaign_id", "campaignId", "campaignname", "assignment_id", "assignmentId",
+                 "assignmentname", "template_id", "templateId", "simulation_id", "simulationId")
+DEPARTMENT_KEYS = ("department", "departmentName", "userdepartment", "user_department", "group", "team")
+STATUS_KEYS = ("status", "state", "assignmentstatus", "completion_status")
+EVENT_KEYS = ("eventtype", "event_type", "result", "action", "status")
+UNASSIGNED = "unassigned"
+MAX_REPORTED_GROUPS = 50
+
+
+def first_value(record, keys, default):
+    for key in keys:
+        value = record.get(key)
+        if value is not None and value != "":
+            return value
+    return default
+
+
+def truthy(value):
+    if isinstance(value, str):
+        return value.lower() in ("true", "yes", "1")
+    return value is True or value == 1
+
+
+def page_items(page):
+    """Records of one page: a bare list, or the list under data/results/items."""
+    if isinstance(page, list):
+        return page
+    if isinstance(page, dict):
+        for key in ("data", "results", "items"):
+            if isinstance(page.get(key), list):
+                return page[key]
+    return []
+
+
+def record_pages(data, keys):
+    """Pages for the first resource present: "<key>Pages" (a list of pages) or the single listing under key."""
+    if not isinstance(data, dict):
+        return []
+    for key in keys:
+        if isinstance(data.get(key + "Pages"), list):
+            return data[key + "Pages"]
+        if key in data:
+            return [data[key]]
+    return []
+
+
+def training_flags(record):
+    status = str(first_value(record, STATUS_KEYS, "")).lower()
+    progress = record.get("progress", record.get("completion_percentage"))
+    if (truthy(record.get("completed", record.get("is_completed"))) or status in COMPLETED_STATUSES
+            or progress == 100 or record.get("completed_at") or record.get("completion_date")):
+        return COMPLETED
+    return 0
+
+
+def phishing_flags(record):
+    event = str(first_value(record, EVENT_KEYS, "")).lower()
+    flags = 0
+    if truthy(record.get("clicked", record.get("has_clicked", record.get("link_clicked")))) or event in CLICK_EVENTS:
+        flags = flags | CLICKED
+    if truthy(record.get("reported", record.get("has_reported"))) or event in REPORT_EVENTS:
+        flags = flags | REPORTED
+    return flags
+
+
+def new_group():
+    return {"total": 0, "completed": 0, "clicked": 0, "reported": 0}
+
+
+def new_stream():
+    return {"overall": new_group(), "campaigns": {}, "departments": {}, "deliveries": {}, "learners": {}}
+
+
+def group_for(groups, name):
+    group = groups.get(name)
+    if group is None:
+        group = new_group()
+        groups[name] = group
+    return group
+
+
+def fold_record(stream, record, flags_for):
+    """Fold one delivery record into the overall, campaign and department counters."""
+    if not isinstance(record, dict):
+        return
+    if isinstance(record.get("attributes"), dict):
+        record = record["attributes"]
+    learner = first_value(record, LEARNER_KEYS, None)
+    campaign = str(first_value(record, CAMPAIGN_KEYS, UNASSIGNED))
+    department = str(first_value(record, DEPARTMENT_KEYS, UNASSIGNED))
+    flags = flags_for(record)
+
+    previous = None
+    if learner is not None:
+        learner = str(learner)
+        key = (learner, campaign)
+        delivery = stream["deliveries"].get(key)
+        if delivery is None:
+            stream["deliveries"][key] = (flags, department)
+        else:
+            # Later rows count in the groups the delivery was first assigned to
+            previous, department = delivery
+            stream["deliveries"][key] = (previous | flags, department)
+        stream["learners"][learner] = True
+    new_flags = flags & ~(previous or 0)
+    if previous is not None and not new_flags:
+        return
+
+    for group in (stream["overall"], group_for(stream["campaigns"], campaign),
+                  group_for(stream["departments"], department)):
+        if previous is None:
+            group["total"] = group["total"] + 1
+        for name, flag in FLAG_COUNTERS:
+            if new_flags & flag:
+                group[name] = group[name] + 1
+
+
+def stream_records(stream, data, keys, flags_for):
+    for page in record_pages(data, keys):
+        for record in page_items(page):
+            fold_record(stream, record, flags_for)
+    return stream
+
+
+def rate(part, total):
+    return round(part / total * 100, 2) if total else 0.0
+
+
+def completion_summary(groups):
+    """Per-group completion, lowest completion rate first, capped at MAX_REPORTED_GROUPS."""
+    ordered = sorted(groups.items(), key=lambda item: (rate(item[1]["completed"], item[1]["total"]), item[0]))
+    summary = {}
+    for name, group in ordered[:MAX_REPORTED_GROUPS]:
+        summary[name] = {"assigned": group["total"], "completed": group["completed"],
+                         "completionRate": rate(group["completed"], group["total"])}
+    return summary
+
+
+def phishing_summary(groups):
+    ordered = sorted(groups.items(), key=lambda item: (-rate(item[1]["clicked"], item[1]["total"]), item[0]))
+    summary = {}
+    for name, group in ordered[:MAX_REPORTED_GROUPS]:
+        summary[name] = {"delivered": group["total"], "clickRate": rate(group["clicked"], group["total"]),
+                         "reportRate": rate(group["reported"], group["total"])}
+    return summary
+
+
+def training_metrics(training, phishing):
+    """Completion and phishing figures shared by every criterion of the vendor."""
+    overall = training["overall"]
+    delivered = phishing["overall"]
+    return {
+        "totalLearners": len(training["learners"]),
+        "totalAssignments": overall["total"],
+        "completedAssignments": overall["completed"],
+        "completionRate": rate(overall["completed"], overall["total"]),
+        "campaignCompletion": completion_summary(training["campaigns"]),
+        "departmentCompletion": completion_summary(training["departments"]),
+        "phishingDeliveries": delivered["total"],
+        "phishingClickRate": rate(delivered["clicked"], delivered["total"]),
+        "phishingReportRate": rate(delivered["reported"], delivered["total"]),
+        "phishingByCampaign": phishing_summary(phishing["campaigns"]),
+        "phishingByDepartment": phishing_summary(phishing["departments"]),
+    }
+
+
+def count_records(data, keys):
+    count = 0
+    for page in record_pages(data, keys):
+        count = count + len(page_items(page))
+    return count
+
+
+COMPLETION_THRESHOLD = 80
+TRAINING_KEYS = ("training", "trainingResults")
+PHISHING_KEYS = ("phishing", "phishingResults")
+
+
+def evaluate(data):
+    training = stream_records(new_stream(), data, TRAINING_KEYS, training_flags)
+    phishing = stream_records(new_stream(), data, PHISHING_KEYS, phishing_flags)
+    metrics = training_metrics(training, phishing)
+    return {
+        "isTrainingEnabled": metrics["totalAssignments"] > 0,
+        "isCompletionRateAcceptable": metrics["totalAssignments"] > 0 and metrics["completionRate"] >= COMPLETION_THRESHOLD,
+        "isPhishingSimulationEnabled": metrics["phishingDeliveries"] > 0,
+        "isReportingEnabled": metrics["totalAssignments"] > 0 or metrics["phishingDeliveries"] > 0,
+        **metrics
+    }
+
+
+CRITERIA = [
+    "isTrainingEnabled",
+    "isCompletionRateAcceptable",
+    "isPhishingSimulationEnabled",
+    "isReportingEnabled",
+]
+
+
+def transform(input):
+    try:
+        if isinstance(input, str):
+            input = json.loads(input)
+        elif isinstance(input, bytes):
+            input = json.loads(input.decode("utf-8"))
+
+        data, validation = extract_input(input)
+
+        if validation.get("status") == "failed":
+            return create_response(
+                result={key: False for key in CRITERIA},
+                validation=validation,
+                fail_reasons=["Input validation failed"]
+            )
+
+        result = evaluate(data)
+
+        pass_reasons = []
+        fail_reasons = []
+        recommendations = []
+        additional_findings = []
+        for key in CRITERIA:
+            additional_findings.append({"metric": key, "status": "pass" if result[key] else "fail"})
+            if result[key]:
+                pass_reasons.append(f"{key} check passed")
+            else:
+                fail_reasons.append(f"{key} check failed")
+                recommendations.append(f"Review Proofpoint SAT configuration for {key}")
+        lagging = [name for name, group in result["departmentCompletion"].items()
+                   if group["completionRate"] < COMPLETION_THRESHOLD and name != UNASSIGNED]
+        if lagging:
+            fail_reasons.append(f"Departments below {COMPLETION_THRESHOLD}% completion: " + ", ".join(lagging))
+
+        return create_response(
+            result=result,
+            validation=validation,
+            pass_reasons=pass_reasons,
+            fail_reasons=fail_reasons,
+            recommendations=recommendations,
+            additional_findings=additional_findings,
+            input_summary={
+                "totalLearners": result["totalLearners"],
+                "totalAssignments": result["totalAssignments"],
+                "completionRate": result["completionRate"],
+                "phishingDeliveries": result["phishingDeliveries"],
+                "phishingClickRate": result["phishingClickRate"]
+            }
+        )
+
+    except Exception as e:
+        return create_response(
+            result={key: False for key in CRITERIA},
+            validation={"status": "error", "errors": [], "warnings": []},
+            transformation_errors=[str(e)],
+            fail_reasons=[f"Transformation error: {str(e)}"]
+        )
@@ -42,6 +42,168 @@ def create_response(result, validation=None, pass_reasons=None, fail_reasons=Non
     }
 
 
+# Tenable reports severity as an int on workbench items and as a name
+# (plus severity_id) on vulns-export findings; raw values resolve through
+# these tables so a finding costs one dict lookup instead of int()/lower().
+SEVERITY_NAMES = {0: "info", 1: "low", 2: "medium", 3: "high", 4: "critical"}
+OPEN_STATES = ("open", "reopened")
+
+
+def build_severity_lookup():
+    lookup = {}
+    for value, name in SEVERITY_NAMES.items():
+        lookup[value] = name
+        lookup[str(value)] = name
+        lookup[name] = name
+        lookup[name.upper()] = name
+        lookup[name.capitalize()] = name
+    return lookup
+
+
+def build_state_lookup():
+    lookup = {"": "open", None: "open"}
+    for name in ("open", "reopened", "fixed"):
+        lookup[name] = name
+        lookup[name.upper()] = name
+        lookup[name.capitalize()] = name
+    return lookup
+
+
+SEVERITY_LOOKUP = build_severity_lookup()
+STATE_LOOKUP = build_state_lookup()
+
+
+def resolve_severity(raw):
+    """Map a raw severity value to its name, memoizing unseen spellings."""
+    name = SEVERITY_LOOKUP.get(raw)
+    if name is not None:
+        return name
+    try:
+        name = SEVERITY_NAMES.get(int(raw), "info")
+    except (TypeError, ValueError):
+        name = SEVERITY_LOOKUP.get(str(raw).strip().lower(), "info")
+    SEVERITY_LOOKUP[raw] = name
+    return name
+
+
+def resolve_state(raw):
+    """Map a raw vulnerability state to open/reopened/fixed, memoizing unseen spellings."""
+    state = STATE_LOOKUP.get(raw)
+    if state is not None:
+        return state
+    state = str(raw).strip().lower() or "open"
+    STATE_LOOKUP[raw] = state
+    return state
+
+
+def new_counters():
+    return {"findings": 0, "bySeverity": {}}
+
+
+def count_findings(findings, counters):
+    """
+    Fold one page or export chunk of findings into severity x state counters.
+
+    Handles both workbench items (severity int, vulnerability_state, count)
+    and vulns-export findings (severity name/severity_id, state). Only the
+    counters are retained, so chunks can be released once counted.
+    """
+    by_severity = counters["bySeverity"]
+    processed = counters["findings"]
+    for finding in findings:
+        if not isinstance(finding, dict):
+            continue
+        raw_severity = finding.get("severity")
+        if raw_severity is None:
+            raw_severity = finding.get("severity_id", 0)
+        severity = resolve_severity(raw_severity)
+        raw_state = finding.get("vulnerability_state")
+        if raw_state is None:
+            raw_state = finding.get("state")
+        state = resolve_state(raw_state)
+        weight = finding.get("count", 1)
+        if not isinstance(weight, int):
+            try:
+                weight = int(weight or 0)
+            except (TypeError, ValueError):
+                weight = 0
+
+        states = by_severity.get(severity)
+        if states is None:
+            states = {}
+            by_severity[severity] = states
+        states[state] = states.get(state, 0) + weight
+        processed = processed + 1
+    counters["findings"] = processed
+    return counters
+
+
+def merge_counters(counters, partial):
+    """Merge a partial counter set (e.g. from a separately evaluated chunk) into counters."""
+    if not isinstance(partial, dict):
+        return counters
+    counters["findings"] = counters["findings"] + int(partial.get("findings", 0) or 0)
+    by_severity = counters["bySeverity"]
+    for severity, partial_states in (partial.get("bySeverity") or {}).items():
+        if not isinstance(partial_states, dict):
+            continue
+        severity = resolve_severity(severity)
+        states = by_severity.get(severity)
+        if states is None:
+            states = {}
+            by_severity[severity] = states
+        for state, count in partial_states.items():
+            state = resolve_state(state)
+            states[state] = states.get(state, 0) + int(count or 0)
+    return counters
+
+
+def iter_chunk_findings(chunk):
+    """Return the findings list for one export chunk (bare list or wrapped dict)."""
+    if isinstance(chunk, list):
+        return chunk
+    if isinstance(chunk, dict):
+        for key in ("vulnerabilities", "findings", "items", "value"):
+            if isinstance(chunk.get(key), list):
+                return chunk[key]
+    return []
+
+
+def critical_open_count(counters):
+    states = counters["bySeverity"].get("critical", {})
+    return sum(states.get(state, 0) for state in OPEN_STATES)
+
+
+def aggregate_chunks(chunks, partial_counts=None):
+    """
+    Chunk-aware aggregation mode for Tenable vulns exports.
+
+    Each chunk is counted and then dropped, so memory is bounded by the
+    largest single chunk plus the counters. Partial counters from chunks
+    evaluated elsewhere are merged, which keeps fan-out across workers
+    a matter of feeding their counters back in as partialCounts.
+    """
+    counters = new_counters()
+    chunk_count = 0
+    partial_count = 0
+    for chunk in chunks or []:
+        count_findings(iter_chunk_findings(chunk), counters)
+        chunk_count = chunk_count + 1
+    for partial in partial_counts or []:
+        merge_counters(counters, partial)
+        partial_count = partial_count + 1
+
+    critical_open = critical_open_count(counters)
+    return {
+        "isCriticalVulnCount": critical_open == 0,
+        "criticalOpenCount": critical_open,
+        "chunksProcessed": chunk_count,
+        "partialCountsMerged": partial_count,
+        "findingsProcessed": counters["findings"],
+        "severityStateCounts": counters["bySeverity"]
+    }
+
+
 def evaluate(data):
     """Core evaluation logic extracted from doc transform."""
     try:
@@ -65,6 +227,17 @@ def evaluate(data):
         # }
         # Severity 4 = Critical
         # When pre-filtered via query params, all returned items are already critical+open.
+        #
+        # GET /vulns/export/{export_uuid}/chunks/{chunk_id} returns a bare list
+        # of findings ({"severity": "critical", "severity_id": 4, "state": "OPEN", ...});
+        # multiple chunks arrive as {"chunks": [[...], [...]]} and previously
+        # aggregated counters as {"partialCounts": [{"findings": int, "bySeverity": {...}}]}.
+
+        if isinstance(data, list):
+            return aggregate_chunks([data])
+
+        if "chunks" in data or "partialCounts" in data:
+            return aggregate_chunks(data.get("chunks"), data.get("partialCounts"))
 
         total_count = data.get("total_vulnerability_count", None)
 
@@ -86,27 +259,12 @@ def evaluate(data):
                 "criticalOpenCount": -1
             }
 
-        critical_open_count = 0
-        for vuln in vulnerabilities:
-            if not isinstance(vuln, dict):
-                continue
-
-            severity = vuln.get("severity", 0)
-            vuln_state = vuln.get("vulnerability_state", "").lower()
-            count = vuln.get("count", 1)
-
-            # severity 4 = Critical in Tenable's scale
-            is_critical = int(severity) == 4
-            is_open = vuln_state in ("open", "reopened", "")
-
-            if is_critical and is_open:
-                critical_open_count = critical_open_count + int(count)
-
-        result = critical_open_count == 0
+        counters = count_findings(vulnerabilities, new_counters())
+        critical_open = critical_open_count(counters)
 
         return {
-            "isCriticalVulnCount": result,
-            "criticalOpenCount": critical_open_count
+            "isCriticalVulnCount": critical_open == 0,
+            "criticalOpenCount": critical_open
         }
     except Exception as e:
         return {"isCriticalVulnCount": False, "error": str(e)}
@@ -122,12 +280,16 @@ def transform(input):
 
         data, validation = extract_input(input)
 
-        # Handle list inputs — use first dict element
+        # Handle list inputs — a wrapped workbench response uses its first
+        # dict element; otherwise the list is a single vulns-export chunk
         if isinstance(data, list):
             dict_items = [item for item in data if isinstance(item, dict)]
-            if dict_items:
-                data = dict_items[0]
-            else:
+            wrapped = [item for item in dict_items
+                       if "vulnerabilities" in item or "total_vulnerability_count" in item
+                       or "chunks" in item or "partialCounts" in item]
+            if wrapped:
+                data = wrapped[0]
+            elif not dict_items:
                 return create_response(
                     result={criteriaKey: False},
                     validation=validation,
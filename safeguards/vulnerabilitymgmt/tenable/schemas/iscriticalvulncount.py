@@ -35,6 +35,8 @@ class IscriticalvulncountInput(BaseModel):
     vulnerabilities: Optional[List[VulnerabilityItem]] = Field(None, description="List of vulnerability objects from GET /workbenches/vulnerabilities")
     value: Optional[List[VulnerabilityItem]] = Field(None, description="Alternative key for vulnerability list")
     items: Optional[List[VulnerabilityItem]] = Field(None, description="Alternative key for vulnerability list")
+    chunks: Optional[List[Any]] = Field(None, description="Vulns export chunks from GET /vulns/export/{export_uuid}/chunks/{chunk_id}")
+    partialCounts: Optional[List[Dict[str, Any]]] = Field(None, description="Severity x state counters from previously aggregated chunks")
 
     class Config:
         extra = "allow"